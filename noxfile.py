@@ -1,9 +1,21 @@
+import hashlib
+from os import environ
 from pathlib import Path
+import time
 
 import nox
 
 
 package_path = Path.cwd()
+
+# Reuse a clean pip-audit result for the same requirements and ignore list for this many hours.
+# pip-audit checks the live vulnerability database, so this bounds how stale a reused result is.
+# Set to 0 to always audit.
+audit_max_age = float(environ.get('NOX_AUDIT_MAX_AGE', 24))
+audit_cache_dpath = Path(
+    environ.get('NOX_AUDIT_CACHE_DIR')
+    or Path(environ.get('XDG_CACHE_HOME') or Path.home() / '.cache', 'nox-audit'),
+)
 nox.options.default_venv_backend = 'uv'
 
 
@@ -22,6 +34,12 @@ def pytest(session: nox.Session):
     )
 
 
+@nox.session
+def bench(session: nox.Session):
+    uv_sync(session, 'pytest', project=True)
+    session.run('python', '-m', 'coppy_tests.bench', *session.posargs)
+
+
 @nox.session
 def prek(session: nox.Session):
     uv_sync(session)
@@ -34,6 +52,11 @@ def prek(session: nox.Session):
 
 @nox.session
 def audit(session: nox.Session):
+    stamp_fpath = audit_stamp_fpath(session)
+    if audited_at := audit_stamp_fresh(stamp_fpath):
+        session.log(f'Skipping pip-audit, the same requirements passed at {audited_at}')
+        return
+
     # Much faster to install the deps first and have pip-audit run against the venv
     uv_sync(session)
     session.run(
@@ -43,6 +66,11 @@ def audit(session: nox.Session):
         *pip_audit_ignore_args(),
     )
 
+    # session.run() fails the session when pip-audit finds something, so this is a clean result.
+    if stamp_fpath:
+        stamp_fpath.parent.mkdir(parents=True, exist_ok=True)
+        stamp_fpath.touch()
+
 
 def uv_sync(session: nox.Session, *groups, project=False, extra=None):
     # If no group given, assume group shares name of session.
@@ -84,3 +112,46 @@ def pip_audit_ignore_args() -> list | tuple:
     ]
 
     return [arg for vuln_id in vuln_ids for arg in ('--ignore-vuln', vuln_id)]
+
+
+def audit_stamp_fpath(session: nox.Session) -> Path | None:
+    """
+    Stamp file for a clean pip-audit of the requirements uv_sync() installs plus the ignore list.
+    It's keyed on those, not the project, so projects with the same dependencies share results.
+    """
+    if audit_max_age <= 0:
+        return None
+
+    requirements = session.run(
+        'uv',
+        'export',
+        '--quiet',
+        '--frozen',
+        '--no-default-groups',
+        '--group',
+        session.name,
+        '--no-emit-project',
+        '--no-hashes',
+        '--no-header',
+        '--no-annotate',
+        silent=True,
+    )
+    # nox --install-only doesn't run commands.
+    if requirements is None:
+        return None
+
+    key_parts = (requirements, *pip_audit_ignore_args())
+    key = hashlib.sha256('\0'.join(key_parts).encode()).hexdigest()
+    return audit_cache_dpath / f'{key}.ok'
+
+
+def audit_stamp_fresh(stamp_fpath: Path | None) -> str | None:
+    """When the stamp's clean audit ran, if it's within NOX_AUDIT_MAX_AGE hours."""
+    if stamp_fpath is None or not stamp_fpath.exists():
+        return None
+
+    audited_at = stamp_fpath.stat().st_mtime
+    if time.time() - audited_at > audit_max_age * 3600:
+        return None
+
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(audited_at))
@@ -0,0 +1,135 @@
+import asyncio
+from collections.abc import Awaitable, Iterable
+from json import loads as json_loads
+import logging
+import os
+from pathlib import Path
+import subprocess
+
+from coppy import trace
+from coppy.logs import logger
+from coppy.utils import CalledProcessError, trace_name
+
+
+log = logger()
+
+
+async def sub_run(
+    *args,
+    capture=False,
+    returns: Iterable[int] | None = None,
+    json=False,
+    **kwargs,
+) -> subprocess.CompletedProcess:
+    """asyncio counterpart of `coppy.utils.sub_run()` with the same arguments and errors."""
+    check = kwargs.pop('check', not bool(returns))
+    capture = kwargs.pop('capture_output', capture or json)
+    args = args + kwargs.pop('args', ())
+    text = kwargs.pop('text', capture)
+    input_ = kwargs.pop('input', None)
+    timeout = kwargs.pop('timeout', None)
+    env = kwargs.pop('env', None)
+
+    if env:
+        kwargs['env'] = os.environ | env
+
+    if capture:
+        kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+
+    if input_ is not None:
+        kwargs['stdin'] = subprocess.PIPE
+        if isinstance(input_, str):
+            input_ = input_.encode()
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('Running: %s\nkwargs: %s', ' '.join(str(a) for a in args), kwargs)
+
+    with trace.span(trace_name(args), 'sub_run', cmd=[str(a) for a in args]) as span:
+        span['cwd'] = str(kwargs.get('cwd') or Path.cwd())
+        try:
+            result = await communicate(args, input_, text, timeout, **kwargs)
+            span['returncode'] = result.returncode
+            if check and result.returncode:
+                raise subprocess.CalledProcessError(
+                    result.returncode,
+                    args,
+                    result.stdout,
+                    result.stderr,
+                )
+
+            if returns and result.returncode not in returns:
+                raise subprocess.CalledProcessError(result.returncode, args[0])
+
+            if capture and result.stderr:
+                log.debug('Captured STDERR: %s', result.stderr)
+
+            if json == 'lines':
+                return [json_loads(line) for line in result.stdout.splitlines() if line.strip()]
+            if json:
+                return json_loads(result.stdout)
+
+            return result
+        except subprocess.CalledProcessError as e:
+            span['returncode'] = e.returncode
+            if capture:
+                raise CalledProcessError.from_cpe(e) from e
+            raise
+        except Exception as e:
+            raise CalledProcessError('n/a', args, '', '') from e
+
+
+async def communicate(
+    args: tuple,
+    input_: bytes | None,
+    text: bool,
+    timeout: float | None,
+    **kwargs,
+):
+    proc = await asyncio.create_subprocess_exec(*args, **kwargs)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(input_), timeout)
+    except (asyncio.CancelledError, TimeoutError) as e:
+        # Don't leave the process running after whoever wanted it has gone away.
+        proc.kill()
+        await proc.wait()
+        if isinstance(e, TimeoutError):
+            raise subprocess.TimeoutExpired(args, timeout) from e
+        raise
+
+    if text:
+        stdout = stdout.decode() if stdout is not None else None
+        stderr = stderr.decode() if stderr is not None else None
+
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+
+async def gather(*aws: Awaitable, limit: int | None = None) -> list:
+    """
+    Like `asyncio.gather()` but runs at most `limit` awaitables at once and, when one fails,
+    cancels the rest and raises that first failure.  Results are in the order given.
+    """
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def run(aw: Awaitable):
+        try:
+            if semaphore is None:
+                return await aw
+            async with semaphore:
+                return await aw
+        finally:
+            # A coroutine cancelled while waiting its turn never started and would warn.
+            if asyncio.iscoroutine(aw):
+                aw.close()
+
+    first_error = None
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [task_group.create_task(run(aw)) for aw in aws]
+    except ExceptionGroup as eg:
+        # The TaskGroup collects every failure; callers want the error that started it.
+        first_error = eg.exceptions[0]
+
+    if first_error:
+        raise first_error
+
+    return [task.result() for task in tasks]
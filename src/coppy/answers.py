@@ -0,0 +1,20 @@
+from pathlib import Path
+
+
+ANSWERS_FNAME = '.copier-answers-py.yaml'
+
+
+def answers_fpath(project_dpath: Path) -> Path:
+    return project_dpath / ANSWERS_FNAME
+
+
+def load(project_dpath: Path) -> dict:
+    """The project's copier answers or an empty dict when it has none."""
+    fpath = answers_fpath(project_dpath)
+    if not fpath.exists():
+        return {}
+
+    # yaml is slow to import and most coppy commands never read answers.
+    import yaml
+
+    return yaml.safe_load(fpath.read_text()) or {}
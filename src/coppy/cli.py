@@ -1,16 +1,57 @@
+import importlib
 from pathlib import Path
-import sys
 
 import click
 
-from coppy.migrate import Migrator, UvVersion
-from coppy.utils import sub_run
+from coppy import trace
 from coppy.version import VERSION
 
 
-@click.group()
-def cli():
-    pass
+class LazyGroup(click.Group):
+    """
+    Imports a subcommand's module only when that subcommand is used.  `coppy version` and the
+    `coppy migrate` hooks copier runs twice per update don't pay to import everything else.
+    """
+
+    def __init__(self, *args, lazy_subcommands: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # command name -> 'module:attribute'
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+
+        module_name, attr = self.lazy_subcommands[cmd_name].split(':')
+        return getattr(importlib.import_module(module_name), attr)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        'doctor': 'coppy.commands.doctor:doctor',
+        'drift': 'coppy.commands.drift:drift',
+        'hooks': 'coppy.commands.hooks:hooks',
+        'migrate': 'coppy.commands.migrate:migrate',
+        'reanswer': 'coppy.commands.reanswer:reanswer',
+        'status': 'coppy.commands.status:status',
+        'update': 'coppy.commands.update:update',
+        'upgrade-deps': 'coppy.commands.upgrade_deps:upgrade_deps',
+        'verify': 'coppy.commands.verify:verify',
+    },
+)
+@click.option(
+    '--trace',
+    'trace_fpath',
+    type=click.Path(path_type=Path, dir_okay=False),
+    help=f'Write a Chrome trace of subprocesses and phases to FILE (or set {trace.ENV_VAR})',
+)
+def cli(trace_fpath: Path | None):
+    if trace_fpath:
+        trace.start(trace_fpath)
 
 
 @cli.command()
@@ -18,47 +59,5 @@ def version():
     print('coppy version:', VERSION)
 
 
-@cli.command(hidden=True)
-@click.argument('stage', type=click.Choice(('before', 'after')))
-def migrate(stage: str):
-    """Used internally by coppy"""
-    migrator = Migrator(project_dpath=Path.cwd())
-    if stage == 'before':
-        migrator.before()
-        return
-
-    migrator.after()
-
-
-@cli.command()
-@click.argument(
-    'project_dpath',
-    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
-    default=Path.cwd,
-)
-@click.option('--head', 'use_head', is_flag=True, help='Use HEAD instead of latest version tag')
-def update(project_dpath: Path, use_head: bool):
-    """
-    Update project from coppy template
-    """
-    # Check before updating project or the user may have to manually fix the uv.toml file before
-    # their project will work again.
-    UvVersion.check()
-
-    vcs_ref = ('--vcs-ref', 'HEAD') if use_head else ()
-    sub_run(
-        sys.executable,
-        '-m',
-        'copier',
-        'update',
-        '--answers-file',
-        '.copier-answers-py.yaml',
-        '--trust',
-        '--skip-answered',
-        *vcs_ref,
-        project_dpath,
-    )
-
-
 if __name__ == '__main__':
     cli()
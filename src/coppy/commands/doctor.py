@@ -0,0 +1,26 @@
+import json
+
+import click
+
+from coppy import tools
+
+
+@click.command()
+@click.option('--json', 'as_json', is_flag=True, help='Print results as JSON')
+def doctor(as_json: bool):
+    """
+    Check that the tools coppy needs are installed and new enough
+    """
+    probes = tools.probe_all()
+
+    if as_json:
+        click.echo(json.dumps([probe.as_dict() for probe in probes], indent=2))
+    else:
+        for probe in probes:
+            version = tools.version_text(probe.version) if probe.version else '?'
+            detail = probe.problem or f'{probe.fpath}{" (cached)" if probe.cached else ""}'
+            status = 'fail' if probe.problem else 'ok'
+            click.echo(f'{status:>4}  {probe.tool.name:<5} {version:<12} {detail}')
+
+    if problems := [probe for probe in probes if probe.problem]:
+        raise click.ClickException(f'{len(problems)} tool problem(s) found')
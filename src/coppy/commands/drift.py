@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import click
+
+from coppy import fleet
+
+
+@click.command()
+@click.argument(
+    'project_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option(
+    '--glob',
+    'globs',
+    multiple=True,
+    help='Glob matching project directories (repeatable)',
+)
+@click.option(
+    '--manifest',
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help='File listing one project directory per line',
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=fleet.DEFAULT_JOBS,
+    show_default=True,
+    help='Projects compared concurrently',
+)
+@click.option('--json', 'as_json', is_flag=True, help='Print a JSON summary')
+def drift(
+    project_dpaths: tuple[Path, ...],
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    jobs: int,
+    as_json: bool,
+):
+    """
+    Show template-managed files projects have changed since their last update
+
+    Projects are compared to the template rendered at their recorded version and answers.  The
+    most drifted projects are listed first.
+    """
+    # jinja2 and yaml are slow to import and only needed here.
+    from coppy import drift as fleet_drift
+
+    if project_dpaths or globs or manifest:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+    else:
+        projects = [Path.cwd()]
+    drifts = fleet_drift.drift_fleet(projects, jobs)
+    drifts.sort(key=lambda project: (-len(project.files), -project.lines))
+    summary = fleet_drift.summary(drifts)
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        for project in drifts:
+            if not project.ok or project.status == 'skipped':
+                click.echo(
+                    f'{project.status}: {project.project_dpath}: {project.message}',
+                    err=True,
+                )
+                continue
+            click.echo(
+                f'{len(project.files):>3} files {project.lines:>6} lines  '
+                f'{project.project_dpath} ({project.commit})',
+            )
+            for file in project.files:
+                size = '' if file.added is None else f'+{file.added} -{file.removed}'
+                click.echo(f'    {file.status:<8} {size:<12} {file.path}')
+
+        if len(drifts) > 1:
+            counts = ', '.join(f'{count} {status}' for status, count in summary['counts'].items())
+            click.echo(f'{len(drifts)} projects: {counts}', err=True)
+
+    if failed := summary['counts']['failed']:
+        raise click.ClickException(f'{failed} project drift check(s) failed')
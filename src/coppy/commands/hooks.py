@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+import time
+
+import click
+
+from coppy import fleet, trace
+from coppy import hooks as prek_hooks
+
+
+@click.group()
+def hooks():
+    """Manage prek hooks across projects"""
+
+
+@hooks.command()
+@click.argument(
+    'project_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option(
+    '--glob',
+    'globs',
+    multiple=True,
+    help='Glob matching project directories (repeatable)',
+)
+@click.option(
+    '--manifest',
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help='File listing one project directory per line',
+)
+@click.option('--dry-run', is_flag=True, help="List the hook repos and don't build anything")
+@click.option('--json', 'as_json', is_flag=True, help='Print a JSON summary')
+def warm(
+    project_dpaths: tuple[Path, ...],
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    dry_run: bool,
+    as_json: bool,
+):
+    """
+    Build hook environments for projects in prek's shared cache
+
+    Each hook repo+rev the projects' prek.toml files use is built once, so first commits in
+    every project don't have to.
+    """
+    if project_dpaths or globs or manifest:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+    else:
+        projects = [Path.cwd()]
+
+    collected = prek_hooks.collect(projects)
+    repos = list(collected.repos.values())
+    for project_dpath, reason in collected.skipped.items():
+        click.echo(f'skipped: {project_dpath}: {reason}', err=True)
+
+    if as_json:
+        click.echo(json.dumps(collected.as_dict(), indent=2))
+    else:
+        for repo in repos:
+            click.echo(f'{repo.repo}@{repo.rev}  {len(repo.projects)} projects')
+        click.echo(
+            f'{len(repos)} unique hook repos from {collected.references} references in '
+            f'{len(projects) - len(collected.skipped)} projects',
+            err=True,
+        )
+
+    if dry_run:
+        return
+
+    start = time.perf_counter()
+    with trace.span('prek install-hooks', 'phase', repos=len(repos)):
+        prek_hooks.warm(repos)
+    if not as_json:
+        click.echo(f'Hook environments ready in {time.perf_counter() - start:.1f}s', err=True)
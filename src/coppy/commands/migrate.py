@@ -0,0 +1,19 @@
+from pathlib import Path
+
+import click
+
+from coppy import trace
+from coppy.migrate import Migrator
+
+
+@click.command(hidden=True)
+@click.argument('stage', type=click.Choice(('before', 'after')))
+def migrate(stage: str):
+    """Used internally by coppy"""
+    with trace.span(f'migrate {stage}', 'phase'):
+        migrator = Migrator(project_dpath=Path.cwd())
+        if stage == 'before':
+            migrator.before()
+            return
+
+        migrator.after()
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import click
+
+from coppy import fleet
+
+
+@click.command()
+@click.argument(
+    'project_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option(
+    '-a',
+    '--answer',
+    'answer_pairs',
+    multiple=True,
+    required=True,
+    help='NAME=VALUE answer to change (repeatable)',
+)
+@click.option(
+    '--glob',
+    'globs',
+    multiple=True,
+    help='Glob matching project directories (repeatable)',
+)
+@click.option(
+    '--manifest',
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help='File listing one project directory per line',
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=fleet.DEFAULT_JOBS,
+    show_default=True,
+    help='Projects changed concurrently',
+)
+@click.option('--dry-run', is_flag=True, help="Show the diff and don't change the projects")
+@click.option('--json', 'as_json', is_flag=True, help='Print a JSON summary')
+def reanswer(
+    project_dpaths: tuple[Path, ...],
+    answer_pairs: tuple[str, ...],
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    jobs: int,
+    dry_run: bool,
+    as_json: bool,
+):
+    """
+    Change project answers and re-render only the files that use them
+
+    The template version isn't changed.  Like an update, local edits are merged with the
+    re-rendered files and dirty repos are skipped.
+    """
+    # jinja2 and yaml are slow to import and only needed here.
+    from coppy import reanswer as fleet_reanswer
+
+    try:
+        new_answers = fleet_reanswer.parse_answers(answer_pairs)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--answer') from e
+
+    if project_dpaths or globs or manifest:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+    else:
+        projects = [Path.cwd()]
+    results = fleet_reanswer.reanswer_fleet(projects, new_answers, jobs, dry_run)
+    summary = fleet_reanswer.summary(results)
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        for result in results:
+            message = f'  {result.message}' if result.message else ''
+            if dry_run and result.changes:
+                click.echo(result.diff(), nl=False)
+            click.echo(f'{result.status:>8}  {result.project_dpath}{message}', err=True)
+            if not dry_run:
+                for change in result.changes:
+                    click.echo(f'    {change.status:<8} {change.path}', err=True)
+
+        if len(results) > 1:
+            counts = ', '.join(f'{count} {status}' for status, count in summary['counts'].items())
+            click.echo(f'{len(results)} projects: {counts}', err=True)
+
+    if failed := summary['counts']['failed']:
+        raise click.ClickException(f'{failed} project(s) failed')
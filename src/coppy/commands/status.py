@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import click
+
+from coppy import status as fleet_status
+
+
+@click.command()
+@click.argument(
+    'root_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option('--fetch', is_flag=True, help='Fetch the template before comparing versions')
+@click.option('--outdated', is_flag=True, help='Only list projects behind the latest version')
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=fleet_status.DEFAULT_JOBS,
+    show_default=True,
+    help='Directories scanned concurrently',
+)
+@click.option('--json', 'as_json', is_flag=True, help='Print a JSON summary')
+def status(
+    root_dpaths: tuple[Path, ...],
+    fetch: bool,
+    outdated: bool,
+    jobs: int,
+    as_json: bool,
+):
+    """
+    Show how far projects under ROOTS (default: cwd) are behind the template
+
+    Answers files are indexed in coppy's cache so rescans only read the ones that changed.
+    """
+    statuses = fleet_status.FleetIndex().scan(root_dpaths or (Path.cwd(),), jobs)
+    fleet_status.compare(statuses, fetch)
+    if outdated:
+        statuses = [project for project in statuses if project.status == 'behind']
+
+    summary = fleet_status.summary(statuses)
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+        return
+
+    for project in statuses:
+        behind = '?' if project.behind is None else str(project.behind)
+        message = f'  {project.message}' if project.message else ''
+        click.echo(f'{behind:>3}  {project.commit:<20} {project.project_dpath}{message}')
+
+    counts = ', '.join(f'{count} {name}' for name, count in summary['counts'].items())
+    latest = sorted({project.latest for project in statuses if project.latest})
+    click.echo(
+        f'{len(statuses)} projects: {counts}'
+        + (f' (latest: {", ".join(latest)})' if latest else ''),
+        err=True,
+    )
@@ -0,0 +1,247 @@
+import json
+from pathlib import Path
+import time
+
+import click
+
+from coppy import fleet, logs, template_cache, trace
+from coppy.commands import verify as verify_cmd
+from coppy.migrate import UvVersion
+from coppy.utils import sub_run
+
+
+@click.command()
+@click.argument(
+    'project_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option('--head', 'use_head', is_flag=True, help='Use HEAD instead of latest version tag')
+@click.option(
+    '--glob',
+    'globs',
+    multiple=True,
+    help='Fleet: glob matching project directories (repeatable)',
+)
+@click.option(
+    '--manifest',
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help='Fleet: file listing one project directory per line',
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=fleet.DEFAULT_JOBS,
+    show_default=True,
+    help='Fleet: concurrent project updates',
+)
+@click.option('--json', 'as_json', is_flag=True, help='Fleet: print a JSON summary')
+@click.option(
+    '--cache/--no-cache',
+    'use_cache',
+    default=True,
+    help="Read the template from coppy's local mirror instead of cloning it",
+)
+@click.option(
+    '--incremental',
+    is_flag=True,
+    help='Only render and merge template files that changed, or do a full update when needed',
+)
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    help="Show the diff, or with --json the files, an update would change and don't update",
+)
+@click.option(
+    '--verify',
+    'run_verify',
+    is_flag=True,
+    help="Afterwards, run only the checks affected by each updated project's changes",
+)
+@logs.opts_init
+def update(
+    project_dpaths: tuple[Path, ...],
+    use_head: bool,
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    jobs: int,
+    as_json: bool,
+    use_cache: bool,
+    incremental: bool,
+    dry_run: bool,
+    run_verify: bool,
+):
+    """
+    Update project(s) from coppy template
+
+    Giving more than one project, or using --glob/--manifest, updates the projects as a fleet:
+    in parallel, non-interactively, and skipping dirty repos.
+    """
+    if dry_run:
+        with trace.span('update preview', 'phase'):
+            preview_projects(project_dpaths, use_head, globs, manifest, as_json, use_cache)
+        return
+
+    with trace.span('update', 'phase'):
+        update_projects(
+            project_dpaths,
+            use_head,
+            globs,
+            manifest,
+            jobs,
+            as_json,
+            use_cache,
+            incremental,
+            run_verify,
+        )
+
+
+def preview_projects(
+    project_dpaths: tuple[Path, ...],
+    use_head: bool,
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    as_json: bool,
+    use_cache: bool,
+):
+    # jinja2 and yaml are slow to import and only needed here.
+    from coppy import preview
+
+    if not use_cache:
+        raise click.UsageError('--dry-run reads the template from the cache, drop --no-cache')
+
+    if project_dpaths or globs or manifest:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+    else:
+        projects = [Path.cwd()]
+    previews = preview.preview_fleet(projects, use_head)
+    summary = preview.summary(previews)
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        for project_preview in previews:
+            if project_preview.status in ('skipped', 'failed'):
+                click.echo(
+                    f'{project_preview.status}: {project_preview.project_dpath}: '
+                    f'{project_preview.message}',
+                    err=True,
+                )
+                continue
+            if len(previews) > 1 and project_preview.changes:
+                click.echo(
+                    f'# {project_preview.project_dpath}: '
+                    f'{project_preview.from_ref} -> {project_preview.to_ref}',
+                )
+            click.echo(project_preview.diff(), nl=False)
+
+        if len(previews) > 1:
+            counts = ', '.join(f'{count} {status}' for status, count in summary['counts'].items())
+            click.echo(f'{len(previews)} projects: {counts}', err=True)
+
+    if failed := summary['counts']['failed']:
+        raise click.ClickException(f'{failed} project preview(s) failed')
+
+
+def update_projects(
+    project_dpaths: tuple[Path, ...],
+    use_head: bool,
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    jobs: int,
+    as_json: bool,
+    use_cache: bool,
+    incremental: bool,
+    run_verify: bool,
+):
+    if incremental and not use_cache:
+        raise click.UsageError('--incremental reads the template from the cache, drop --no-cache')
+
+    # Check before updating project or the user may have to manually fix the uv.toml file before
+    # their project will work again.
+    with trace.span('uv version check', 'phase'):
+        UvVersion.check()
+
+    single = len(project_dpaths) <= 1 and not globs and not manifest
+    if single:
+        projects = [project_dpaths[0] if project_dpaths else Path.cwd()]
+    else:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+
+    def on_result(result: fleet.ProjectResult):
+        if as_json:
+            return
+        message = f'  {result.message}' if result.message else ''
+        click.echo(
+            f'{result.status:>8} {result.duration:7.1f}s  {result.project_dpath}{message}',
+        )
+
+    start = time.perf_counter()
+    results = []
+    full_projects = projects
+    if incremental:
+        # jinja2 and yaml are slow to import and only needed here.
+        from coppy import incremental as incremental_update
+
+        with trace.span('incremental update', 'phase'):
+            results, full_projects = incremental_update.update_fleet(
+                projects,
+                use_head,
+                jobs=jobs,
+                on_result=on_result,
+            )
+
+    if single:
+        if full_projects:
+            update_project(full_projects[0], use_head, use_cache)
+        elif results[0].status in ('skipped', 'failed'):
+            # Same as copier refusing to update, e.g. a dirty working tree
+            raise click.ClickException(f'project update {results[0].status}: {results[0].message}')
+        if run_verify and (full_projects or results[0].status == 'updated'):
+            verified = verify_updated(projects, jobs, as_json=False)
+            if verified['counts']['failed']:
+                raise click.ClickException('project verification failed')
+        return
+
+    if full_projects:
+        results += fleet.update_fleet(
+            full_projects,
+            use_head,
+            jobs=jobs,
+            on_result=on_result,
+            use_cache=use_cache,
+        )
+    order = {project_dpath: index for index, project_dpath in enumerate(projects)}
+    results.sort(key=lambda result: order[result.project_dpath])
+    summary = fleet.summary(results, time.perf_counter() - start)
+
+    if run_verify:
+        updated = [result.project_dpath for result in results if result.status == 'updated']
+        summary['verify'] = verify_updated(updated, jobs, as_json)
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        counts = ', '.join(f'{count} {status}' for status, count in summary['counts'].items())
+        click.echo(f'{len(results)} projects in {summary["duration"]:.1f}s: {counts}')
+
+    if failed := summary['counts']['failed']:
+        raise click.ClickException(f'{failed} project update(s) failed')
+    if run_verify and (failed := summary['verify']['counts']['failed']):
+        raise click.ClickException(f'{failed} project verification(s) failed')
+
+
+def verify_updated(projects: list[Path], jobs: int, as_json: bool) -> dict:
+    """Run the checks affected by the updates' uncommitted changes."""
+    with trace.span('verify', 'phase', projects=len(projects)):
+        return verify_cmd.verify_projects(projects, jobs, None, False, as_json)
+
+
+def update_project(project_dpath: Path, use_head: bool, use_cache: bool):
+    """Interactive copier update of a single project."""
+    kwargs = {}
+    if use_cache and (git_env := template_cache.git_envs([project_dpath])[project_dpath]):
+        kwargs['env'] = git_env
+    with trace.span('copier update', 'phase', project=project_dpath.as_posix()):
+        sub_run(*fleet.copier_update_args(project_dpath, use_head), **kwargs)
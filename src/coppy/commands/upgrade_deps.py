@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+import time
+
+import click
+
+from coppy import fleet, trace, upgrade
+
+
+@click.command('upgrade-deps')
+@click.argument(
+    'project_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option(
+    '--glob',
+    'globs',
+    multiple=True,
+    help='Glob matching project directories (repeatable)',
+)
+@click.option(
+    '--manifest',
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help='File listing one project directory per line',
+)
+@click.option(
+    '--step',
+    'steps',
+    type=click.Choice(upgrade.STEPS),
+    multiple=True,
+    help='Only upgrade these (repeatable, default: all)',
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=fleet.DEFAULT_JOBS,
+    show_default=True,
+    help='Groups resolved concurrently',
+)
+@click.option('--dry-run', is_flag=True, help="Show how projects are grouped and don't upgrade")
+@click.option('--json', 'as_json', is_flag=True, help='Print a JSON summary')
+def upgrade_deps(
+    project_dpaths: tuple[Path, ...],
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    steps: tuple[str, ...],
+    jobs: int,
+    dry_run: bool,
+    as_json: bool,
+):
+    """
+    Upgrade mise tools, uv locks, and prek hooks across projects
+
+    Projects with the same tools, dependencies, or hook repos are grouped and each group is
+    resolved once, in parallel, then applied to every member.  Dirty repos are skipped.
+    """
+    if project_dpaths or globs or manifest:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+    else:
+        projects = [Path.cwd()]
+
+    start = time.perf_counter()
+    steps = tuple(step for step in upgrade.STEPS if step in steps) or upgrade.STEPS
+    upgrade_plan = upgrade.plan(projects, steps, jobs)
+
+    if not as_json:
+        for project_dpath, reason in upgrade_plan.skipped.items():
+            click.echo(f'skipped: {project_dpath}: {reason}', err=True)
+        for step, groups in upgrade_plan.groups.items():
+            members = len({dpath for group in groups for dpath in group})
+            unit = 'hook repos' if step == 'prek' else 'groups'
+            click.echo(f'{step}: {members} projects in {len(groups)} {unit}', err=True)
+
+    if dry_run:
+        if as_json:
+            click.echo(json.dumps(upgrade_plan.as_dict(), indent=2))
+        return
+
+    with trace.span('upgrade deps', 'phase', projects=len(projects)):
+        upgrades = upgrade.upgrade_fleet(projects, upgrade_plan, jobs)
+    summary = upgrade.summary(upgrade_plan, upgrades)
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        for project in upgrades:
+            if project.status == 'skipped':
+                continue
+            click.echo(f'{project.status:>9}  {project.project_dpath}  {project.message}')
+        counts = ', '.join(f'{count} {status}' for status, count in summary['counts'].items())
+        click.echo(f'{len(upgrades)} projects in {time.perf_counter() - start:.1f}s: {counts}')
+
+    if failed := summary['counts']['failed']:
+        raise click.ClickException(f'{failed} project upgrade(s) failed')
@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+import click
+
+from coppy import fleet
+from coppy import verify as post_update
+
+
+def echo_result(result: post_update.ProjectVerify):
+    checks = ', '.join(
+        f'{check.name} {check.status}'
+        + (f' {check.duration:.1f}s' if check.status in ('passed', 'failed') else '')
+        for check in result.checks
+    )
+    click.echo(
+        f'{result.status:>10} {result.duration:7.1f}s  {result.project_dpath}  '
+        f'{checks or result.message}',
+    )
+    for check in result.checks:
+        if check.status == 'failed':
+            click.echo(f'    {check.name}: {check.message}', err=True)
+
+
+def verify_projects(
+    projects: list[Path],
+    jobs: int,
+    since: str | None,
+    dry_run: bool,
+    as_json: bool,
+) -> dict:
+    """Verify the projects, echoing each result unless `as_json`, and return the summary."""
+    results = post_update.verify_fleet(
+        projects,
+        jobs,
+        since,
+        dry_run,
+        on_result=None if as_json else echo_result,
+    )
+    summary = post_update.summary(results)
+    if not as_json and len(results) > 1:
+        counts = ', '.join(f'{count} {status}' for status, count in summary['counts'].items())
+        click.echo(f'{len(results)} projects verified: {counts}')
+    return summary
+
+
+@click.command()
+@click.argument(
+    'project_dpaths',
+    nargs=-1,
+    type=click.Path(path_type=Path, exists=True, file_okay=False, resolve_path=True),
+)
+@click.option(
+    '--glob',
+    'globs',
+    multiple=True,
+    help='Glob matching project directories (repeatable)',
+)
+@click.option(
+    '--manifest',
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    help='File listing one project directory per line',
+)
+@click.option(
+    '--since',
+    metavar='REF',
+    help='Verify changes since the git ref, e.g. a committed update, instead of uncommitted ones',
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=fleet.DEFAULT_JOBS,
+    show_default=True,
+    help='Projects verified concurrently',
+)
+@click.option('--dry-run', is_flag=True, help="List the checks that would run and don't run them")
+@click.option('--json', 'as_json', is_flag=True, help='Print a JSON summary')
+def verify(
+    project_dpaths: tuple[Path, ...],
+    globs: tuple[str, ...],
+    manifest: Path | None,
+    since: str | None,
+    jobs: int,
+    dry_run: bool,
+    as_json: bool,
+):
+    """
+    Run only the checks affected by an update's changes
+
+    Changed dependency files run `uv sync` then the tests, ruff.toml and Python files run ruff,
+    Markdown files and their config run rumdl, and prek's config runs every hook.
+    """
+    if project_dpaths or globs or manifest:
+        projects = fleet.find_projects(project_dpaths, globs, manifest)
+    else:
+        projects = [Path.cwd()]
+
+    summary = verify_projects(projects, jobs, since, dry_run, as_json)
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+
+    if failed := summary['counts']['failed']:
+        raise click.ClickException(f'{failed} project verification(s) failed')
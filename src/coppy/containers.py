@@ -0,0 +1,9 @@
+from blazeutils import containers
+
+
+class LazyDict(containers.LazyDict):
+    def __getattr__(self, attr):
+        val = super().__getattr__(attr)
+        if isinstance(val, dict) and not isinstance(val, LazyDict):
+            return LazyDict(val)
+        return val
@@ -0,0 +1,168 @@
+"""
+How far projects have drifted from the template: `coppy drift`.
+
+Each project is compared to an in-memory render (`coppy.render`) of the template at the
+project's `_commit` with its recorded answers, i.e. what the project looked like right after its
+last update.  Every edit to a template-managed file since then is a potential update conflict,
+so projects with the most drift are the expensive ones to update.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import difflib
+import hashlib
+from pathlib import Path
+
+from coppy import answers, render, template_cache
+from coppy.preview import Content, read_file
+from coppy.template_cache import TemplateCache
+from coppy.utils import CalledProcessError
+
+
+@dataclass(slots=True)
+class FileDrift:
+    path: str
+    # One of: modified, missing
+    status: str
+    # Lines added and removed by the project, None for binary files
+    added: int | None = None
+    removed: int | None = None
+
+    @property
+    def lines(self) -> int:
+        return (self.added or 0) + (self.removed or 0)
+
+    def as_dict(self) -> dict:
+        return {
+            'path': self.path,
+            'status': self.status,
+            'added': self.added,
+            'removed': self.removed,
+        }
+
+
+@dataclass(slots=True)
+class ProjectDrift:
+    project_dpath: Path
+    # One of: clean, drifted, skipped, failed
+    status: str
+    commit: str = ''
+    files: list[FileDrift] = field(default_factory=list)
+    message: str = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.status != 'failed'
+
+    @property
+    def lines(self) -> int:
+        return sum(file.lines for file in self.files)
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'commit': self.commit,
+            'lines': self.lines,
+            'message': self.message,
+            'files': [file.as_dict() for file in self.files],
+        }
+
+
+def digest(content: Content) -> str | None:
+    if content is None:
+        return None
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_drift(path: str, rendered: str | bytes, current: Content) -> FileDrift | None:
+    if digest(rendered) == digest(current):
+        return None
+
+    # An empty template file, like mise.lock, is a placeholder for the project or a migration to
+    # fill.  Updates don't conflict with what's in it unless the template starts filling it.
+    if not rendered and current is not None:
+        return None
+
+    if current is None:
+        return FileDrift(path, 'missing')
+
+    if isinstance(rendered, bytes) or isinstance(current, bytes):
+        return FileDrift(path, 'modified')
+
+    added = removed = 0
+    for line in difflib.unified_diff(rendered.splitlines(), current.splitlines(), n=0):
+        if line.startswith(('+++', '---')):
+            continue
+        if line.startswith('+'):
+            added += 1
+        elif line.startswith('-'):
+            removed += 1
+    return FileDrift(path, 'modified', added, removed)
+
+
+def drift_project(project_dpath: Path, cache: TemplateCache | None) -> ProjectDrift:
+    def result(status: str, message: str = '') -> ProjectDrift:
+        return ProjectDrift(project_dpath, status, message=message)
+
+    project_answers = answers.load(project_dpath)
+    if not project_answers:
+        return result('skipped', f'no {answers.ANSWERS_FNAME}')
+    if cache is None:
+        return result('failed', 'template cache unavailable')
+    if not (commit := project_answers.get('_commit')):
+        return result('failed', 'answers have no _commit')
+
+    try:
+        template_dpath = cache.worktree(commit)
+    except CalledProcessError as e:
+        return result('failed', str(e).strip().splitlines()[-1])
+
+    data = {name: value for name, value in project_answers.items() if not name.startswith('_')}
+    try:
+        rendered = render.render(data, template_dpath, commit, project_answers.get('_src_path'))
+    except render.ERRORS as e:
+        return result('failed', render.error_message(e))
+
+    drift = ProjectDrift(project_dpath, 'clean', commit)
+    for path in sorted(rendered):
+        if change := file_drift(path, rendered[path], read_file(project_dpath / path)):
+            drift.files.append(change)
+
+    if drift.files:
+        drift.status = 'drifted'
+    return drift
+
+
+def drift_fleet(
+    projects: Sequence[Path],
+    jobs: int,
+    caches: dict[Path, TemplateCache | None] | None = None,
+) -> list[ProjectDrift]:
+    """Each project's drift, in the order given.  `caches` defaults to refreshing them."""
+    if caches is None:
+        caches = template_cache.refreshed(list(projects))
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        return list(
+            executor.map(
+                lambda project_dpath: drift_project(project_dpath, caches.get(project_dpath)),
+                projects,
+            ),
+        )
+
+
+def summary(drifts: Sequence[ProjectDrift]) -> dict:
+    counts = dict.fromkeys(('clean', 'drifted', 'skipped', 'failed'), 0)
+    for drift in drifts:
+        counts[drift.status] += 1
+
+    return {
+        'counts': counts,
+        'projects': [drift.as_dict() for drift in drifts],
+    }
@@ -0,0 +1,187 @@
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import sys
+import time
+
+import click
+
+from coppy import template_cache
+from coppy.answers import ANSWERS_FNAME
+from coppy.utils import CalledProcessError, sub_run
+
+
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
+
+@dataclass(slots=True)
+class ProjectResult:
+    project_dpath: Path
+    # One of: updated, current, skipped, failed
+    status: str
+    duration: float = 0.0
+    message: str = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.status != 'failed'
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'duration': round(self.duration, 3),
+            'message': self.message,
+        }
+
+
+def read_manifest(manifest_fpath: Path) -> list[Path]:
+    """One project path per line.  Blank lines and `#` comments are ignored."""
+    base_dpath = manifest_fpath.parent
+    dpaths = []
+    for line in manifest_fpath.read_text().splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        dpaths.append(base_dpath / Path(line).expanduser())
+    return dpaths
+
+
+def find_projects(
+    dpaths: Iterable[Path] = (),
+    globs: Iterable[str] = (),
+    manifest_fpath: Path | None = None,
+) -> list[Path]:
+    """
+    Resolve and de-duplicate project directories, preserving the order given.  Glob matches that
+    aren't directories are left out but manifest entries have to be, so a typo doesn't quietly
+    shrink the fleet.
+    """
+    candidates = list(dpaths)
+    for pattern in globs:
+        candidates.extend(dpath for dpath in glob_dpaths(pattern) if dpath.is_dir())
+    if manifest_fpath:
+        listed = read_manifest(manifest_fpath)
+        if missing := [dpath.as_posix() for dpath in listed if not dpath.is_dir()]:
+            raise click.UsageError(
+                f'Not a directory, listed in {manifest_fpath}: {", ".join(missing)}',
+            )
+        candidates.extend(listed)
+
+    return list(dict.fromkeys(dpath.resolve() for dpath in candidates if dpath.is_dir()))
+
+
+def glob_dpaths(pattern: str) -> list[Path]:
+    pattern = Path(pattern).expanduser()
+    root = Path(pattern.anchor) if pattern.is_absolute() else Path()
+    return sorted(root.glob(pattern.relative_to(root).as_posix()))
+
+
+def copier_update_args(project_dpath: Path, use_head: bool, *extra_args) -> tuple:
+    vcs_ref = ('--vcs-ref', 'HEAD') if use_head else ()
+    return (
+        sys.executable,
+        '-m',
+        'copier',
+        'update',
+        '--answers-file',
+        ANSWERS_FNAME,
+        '--trust',
+        '--skip-answered',
+        *extra_args,
+        *vcs_ref,
+        project_dpath,
+    )
+
+
+def skip_reason(project_dpath: Path) -> str | None:
+    """Reasons copier would refuse to update the project, checked before paying for copier."""
+    if not project_dpath.joinpath(ANSWERS_FNAME).exists():
+        return f'no {ANSWERS_FNAME}'
+
+    result = sub_run(
+        'git',
+        'status',
+        '--porcelain',
+        cwd=project_dpath,
+        capture=True,
+        returns=(0, 128),  # 128 means the cwd is not inside a git repo.
+    )
+    if result.returncode != 0:
+        return 'not a git repository'
+
+    if result.stdout.strip():
+        return 'working tree is dirty'
+
+    return None
+
+
+def update_project(
+    project_dpath: Path,
+    use_head: bool,
+    git_env: dict[str, str] | None = None,
+) -> ProjectResult:
+    start = time.perf_counter()
+
+    def result(status: str, message: str = '') -> ProjectResult:
+        return ProjectResult(project_dpath, status, time.perf_counter() - start, message)
+
+    if reason := skip_reason(project_dpath):
+        return result('skipped', reason)
+
+    try:
+        # Nobody is around to answer prompts for new questions, so take their defaults.  Output
+        # is streamed so --debug shows progress and memory use doesn't grow with a noisy update.
+        sub_run(
+            *copier_update_args(project_dpath, use_head, '--defaults'),
+            stream=True,
+            env=git_env,
+        )
+    except CalledProcessError as e:
+        stderr = (e.stderr or '').strip()
+        return result('failed', stderr.splitlines()[-1] if stderr else str(e))
+
+    return result('updated')
+
+
+def update_fleet(
+    projects: Sequence[Path],
+    use_head: bool,
+    jobs: int = DEFAULT_JOBS,
+    on_result: Callable[[ProjectResult], None] | None = None,
+    use_cache: bool = True,
+) -> list[ProjectResult]:
+    """Update projects on a bounded worker pool.  Results are returned in the order given."""
+    git_envs = template_cache.git_envs(projects) if use_cache else {}
+    results: dict[Path, ProjectResult] = {}
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        futures = {
+            executor.submit(
+                update_project,
+                project_dpath,
+                use_head,
+                git_env=git_envs.get(project_dpath),
+            ): project_dpath
+            for project_dpath in projects
+        }
+        for future in as_completed(futures):
+            project_result = future.result()
+            results[futures[future]] = project_result
+            if on_result:
+                on_result(project_result)
+
+    return [results[project_dpath] for project_dpath in projects]
+
+
+def summary(results: Sequence[ProjectResult], duration: float) -> dict:
+    counts = dict.fromkeys(('updated', 'current', 'skipped', 'failed'), 0)
+    for result in results:
+        counts[result.status] += 1
+
+    return {
+        'duration': round(duration, 3),
+        'counts': counts,
+        'projects': [result.as_dict() for result in results],
+    }
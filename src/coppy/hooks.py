@@ -0,0 +1,154 @@
+"""
+Warm prek's shared cache of hook environments for many projects: `coppy hooks warm`.
+
+prek builds a hook's environment the first time a repo uses it, which is usually someone's first
+commit after an update.  Environments are kept in prek's cache (`prek cache dir`) and shared by
+every repo that uses the same hook repo and rev, so building each one once warms them all.  The
+projects' `prek.toml` files are combined into one config with each repo+rev listed once and a
+single `prek install-hooks` run builds the environments concurrently.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+import tempfile
+import tomllib
+
+from coppy import tools
+from coppy.utils import sub_run
+
+
+CONFIG_FNAME = 'prek.toml'
+# Hooks that run from prek itself or the project, with no environment to build
+LOCAL_REPOS = frozenset(('local', 'meta', 'builtin'))
+
+
+@dataclass(frozen=True, slots=True)
+class HookEnv:
+    """The parts of a hook's config that change the environment prek builds for it."""
+
+    id: str
+    additional_dependencies: tuple[str, ...] = ()
+    language_version: str | None = None
+
+    @classmethod
+    def from_config(cls, hook: dict) -> HookEnv:
+        return cls(
+            hook['id'],
+            tuple(hook.get('additional_dependencies', ())),
+            hook.get('language_version'),
+        )
+
+    def as_config(self) -> dict:
+        config = {'id': self.id}
+        if self.additional_dependencies:
+            config['additional_dependencies'] = list(self.additional_dependencies)
+        if self.language_version:
+            config['language_version'] = self.language_version
+        return config
+
+
+@dataclass(slots=True)
+class HookRepo:
+    repo: str
+    rev: str
+    hooks: set[HookEnv] = field(default_factory=set)
+    # Projects whose config uses this repo+rev
+    projects: list[Path] = field(default_factory=list)
+
+    def as_config(self) -> dict:
+        # Sorted so the combined config, and prek's output, is the same from run to run.
+        hooks = sorted(
+            self.hooks,
+            key=lambda hook: (hook.id, hook.additional_dependencies, hook.language_version or ''),
+        )
+        return {
+            'repo': self.repo,
+            'rev': self.rev,
+            'hooks': [hook.as_config() for hook in hooks],
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            'repo': self.repo,
+            'rev': self.rev,
+            'hooks': sorted({hook.id for hook in self.hooks}),
+            'projects': [dpath.as_posix() for dpath in self.projects],
+        }
+
+
+@dataclass(slots=True)
+class Collected:
+    repos: dict[tuple[str, str], HookRepo] = field(default_factory=dict)
+    # Project -> why its config wasn't read
+    skipped: dict[Path, str] = field(default_factory=dict)
+
+    @property
+    def references(self) -> int:
+        """Repo+rev pairs across all the configs, before de-duplicating."""
+        return sum(len(repo.projects) for repo in self.repos.values())
+
+    def as_dict(self) -> dict:
+        return {
+            'references': self.references,
+            'repos': [repo.as_dict() for repo in self.repos.values()],
+            'skipped': {dpath.as_posix(): reason for dpath, reason in self.skipped.items()},
+        }
+
+
+def collect(projects: Sequence[Path]) -> Collected:
+    """Each unique repo+rev the projects' prek configs use."""
+    collected = Collected()
+    for project_dpath in projects:
+        config_fpath = project_dpath / CONFIG_FNAME
+        try:
+            config = tomllib.loads(config_fpath.read_text())
+        except FileNotFoundError:
+            collected.skipped[project_dpath] = f'no {CONFIG_FNAME}'
+            continue
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            collected.skipped[project_dpath] = f'unreadable {CONFIG_FNAME}: {e}'
+            continue
+
+        for repo_config in config.get('repos', ()):
+            repo = repo_config.get('repo')
+            if not repo or repo in LOCAL_REPOS or not repo_config.get('rev'):
+                continue
+
+            key = (repo, repo_config['rev'])
+            hook_repo = collected.repos.setdefault(key, HookRepo(*key))
+            hook_repo.hooks.update(
+                HookEnv.from_config(hook) for hook in repo_config.get('hooks', ())
+            )
+            if project_dpath not in hook_repo.projects:
+                hook_repo.projects.append(project_dpath)
+
+    return collected
+
+
+def combined_config(repos: Iterable[HookRepo]) -> str:
+    """
+    A prek config listing each repo+rev once.  It's YAML, which prek also reads, because Python
+    can only read TOML.
+    """
+    # yaml is slow to import and only needed here.
+    import yaml
+
+    config = {'repos': [repo.as_config() for repo in sorted(repos, key=lambda r: (r.repo, r.rev))]}
+    return yaml.safe_dump(config, sort_keys=False)
+
+
+def warm(repos: Iterable[HookRepo]) -> None:
+    """Build the repos' hook environments in prek's shared cache."""
+    repos = list(repos)
+    if not repos:
+        return
+
+    with tempfile.TemporaryDirectory(prefix='coppy-hooks-') as tmp:
+        # prek only runs inside a git repo.
+        sub_run('git', 'init', '--quiet', cwd=tmp)
+        config_fpath = Path(tmp, '.pre-commit-config.yaml')
+        config_fpath.write_text(combined_config(repos))
+        sub_run(*tools.prek_args(), 'install-hooks', '--config', config_fpath, cwd=tmp)
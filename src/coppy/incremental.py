@@ -0,0 +1,179 @@
+"""
+Incremental `coppy update`: only render and merge the template files that changed.
+
+copier renders the whole template at the project's version and at the new one and merges every
+file.  Most template releases only change a few files, so `coppy update --incremental` asks git
+which files under the template's subdirectory changed between the two commits and renders just
+those, the files that include or extend a changed template, and the answers file, in memory
+(`coppy.render`).  Anything that could change how other
+files render, or what an update does beyond rendering, needs copier's full update instead: the
+copier config, Jinja extensions, copier tasks, and coppy migrations the update would run.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import time
+
+from coppy import answers, fleet, render, template_cache
+from coppy.fleet import ProjectResult
+from coppy.logs import logger
+from coppy.migrate import Migrator, parse_version
+from coppy.preview import file_change, read_file, write_change
+from coppy.template_cache import TemplateCache
+from coppy.utils import CalledProcessError
+
+
+log = logger()
+
+
+def changed_paths(cache: TemplateCache, from_ref: str, to_ref: str) -> set[str]:
+    """Template repo paths that differ between the commits.  Renames are a delete and an add."""
+    result = cache.git('diff', '--name-only', '--no-renames', '-z', from_ref, to_ref, '--')
+    return {path for path in result.stdout.split('\0') if path}
+
+
+def extension_paths(config: dict) -> set[str]:
+    """Template repo paths of the Jinja extensions the template loads from its own files."""
+    return {
+        spec.split(':', 1)[0]
+        for spec in config.get('_jinja_extensions', ())
+        if ':' in spec and spec.split(':', 1)[0].endswith('.py')
+    }
+
+
+def full_update_reason(
+    template: render.Template,
+    changed: set[str],
+    migrator: Migrator,
+) -> str | None:
+    """Why the update can't be incremental, None when it can."""
+    if changed & set(render.CONFIG_FNAMES):
+        return 'copier config changed'
+    if changed & extension_paths(template.config):
+        return 'Jinja extensions changed'
+    if template.config.get('_tasks'):
+        return 'template has copier tasks'
+    if needed := migrator.needed():
+        return f'migrations needed: {", ".join(migration.name for migration in needed)}'
+    return None
+
+
+def update_project(
+    project_dpath: Path,
+    cache: TemplateCache | None,
+    use_head: bool,
+) -> ProjectResult | None:
+    """Update the project incrementally.  None means it needs a full update."""
+    start = time.perf_counter()
+
+    def result(status: str, message: str = '') -> ProjectResult:
+        return ProjectResult(project_dpath, status, time.perf_counter() - start, message)
+
+    def full_update(reason: str) -> None:
+        log.info(f'{project_dpath}: full update, {reason}')
+
+    if reason := fleet.skip_reason(project_dpath):
+        return result('skipped', reason)
+
+    project_answers = answers.load(project_dpath)
+    if cache is None:
+        return full_update('template cache unavailable')
+    if not (from_ref := project_answers.get('_commit')):
+        return full_update('answers have no _commit')
+
+    try:
+        to_ref = 'HEAD' if use_head else (cache.latest_tag() or 'HEAD')
+        from_dpath = cache.worktree(from_ref)
+        to_dpath = cache.worktree(to_ref)
+        to_commit = cache.describe(to_ref)
+        changed = changed_paths(cache, from_ref, to_ref)
+    except CalledProcessError as e:
+        return full_update(str(e).strip().splitlines()[-1])
+
+    if from_dpath == to_dpath:
+        return result('current', 'already current')
+
+    try:
+        template = render.Template.load(to_dpath)
+    except render.ERRORS as e:
+        return full_update(render.error_message(e))
+    migrator = Migrator(project_dpath)
+    migrator.to_version = parse_version(to_commit)
+    if reason := full_update_reason(template, changed, migrator):
+        return full_update(reason)
+
+    subdirectory = template.config.get('_subdirectory', '')
+    prefix = f'{subdirectory.strip("/")}/' if subdirectory else ''
+    only = {
+        Path(path.removeprefix(prefix))
+        for path in changed
+        if path.startswith(prefix) and path != prefix
+    }
+    data = {name: value for name, value in project_answers.items() if not name.startswith('_')}
+    src_path = project_answers.get('_src_path')
+    try:
+        # Files that include or extend a changed partial render differently too.
+        only |= template.including(changed)
+        # The answers file records the new _commit.
+        only |= {
+            src_relpath
+            for src_relpath, names in template.file_dependencies().items()
+            if '_copier_answers' in names
+        }
+        base_files = render.Template.load(from_dpath).render(data, from_ref, src_path, only=only)
+        new_files = template.render(data, to_commit, src_path, only=only)
+    except render.ERRORS as e:
+        return full_update(render.error_message(e))
+
+    changes = conflicts = 0
+    unapplied = []
+    for path in sorted(base_files.keys() | new_files.keys()):
+        base = base_files.get(path)
+        project = read_file(project_dpath / path)
+        if not (change := file_change(path, base, new_files.get(path), project)):
+            continue
+        changes += 1
+        conflicts += change.status == 'conflict'
+        if not write_change(project_dpath, change, base, project):
+            unapplied.append(path)
+
+    message = f'incremental: {len(only)} template files, {changes} changed'
+    if conflicts:
+        message += f', {conflicts} conflicts'
+    if unapplied:
+        message += f', left for you to apply: {", ".join(unapplied)}'
+    return result('updated', message)
+
+
+def update_fleet(
+    projects: Sequence[Path],
+    use_head: bool,
+    jobs: int = fleet.DEFAULT_JOBS,
+    on_result: Callable[[ProjectResult], None] | None = None,
+) -> tuple[list[ProjectResult], list[Path]]:
+    """
+    Update projects incrementally on a bounded worker pool.  Returns the results, in the order
+    given, and the projects that need a full update.
+    """
+    caches = template_cache.refreshed(list(projects))
+
+    def run(project_dpath: Path) -> ProjectResult | None:
+        project_result = update_project(project_dpath, caches.get(project_dpath), use_head)
+        if project_result and on_result:
+            on_result(project_result)
+        return project_result
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        results = list(executor.map(run, projects))
+
+    return (
+        [project_result for project_result in results if project_result],
+        [
+            project_dpath
+            for project_dpath, project_result in zip(projects, results, strict=True)
+            if project_result is None
+        ],
+    )
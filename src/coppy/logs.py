@@ -1,10 +1,9 @@
 from enum import Enum
 import functools
-import inspect
 import logging
+import sys
 
 import click
-import colorlog
 
 
 _logs_init = False
@@ -20,7 +19,10 @@ class LogLevel(Enum):
 
 def init_logging(log_level: str):
     global _logs_init
-    assert not _logs_init
+    if _logs_init:
+        # e.g. a command invoked more than once in the same process by tests
+        set_levels(log_level)
+        return
 
     logging.addLevelName(logging.DEBUG, 'debug')
     logging.addLevelName(logging.INFO, 'info')
@@ -28,6 +30,9 @@ def init_logging(log_level: str):
     logging.addLevelName(logging.ERROR, 'error')
     logging.addLevelName(logging.CRITICAL, 'critical')
 
+    # Imported here so commands that never log don't pay for it at startup.
+    import colorlog
+
     handler = colorlog.StreamHandler()
     formatter = colorlog.ColoredFormatter(
         '%(log_color)s%(levelname)8s%(reset)s  %(message)s',
@@ -41,12 +46,16 @@ def init_logging(log_level: str):
     )
     handler.setFormatter(formatter)
     logging.basicConfig(handlers=(handler,))
-    for name in _logger_names:
-        logging.getLogger(name).setLevel(LogLevel[log_level].value)
+    set_levels(log_level)
 
     _logs_init = True
 
 
+def set_levels(log_level: str):
+    for name in _logger_names:
+        logging.getLogger(name).setLevel(LogLevel[log_level].value)
+
+
 def opts_init(click_func):
     click.option('--quiet', 'log_level', flag_value=LogLevel.quiet.name, help='WARN+ logging')(
         click_func,
@@ -74,6 +83,5 @@ def opts_init(click_func):
 
 
 def logger():
-    frame = inspect.stack()[1].frame  # caller's frame
-    module = inspect.getmodule(frame)
-    return logging.getLogger(module.__name__)
+    # The caller's module.  Cheaper than inspect.stack() which reads the source of every frame.
+    return logging.getLogger(sys._getframe(1).f_globals['__name__'])
@@ -1,48 +1,222 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+import json
+import os
 from pathlib import Path
 import re
 import sys
+import time
 
 import click
 
-from coppy.utils import CalledProcessError, sub_run
+from coppy import answers, tools, trace
+from coppy.utils import CalledProcessError, sub_run, utc_now
 
 
 class UvVersion:
-    UV_MIN_VERSION = (0, 9, 17)
-    UV_VERSION_RE = re.compile(r'^uv (\d+)\.(\d+)\.(\d+)(?: \([^)]+\))?$')
+    UV_MIN_VERSION = tools.UV.min_version
+    UV_VERSION_RE = tools.UV.version_re
 
     @classmethod
     def check(cls, uv_output=None):
         """uv_output is only intended to ease testing"""
 
         if uv_output is None:
-            result = sub_run('uv', '--version', capture=True)
-            uv_output = result.stdout.strip()
+            probe = tools.probe(tools.UV)
+            if probe.fpath is None:
+                raise click.ClickException('uv not found.  Install uv then retry `coppy update`.')
+            uv_output = probe.output
 
-        match = cls.UV_VERSION_RE.match(uv_output)
-        if not match:
+        version = tools.UV.parse(uv_output)
+        if version is None:
             raise click.ClickException(
                 f'Could not determine uv version from: {uv_output}',
             )
 
-        version = tuple(int(part) for part in match.groups())
         if version >= cls.UV_MIN_VERSION:
             return
 
-        version_text = '.'.join(str(part) for part in version)
-        min_version_text = '.'.join(str(part) for part in cls.UV_MIN_VERSION)
+        version_text = tools.version_text(version)
+        min_version_text = tools.version_text(cls.UV_MIN_VERSION)
         raise click.ClickException(
             f'uv {version_text} is too old for Coppy cooldown configuration; '
             f'uv {min_version_text} or newer is required. Upgrade uv then retry `coppy update`.',
         )
 
 
+def git_dpath(project_dpath: Path) -> Path | None:
+    """The repo's git dir, following the `.git` file worktrees and submodules use."""
+    for dpath in (project_dpath, *project_dpath.parents):
+        dot_git = dpath / '.git'
+        if dot_git.is_dir():
+            return dot_git
+
+        if dot_git.is_file():
+            gitdir = dot_git.read_text().strip().removeprefix('gitdir:').strip()
+            return (dpath / gitdir).resolve() if gitdir else None
+
+    return None
+
+
+def git_config_fpaths(git_dpath: Path, common_dpath: Path) -> list[Path]:
+    global_fpaths = [
+        Path('~/.gitconfig').expanduser(),
+        Path(os.environ.get('XDG_CONFIG_HOME', '~/.config')).expanduser() / 'git/config',
+    ]
+    if global_config := os.environ.get('GIT_CONFIG_GLOBAL'):
+        global_fpaths = [Path(global_config)]
+
+    return [
+        Path(os.environ.get('GIT_CONFIG_SYSTEM', '/etc/gitconfig')),
+        *global_fpaths,
+        common_dpath / 'config',
+        git_dpath / 'config.worktree',
+    ]
+
+
+def git_hooks_dpath(project_dpath: Path) -> Path | None:
+    """
+    Where git looks for the repo's hooks, read from the repo's files instead of spawning git.
+
+    Returns None when the files can't answer that cheaply, e.g. `core.hooksPath` or config
+    includes are in play, and the caller should ask git.
+    """
+    # These change where git finds the repo or its config.
+    if any(name in os.environ for name in ('GIT_DIR', 'GIT_COMMON_DIR', 'GIT_CONFIG_COUNT')):
+        return None
+
+    if not (dpath := git_dpath(project_dpath)):
+        return None
+
+    common_dpath = dpath
+    if (commondir_fpath := dpath / 'commondir').exists():
+        common_dpath = (dpath / commondir_fpath.read_text().strip()).resolve()
+
+    for config_fpath in git_config_fpaths(dpath, common_dpath):
+        try:
+            config = config_fpath.read_text().lower()
+        except OSError:
+            continue
+        if 'hookspath' in config or '[include' in config:
+            return None
+
+    return common_dpath / 'hooks'
+
+
+def parse_version(text: str | None) -> tuple[int, ...] | None:
+    """
+    Release parts of a template version, e.g. `v1.20260813.1` or copier's PEP 440 form of a
+    commit after a tag like `1.20260813.1.post2.dev0+g1234567`.
+    """
+    if text and (match := re.match(r'^v?(\d+(?:\.\d+)*)', text)):
+        return tuple(int(part) for part in match.group(1).split('.'))
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    name: str
+    # Template version that introduced the change.  Projects updating from an older version
+    # need the migration.  None means it always applies until it's recorded as done.
+    introduced: tuple[int, ...] | None = None
+
+    def applies(self, from_version: tuple | None, to_version: tuple | None) -> bool:
+        if self.introduced is None:
+            return True
+
+        # An unknown version could be on either side of `introduced`, so run to be safe.
+        if from_version is not None and from_version >= self.introduced:
+            return False
+
+        return to_version is None or to_version >= self.introduced
+
+
+# Convert `.pre-commit-config.yaml` to `prek.toml` and reinstall the git hook.
+PREK_CONFIG = Migration('prek-config', (1, 20260812, 1))
+# New projects get a blank `mise.lock` from the template, so this isn't tied to a version.
+MISE_LOCK = Migration('mise-lock')
+
+MIGRATIONS = (PREK_CONFIG, MISE_LOCK)
+
+
+@dataclass(slots=True)
+class MigrationLog:
+    """Migrations already completed for a project, kept in the repo's git dir."""
+
+    # None when the project isn't a git repo and nothing can be recorded
+    fpath: Path | None
+
+    @classmethod
+    def for_project(cls, project_dpath: Path) -> 'MigrationLog':
+        dpath = git_dpath(project_dpath)
+        return cls(dpath / 'coppy/migrations.json' if dpath else None)
+
+    def completed(self) -> dict[str, dict]:
+        if self.fpath is None:
+            return {}
+
+        try:
+            return json.loads(self.fpath.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, migrations: Iterable[Migration], to_version: tuple | None) -> None:
+        if self.fpath is None or not (migrations := list(migrations)):
+            return
+
+        entry = {
+            'template_version': tools.version_text(to_version) if to_version else None,
+            'completed_at': utc_now().isoformat(timespec='seconds'),
+        }
+        completed = self.completed() | {migration.name: entry for migration in migrations}
+        self.fpath.parent.mkdir(exist_ok=True)
+        self.fpath.write_text(json.dumps(completed, indent=2))
+
+
+def template_versions(project_dpath: Path) -> tuple[tuple | None, tuple | None]:
+    """The template versions an update is moving between, when known."""
+    # copier sets these for migrations
+    from_version = parse_version(os.environ.get('VERSION_PEP440_FROM'))
+    to_version = parse_version(os.environ.get('VERSION_PEP440_TO'))
+    if from_version is None and not os.environ.get('VERSION_FROM'):
+        # Not run by copier: the project is at the version it was last updated to.
+        from_version = parse_version(answers.load(project_dpath).get('_commit'))
+
+    return from_version, to_version
+
+
 @dataclass(slots=True)
 class Migrator:
     project_dpath: Path
     python_executable: str | Path = field(default_factory=lambda: sys.executable)
     mise_lock: bool = True
+    # Seconds each step that ran took, by step name
+    durations: dict[str, float] = field(default_factory=dict, init=False)
+    from_version: tuple[int, ...] | None = field(default=None, init=False)
+    to_version: tuple[int, ...] | None = field(default=None, init=False)
+    log: MigrationLog = field(init=False)
+    completed: dict[str, dict] = field(init=False)
+
+    def __post_init__(self):
+        self.from_version, self.to_version = template_versions(self.project_dpath)
+        self.log = MigrationLog.for_project(self.project_dpath)
+        self.completed = self.log.completed()
+
+    def pending(self, migration: Migration) -> bool:
+        return migration.name not in self.completed and migration.applies(
+            self.from_version,
+            self.to_version,
+        )
+
+    def needed(self) -> list[Migration]:
+        """Migrations that would change the project if the update ran now."""
+        needed = []
+        if self.pending(PREK_CONFIG) and self.pre_commit_config_fpath.exists():
+            needed.append(PREK_CONFIG)
+        if self.mise_lock and self.pending(MISE_LOCK) and self.mise_lock_missing():
+            needed.append(MISE_LOCK)
+        return needed
 
     @property
     def pre_commit_config_fpath(self) -> Path:
@@ -60,15 +234,39 @@ class Migrator:
     def mise_lock_fpath(self) -> Path:
         return self.project_dpath / 'mise.lock'
 
+    def timed(self, name: str, step: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        with trace.span(name, 'migrate'):
+            step()
+        self.durations[name] = duration = time.perf_counter() - start
+        click.echo(f'`{name}` finished in {duration:.2f}s')
+
+    def run_steps(self, steps: list[tuple[str, Callable[[], None]]]) -> None:
+        """Run independent steps concurrently.  The first failure is raised once all finish."""
+        if len(steps) <= 1:
+            for name, step in steps:
+                self.timed(name, step)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+            futures = [executor.submit(self.timed, name, step) for name, step in steps]
+
+        for future in futures:
+            future.result()
+
     def before(self) -> None:
-        if not self.pre_commit_config_fpath.exists():
+        if not self.pending(PREK_CONFIG) or not self.pre_commit_config_fpath.exists():
             self.temp_prek_fpath.unlink(missing_ok=True)
             return
 
+        self.timed('prek util yaml-to-toml', self.convert_pre_commit_config)
+        click.echo(
+            f'Converted `{self.pre_commit_config_fpath.name}` → `{self.temp_prek_fpath.name}`',
+        )
+
+    def convert_pre_commit_config(self) -> None:
         sub_run(
-            self.python_executable,
-            '-m',
-            'prek',
+            *tools.prek_args(self.python_executable),
             'util',
             'yaml-to-toml',
             '--force',
@@ -78,9 +276,6 @@ class Migrator:
             cwd=self.project_dpath,
             capture=True,
         )
-        click.echo(
-            f'Converted `{self.pre_commit_config_fpath.name}` → `{self.temp_prek_fpath.name}`',
-        )
 
     def after(self) -> None:
         converted = self.temp_prek_fpath.exists()
@@ -89,20 +284,30 @@ class Migrator:
             self.temp_prek_fpath.replace(self.prek_fpath)
             click.echo(f'Saved `{self.temp_prek_fpath.name}` → `{self.prek_fpath.name}`')
 
+        # Neither step depends on the other.
+        steps = []
         if converted and (hook_fpath := self.pre_commit_hook_fpath()) and hook_fpath.exists():
-            sub_run(
-                self.python_executable,
-                '-m',
-                'prek',
-                'install',
-                '-f',
-                '-t',
-                'pre-commit',
-                cwd=self.project_dpath,
-            )
+            steps.append(('prek install', self.install_pre_commit_hook))
 
-        if self.mise_lock:
-            self.ensure_mise_lock()
+        if self.mise_lock and self.pending(MISE_LOCK) and self.mise_lock_missing():
+            steps.append(('mise lock', self.ensure_mise_lock))
+
+        self.run_steps(steps)
+
+        done = [PREK_CONFIG] if self.pending(PREK_CONFIG) else []
+        if self.mise_lock and self.pending(MISE_LOCK) and not self.mise_lock_missing():
+            done.append(MISE_LOCK)
+        self.log.record(done, self.to_version)
+
+    def install_pre_commit_hook(self) -> None:
+        sub_run(
+            *tools.prek_args(self.python_executable),
+            'install',
+            '-f',
+            '-t',
+            'pre-commit',
+            cwd=self.project_dpath,
+        )
 
     def add_rendered_rumdl_config(self) -> None:
         """Preserve newly enabled rumdl config when the converted legacy config wins."""
@@ -140,8 +345,11 @@ class Migrator:
 
         self.temp_prek_fpath.write_text(converted_config)
 
+    def mise_lock_missing(self) -> bool:
+        return not (self.mise_lock_fpath.exists() and self.mise_lock_fpath.read_text().strip())
+
     def ensure_mise_lock(self) -> None:
-        if self.mise_lock_fpath.exists() and self.mise_lock_fpath.read_text().strip():
+        if not self.mise_lock_missing():
             return
 
         click.echo('`mise.lock` missing or empty; running `mise lock`')
@@ -166,6 +374,9 @@ class Migrator:
             click.echo(result.stderr.strip(), err=True)
 
     def pre_commit_hook_fpath(self) -> Path | None:
+        if hooks_dpath := git_hooks_dpath(self.project_dpath):
+            return hooks_dpath / 'pre-commit'
+
         result = sub_run(
             'git',
             'rev-parse',
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -5,3 +6,12 @@ class dirs:
     coppy = Path(__file__).parent
     src = coppy.parent
     pkg = src.parent
+
+
+def cache_dpath() -> Path:
+    """Coppy's persistent cache.  Override with COPPY_CACHE_DIR."""
+    if override := os.environ.get('COPPY_CACHE_DIR'):
+        return Path(override).expanduser()
+
+    xdg_cache = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(xdg_cache) / 'coppy'
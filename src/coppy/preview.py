@@ -0,0 +1,244 @@
+"""
+What `coppy update` would change, without changing anything: `coppy update --dry-run`.
+
+copier updates a project by rendering the template at the project's current version and at the
+new one and merging the difference into the project.  The preview does the same with in-memory
+renders (`coppy.render`) of checkouts from the template cache, so nothing is cloned, the
+project's working tree is only read, and each project takes milliseconds.  Migrations aren't
+run, so changes they would make aren't included.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+import difflib
+from pathlib import Path
+import tempfile
+
+from coppy import answers, render, template_cache
+from coppy.template_cache import TemplateCache
+from coppy.utils import CalledProcessError, sub_run
+
+
+Content = str | bytes | None
+
+
+@dataclass(slots=True)
+class FileChange:
+    path: str
+    # One of: added, modified, deleted, conflict
+    status: str
+    diff: str
+    # What the file would contain, None when deleted
+    after: Content = field(default=None, repr=False)
+
+    def as_dict(self) -> dict:
+        return {'path': self.path, 'status': self.status}
+
+
+@dataclass(slots=True)
+class ProjectPreview:
+    project_dpath: Path
+    # One of: changes, current, skipped, failed
+    status: str
+    from_ref: str = ''
+    to_ref: str = ''
+    changes: list[FileChange] = field(default_factory=list)
+    message: str = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.status != 'failed'
+
+    def diff(self) -> str:
+        return ''.join(change.diff for change in self.changes)
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'from': self.from_ref,
+            'to': self.to_ref,
+            'message': self.message,
+            'files': [change.as_dict() for change in self.changes],
+        }
+
+
+def unified_diff(path: str, before: Content, after: Content) -> str:
+    if isinstance(before, bytes) or isinstance(after, bytes):
+        return f'Binary file {path} differs\n'
+
+    lines = difflib.unified_diff(
+        (before or '').splitlines(True),
+        (after or '').splitlines(True),
+        fromfile=f'a/{path}' if before is not None else '/dev/null',
+        tofile=f'b/{path}' if after is not None else '/dev/null',
+    )
+    # Same marker git uses so a last line without a newline doesn't run into the next one.
+    no_newline = '\n\\ No newline at end of file\n'
+    return ''.join(line if line.endswith('\n') else f'{line}{no_newline}' for line in lines)
+
+
+def merge(project: str, base: str, new: str) -> tuple[str, bool]:
+    """Three-way merge of the template's change into a project's edited file.  (text, clean)"""
+    with tempfile.TemporaryDirectory(prefix='coppy-preview-') as tmp:
+        fpaths = []
+        for name, content in (('project', project), ('base', base), ('new', new)):
+            fpath = Path(tmp, name)
+            fpath.write_text(content)
+            fpaths.append(fpath)
+
+        # Exit code is the number of conflicts, more than 127 means git failed.
+        result = sub_run(
+            'git',
+            'merge-file',
+            '-p',
+            '-L',
+            'before updating',
+            '-L',
+            'last update',
+            '-L',
+            'after updating',
+            *fpaths,
+            capture=True,
+            returns=range(128),
+        )
+    return result.stdout, result.returncode == 0
+
+
+def file_change(path: str, base: Content, new: Content, project: Content) -> FileChange | None:
+    """How updating changes one file given the old (`base`) and `new` renders of it."""
+    if base == new or project == new:
+        return None
+
+    if new is None:
+        if project == base:
+            return FileChange(path, 'deleted', unified_diff(path, project, None))
+        # Edited in the project but no longer in the template
+        return FileChange(path, 'conflict', unified_diff(path, project, None), project)
+
+    if project is None:
+        # New in the template, or deleted from the project and changed in the template.
+        status = 'added' if base is None else 'conflict'
+        return FileChange(path, status, unified_diff(path, None, new), new)
+
+    if project == base:
+        return FileChange(path, 'modified', unified_diff(path, project, new), new)
+
+    if base is None or any(isinstance(content, bytes) for content in (base, new, project)):
+        return FileChange(path, 'conflict', unified_diff(path, project, new), new)
+
+    merged, clean = merge(project, base, new)
+    status = 'modified' if clean else 'conflict'
+    return FileChange(path, status, unified_diff(path, project, merged), merged)
+
+
+def read_file(fpath: Path) -> Content:
+    if not fpath.is_file():
+        return None
+    content = fpath.read_bytes()
+    try:
+        return content.decode()
+    except UnicodeDecodeError:
+        return content
+
+
+def write_change(project_dpath: Path, change: FileChange, base: Content, project: Content) -> bool:
+    """Apply a change to the project.  Conflicts are only written when git could mark them up."""
+    if change.status == 'conflict' and not all(
+        isinstance(content, str) for content in (base, project, change.after)
+    ):
+        return False
+
+    fpath = project_dpath / change.path
+    if change.after is None:
+        fpath.unlink()
+        return True
+
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(change.after, bytes):
+        fpath.write_bytes(change.after)
+    else:
+        fpath.write_text(change.after)
+    return True
+
+
+def preview_project(
+    project_dpath: Path,
+    cache: TemplateCache | None,
+    use_head: bool,
+) -> ProjectPreview:
+    def result(status: str, message: str = '') -> ProjectPreview:
+        return ProjectPreview(project_dpath, status, message=message)
+
+    project_answers = answers.load(project_dpath)
+    if not project_answers:
+        return result('skipped', f'no {answers.ANSWERS_FNAME}')
+    if cache is None:
+        return result('failed', 'template cache unavailable')
+    if not (from_ref := project_answers.get('_commit')):
+        return result('failed', 'answers have no _commit')
+
+    try:
+        to_ref = 'HEAD' if use_head else (cache.latest_tag() or 'HEAD')
+        from_dpath = cache.worktree(from_ref)
+        to_dpath = cache.worktree(to_ref)
+        to_commit = cache.describe(to_ref)
+    except CalledProcessError as e:
+        return result('failed', str(e).strip().splitlines()[-1])
+
+    preview = ProjectPreview(project_dpath, 'current', from_ref, to_commit)
+    if from_dpath == to_dpath:
+        return preview
+
+    data = {name: value for name, value in project_answers.items() if not name.startswith('_')}
+    src_path = project_answers.get('_src_path')
+    try:
+        base_files = render.render(data, from_dpath, from_ref, src_path)
+        new_files = render.render(data, to_dpath, to_commit, src_path)
+    except render.ERRORS as e:
+        preview.status = 'failed'
+        preview.message = render.error_message(e)
+        return preview
+
+    for path in sorted(base_files.keys() | new_files.keys()):
+        base = base_files.get(path)
+        new = new_files.get(path)
+        if base == new:
+            continue
+        if change := file_change(path, base, new, read_file(project_dpath / path)):
+            preview.changes.append(change)
+
+    if preview.changes:
+        preview.status = 'changes'
+    return preview
+
+
+def preview_fleet(
+    projects: Sequence[Path],
+    use_head: bool,
+    caches: dict[Path, TemplateCache | None] | None = None,
+) -> list[ProjectPreview]:
+    """
+    Preview updates one project after another: renders are CPU bound and share the template
+    checkouts and compiled Jinja templates between projects.  `caches` defaults to refreshing
+    each project's template cache.
+    """
+    if caches is None:
+        caches = template_cache.refreshed(list(projects))
+    return [
+        preview_project(project_dpath, caches.get(project_dpath), use_head)
+        for project_dpath in projects
+    ]
+
+
+def summary(previews: Sequence[ProjectPreview]) -> dict:
+    counts = dict.fromkeys(('changes', 'current', 'skipped', 'failed'), 0)
+    for preview in previews:
+        counts[preview.status] += 1
+
+    return {
+        'counts': counts,
+        'projects': [preview.as_dict() for preview in previews],
+    }
@@ -0,0 +1,158 @@
+"""
+Change a project's answers without a full update: `coppy reanswer`.
+
+copier re-renders the whole template to apply a changed answer.  The template's dependency index
+(`render.Template.dependencies()`) knows which files can use an answer, so only those are
+rendered with the old and new answers and the difference is merged into the project the same way
+`coppy update --dry-run` previews an update.  The template version isn't changed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from coppy import answers, fleet, render, template_cache
+from coppy.preview import FileChange, file_change, read_file, write_change
+from coppy.template_cache import TemplateCache
+from coppy.utils import CalledProcessError
+
+
+@dataclass(slots=True)
+class ProjectReanswer:
+    project_dpath: Path
+    # One of: changed, current, skipped, failed
+    status: str
+    changes: list[FileChange] = field(default_factory=list)
+    # Template files rendered to find the changes
+    rendered: int = 0
+    message: str = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.status != 'failed'
+
+    def diff(self) -> str:
+        return ''.join(change.diff for change in self.changes)
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'rendered': self.rendered,
+            'message': self.message,
+            'files': [change.as_dict() for change in self.changes],
+        }
+
+
+def parse_answers(pairs: Sequence[str]) -> dict[str, str]:
+    """NAME=VALUE pairs.  Values are cast to each question's type when the project is changed."""
+    new_answers = {}
+    for pair in pairs:
+        name, sep, value = pair.partition('=')
+        if not sep or not name:
+            raise ValueError(f'Expected NAME=VALUE: {pair}')
+        new_answers[name.strip()] = value
+    return new_answers
+
+
+def reanswer_project(
+    project_dpath: Path,
+    cache: TemplateCache | None,
+    new_answers: dict[str, str],
+    dry_run: bool = False,
+) -> ProjectReanswer:
+    def result(status: str, message: str = '') -> ProjectReanswer:
+        return ProjectReanswer(project_dpath, status, message=message)
+
+    if not dry_run and (reason := fleet.skip_reason(project_dpath)):
+        return result('skipped', reason)
+
+    project_answers = answers.load(project_dpath)
+    if not project_answers:
+        return result('skipped', f'no {answers.ANSWERS_FNAME}')
+    if cache is None:
+        return result('failed', 'template cache unavailable')
+    if not (commit := project_answers.get('_commit')):
+        return result('failed', 'answers have no _commit')
+
+    try:
+        template = render.Template.load(cache.worktree(commit))
+    except CalledProcessError as e:
+        return result('failed', str(e).strip().splitlines()[-1])
+    except render.ERRORS as e:
+        return result('failed', render.error_message(e))
+
+    questions = template.questions
+    if unknown := sorted(new_answers.keys() - questions.keys()):
+        return result('failed', f'unknown question(s): {", ".join(unknown)}')
+
+    old_data = {name: value for name, value in project_answers.items() if not name.startswith('_')}
+    try:
+        new_data = old_data | {
+            name: render.cast(questions[name].get('type', 'yaml'), value)
+            for name, value in new_answers.items()
+        }
+    except (ValueError, yaml.YAMLError) as e:
+        return result('failed', f'invalid answer: {e}')
+    changed = [name for name in new_data if old_data.get(name) != new_data[name]]
+    if not changed:
+        return result('current')
+
+    src_path = project_answers.get('_src_path')
+    try:
+        only = template.affected(changed)
+        base_files = template.render(old_data, commit, src_path, only=only)
+        new_files = template.render(new_data, commit, src_path, only=only)
+    except render.ERRORS as e:
+        return result('failed', render.error_message(e))
+
+    reanswer = ProjectReanswer(project_dpath, 'current', rendered=len(only))
+    unapplied = []
+    for path in sorted(base_files.keys() | new_files.keys()):
+        base = base_files.get(path)
+        project = read_file(project_dpath / path)
+        if not (change := file_change(path, base, new_files.get(path), project)):
+            continue
+        reanswer.changes.append(change)
+        if not dry_run and not write_change(project_dpath, change, base, project):
+            unapplied.append(path)
+
+    if unapplied:
+        reanswer.message = f'conflicts left for you to apply: {", ".join(unapplied)}'
+    if reanswer.changes:
+        reanswer.status = 'changed'
+    return reanswer
+
+
+def reanswer_fleet(
+    projects: Sequence[Path],
+    new_answers: dict[str, str],
+    jobs: int,
+    dry_run: bool = False,
+    caches: dict[Path, TemplateCache | None] | None = None,
+) -> list[ProjectReanswer]:
+    """Change each project's answers, in the order given.  `caches` defaults to refreshing them."""
+    if caches is None:
+        caches = template_cache.refreshed(list(projects))
+
+    def run(project_dpath: Path) -> ProjectReanswer:
+        return reanswer_project(project_dpath, caches.get(project_dpath), new_answers, dry_run)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        return list(executor.map(run, projects))
+
+
+def summary(results: Sequence[ProjectReanswer]) -> dict:
+    counts = dict.fromkeys(('changed', 'current', 'skipped', 'failed'), 0)
+    for result in results:
+        counts[result.status] += 1
+
+    return {
+        'counts': counts,
+        'projects': [result.as_dict() for result in results],
+    }
@@ -0,0 +1,380 @@
+"""
+Render a copier template in memory: a mapping of each generated file's path to its content,
+without writing files or cloning the template.
+
+Projects are still generated by copier.  This follows copier's rules for the template features
+coppy uses, and the same Jinja environment, so tests and tools can look at what a project would
+get in milliseconds.  It doesn't run migrations or tasks, prompt, or validate answers.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+import functools
+import os
+from pathlib import Path
+import sys
+
+import jinja2
+import jinja2.meta
+from jinja2.sandbox import SandboxedEnvironment
+import pathspec
+import yaml
+
+from coppy.paths import dirs
+
+
+CONFIG_FNAMES = ('copier.yml', 'copier.yaml')
+# Copier's exclusions for templates without a `_subdirectory`
+DEFAULT_EXCLUDE = (
+    'copier.yaml',
+    'copier.yml',
+    '~*',
+    '*.py[co]',
+    '__pycache__',
+    '.git',
+    '.DS_Store',
+    '.svn',
+)
+# Copier loads these ahead of the template's own extensions.
+DEFAULT_EXTENSIONS = ('jinja2_ansible_filters.AnsibleCoreFiltersExtension',)
+# What a broken template or answers can raise while rendering: Jinja errors, bad copier.yaml,
+# answers that don't cast to their question's type, and unreadable files.
+ERRORS = (jinja2.TemplateError, yaml.YAMLError, OSError, ValueError, TypeError)
+
+
+def error_message(e: Exception) -> str:
+    """One line about a render error, for reporting it per project."""
+    if isinstance(e, jinja2.TemplateSyntaxError) and e.name:
+        # The name is relative to the template, the filename is in its worktree.
+        return f'render failed: {e.name}:{e.lineno}: {e.message}'
+    lines = str(e).strip().splitlines()
+    return f'render failed: {lines[0] if lines else type(e).__name__}'
+
+
+def cast(type_name: str, value):
+    """Coerce an answer to its question's type like copier does."""
+    if type_name == 'bool':
+        if isinstance(value, str):
+            value = yaml.safe_load(value)
+        return bool(value)
+    if type_name == 'int':
+        return int(value)
+    if type_name == 'float':
+        return float(value)
+    if type_name == 'str':
+        return str(value)
+    if type_name in ('yaml', 'json') and isinstance(value, str):
+        return yaml.safe_load(value)
+    return value
+
+
+@dataclass(slots=True)
+class Template:
+    dpath: Path
+    config: dict
+    env: jinja2.Environment
+    compiled: dict[str, jinja2.Template] = field(default_factory=dict)
+    # Built on first use, see file_dependencies(), including(), and dependencies()
+    file_names: dict[Path, frozenset[str]] | None = None
+    file_references: dict[Path, frozenset[str | None]] | None = None
+    dependency_index: dict[str, frozenset[Path]] | None = None
+
+    @classmethod
+    @functools.lru_cache(maxsize=16)
+    def load(cls, dpath: Path) -> Template:
+        """
+        Templates are cached so repeated renders reuse Jinja's compiled templates.  Fleets use a
+        few template versions at a time, so the cache is bounded rather than keeping every
+        checkout rendered in the process alive.
+        """
+        config_fpath = next(
+            (dpath / fname for fname in CONFIG_FNAMES if dpath.joinpath(fname).exists()),
+            None,
+        )
+        if config_fpath is None:
+            raise FileNotFoundError(f'No copier config in: {dpath}')
+        config = yaml.safe_load(config_fpath.read_text()) or {}
+
+        # copier keeps trailing newlines unless the template says otherwise
+        envops = {'keep_trailing_newline': True, **config.get('_envops', {})}
+        if undefined := envops.get('undefined'):
+            envops['undefined'] = jinja2.utils.import_string(undefined)
+
+        env = SandboxedEnvironment(
+            loader=jinja2.FileSystemLoader(dpath),
+            extensions=[*DEFAULT_EXTENSIONS, *config.get('_jinja_extensions', ())],
+            **envops,
+        )
+        return cls(dpath, config, env)
+
+    @property
+    def questions(self) -> dict[str, dict]:
+        return {
+            name: spec if isinstance(spec, dict) else {'default': spec}
+            for name, spec in self.config.items()
+            if not name.startswith('_')
+        }
+
+    @property
+    def copy_root(self) -> Path:
+        return self.dpath / self.config.get('_subdirectory', '')
+
+    @property
+    def suffix(self) -> str:
+        return self.config.get('_templates_suffix', '.jinja')
+
+    def render_str(self, text, context: dict):
+        # Most path parts and defaults aren't templated and compiling is the slow part.
+        if not isinstance(text, str) or '{' not in text:
+            return text
+        if text not in self.compiled:
+            self.compiled[text] = self.env.from_string(text)
+        return self.compiled[text].render(**context)
+
+    def answers(self, data: dict) -> tuple[dict, dict]:
+        """
+        All answers, given or defaulted, for rendering and the ones the answers file keeps.
+        Questions whose `when` is false still get their default for rendering but aren't kept.
+        """
+        combined = {}
+        remembered = {}
+        for name, spec in self.questions.items():
+            value = data[name] if name in data else self.render_str(spec.get('default'), combined)
+            value = cast(spec.get('type', 'yaml'), value)
+            combined[name] = value
+
+            asked = self.render_str(spec.get('when', True), combined)
+            if cast('bool', asked) and not spec.get('secret'):
+                remembered[name] = value
+
+        return combined, remembered
+
+    def exclude_spec(self, context: dict) -> pathspec.PathSpec:
+        default = DEFAULT_EXCLUDE if not self.config.get('_subdirectory') else ()
+        patterns = [
+            line
+            for pattern in self.config.get('_exclude', default)
+            for line in self.render_str(pattern, context).splitlines()
+        ]
+        return pathspec.PathSpec.from_lines('gitwildmatch', patterns)
+
+    def dest_relpath(self, src_relpath: Path, context: dict) -> str | None:
+        """The rendered path for a file or None when a part renders empty, i.e. skip it."""
+        parts = []
+        for part in src_relpath.parts:
+            rendered = self.render_str(part, context)
+            if not rendered:
+                return None
+            parts.append(rendered)
+        return '/'.join(parts)
+
+    def src_relpaths(self) -> Iterator[Path]:
+        """Template files relative to the copy root, skipping ones with a templated sibling."""
+        for dirpath, dirnames, fnames in os.walk(self.copy_root):
+            dirnames.sort()
+            rel_dpath = Path(os.path.relpath(dirpath, self.copy_root))
+            for fname in sorted(fnames):
+                if self.suffix and f'{fname}{self.suffix}' in fnames:
+                    continue
+                yield rel_dpath / fname
+
+    def variables(self, text: str) -> set[str]:
+        """Names a template string uses, without rendering it."""
+        if '{' not in text:
+            return set()
+        return jinja2.meta.find_undeclared_variables(self.env.parse(text))
+
+    def file_variables(self, template_name: str, seen: set[str] | None = None) -> set[str]:
+        """Names a template file uses, including those of the templates it includes or extends."""
+        seen = seen if seen is not None else set()
+        seen.add(template_name)
+        source, _, _ = self.env.loader.get_source(self.env, template_name)
+        ast = self.env.parse(source)
+
+        names = jinja2.meta.find_undeclared_variables(ast)
+        for referenced in jinja2.meta.find_referenced_templates(ast):
+            # None is a dynamic reference, e.g. `{% include name %}`, which can't be followed.
+            if referenced is not None and referenced not in seen:
+                names |= self.file_variables(referenced, seen)
+        return names
+
+    def file_templates(self, template_name: str, seen: set[str] | None = None) -> set[str | None]:
+        """
+        A template file and the templates it includes or extends, directly or through another.
+        None stands for a dynamic reference, e.g. `{% include name %}`.
+        """
+        seen = seen if seen is not None else set()
+        seen.add(template_name)
+        source, _, _ = self.env.loader.get_source(self.env, template_name)
+
+        names = {template_name}
+        for referenced in jinja2.meta.find_referenced_templates(self.env.parse(source)):
+            if referenced is None:
+                names.add(None)
+            elif referenced not in seen:
+                names |= self.file_templates(referenced, seen)
+        return names
+
+    def including(self, paths: Iterable[str]) -> frozenset[Path]:
+        """
+        Template files, relative to the copy root, that include or extend any of the template
+        `paths`, directly or through another template.  Files with a dynamic reference might
+        include anything, so they're always in it.
+        """
+        if self.file_references is None:
+            self.file_references = {}
+            for src_relpath in self.src_relpaths():
+                if not (self.suffix and src_relpath.name.endswith(self.suffix)):
+                    continue
+                template_name = os.path.relpath(self.copy_root / src_relpath, self.dpath)
+                referenced = self.file_templates(template_name) - {template_name}
+                if referenced:
+                    self.file_references[src_relpath] = frozenset(referenced)
+
+        paths = set(paths)
+        return frozenset(
+            src_relpath
+            for src_relpath, referenced in self.file_references.items()
+            if None in referenced or referenced & paths
+        )
+
+    def file_dependencies(self) -> dict[Path, frozenset[str]]:
+        """
+        Each template file, relative to the copy root like `src_relpaths()`, mapped to the names
+        its path and content use.  Found by parsing the Jinja, not rendering it.
+        """
+        if self.file_names is not None:
+            return self.file_names
+
+        # Templated excludes can add or remove any file.
+        exclude_names = set()
+        for pattern in self.config.get('_exclude', ()):
+            exclude_names |= self.variables(pattern)
+
+        file_names = {}
+        for src_relpath in self.src_relpaths():
+            names = set(exclude_names)
+            for part in src_relpath.parts:
+                names |= self.variables(part)
+            if self.suffix and src_relpath.name.endswith(self.suffix):
+                src_fpath = self.copy_root / src_relpath
+                names |= self.file_variables(os.path.relpath(src_fpath, self.dpath))
+            file_names[src_relpath] = frozenset(names)
+
+        self.file_names = file_names
+        return file_names
+
+    def dependencies(self) -> dict[str, frozenset[Path]]:
+        """
+        Each question mapped to the template files whose name or content uses its answer,
+        directly or through another question's default or `when`.
+        """
+        if self.dependency_index is not None:
+            return self.dependency_index
+
+        questions = self.questions
+        # What changes when an answer changes: the answer itself plus questions defaulted from it
+        # or asked based on it.
+        affects = {name: {name} for name in questions}
+        for name, spec in questions.items():
+            for key in ('default', 'when'):
+                if isinstance(spec.get(key), str):
+                    for used in self.variables(spec[key]) & questions.keys():
+                        affects[used].add(name)
+
+        index = {}
+        for name in questions:
+            # Follow defaults of defaults, e.g. script_name <- py_module <- project_name
+            closure = set()
+            pending = [name]
+            while pending:
+                current = pending.pop()
+                if current not in closure:
+                    closure.add(current)
+                    pending.extend(affects[current])
+            index[name] = frozenset(
+                src_relpath
+                for src_relpath, names in self.file_dependencies().items()
+                # The answers file has every answer.
+                if names & closure or '_copier_answers' in names
+            )
+
+        self.dependency_index = index
+        return index
+
+    def affected(self, names: Iterable[str]) -> frozenset[Path]:
+        """Template files that may render differently when the named answers change."""
+        index = self.dependencies()
+        return frozenset().union(*(index[name] for name in names))
+
+    def render(
+        self,
+        data: dict,
+        commit: str | None = None,
+        src_path: str | None = None,
+        only: Iterable[Path] | None = None,
+    ) -> dict[str, str | bytes]:
+        """`only` limits rendering to those template files, e.g. from `affected()`."""
+        combined, remembered = self.answers(data)
+        copier_answers = {'_src_path': src_path or self.dpath.as_posix(), **remembered}
+        if commit:
+            copier_answers = {'_commit': commit, **copier_answers}
+
+        context = {
+            **combined,
+            '_copier_answers': copier_answers,
+            '_copier_conf': {
+                'src_path': self.dpath,
+                'answers_file': '',
+                'sep': os.sep,
+            },
+            '_copier_python': sys.executable,
+        }
+        answers_file = self.render_str(
+            self.config.get('_answers_file', '.copier-answers.yml'),
+            context,
+        )
+        context['_copier_conf']['answers_file'] = answers_file
+        exclude = self.exclude_spec(context)
+
+        only = frozenset(only) if only is not None else None
+        files = {}
+        for src_relpath in self.src_relpaths():
+            if only is not None and src_relpath not in only:
+                continue
+            is_template = bool(self.suffix) and src_relpath.name.endswith(self.suffix)
+            dest_src = src_relpath.with_suffix('') if is_template else src_relpath
+            dest_relpath = self.dest_relpath(dest_src, context)
+            if dest_relpath is None or exclude.match_file(dest_relpath):
+                continue
+
+            src_fpath = self.copy_root / src_relpath
+            if is_template:
+                template_name = os.path.relpath(src_fpath, self.dpath)
+                files[dest_relpath] = self.env.get_template(template_name).render(**context)
+                continue
+
+            content = src_fpath.read_bytes()
+            try:
+                files[dest_relpath] = content.decode()
+            except UnicodeDecodeError:
+                files[dest_relpath] = content
+
+        return files
+
+
+def render(
+    answers: dict,
+    template_dpath: Path = dirs.pkg,
+    commit: str | None = None,
+    src_path: str | None = None,
+) -> dict[str, str | bytes]:
+    """
+    Render the template at `template_dpath` for `answers`.  Returns each file's path, relative
+    to the project, mapped to its content.  Text files are str, anything else is bytes.
+    `commit` is the answers file's `_commit`, which is left out when not given, and `src_path`
+    its `_src_path`, which defaults to `template_dpath`.
+    """
+    return Template.load(template_dpath.resolve()).render(answers, commit, src_path)
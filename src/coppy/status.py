@@ -0,0 +1,283 @@
+"""
+Which projects are behind on the template: `coppy status`.
+
+Finding a workspace's coppy projects means walking the tree and reading every project's answers
+file.  The walk is split across threads and what was read from each answers file is kept in a
+SQLite index keyed on the file's mtime and size, so a rescan only parses answers that changed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+import json
+import os
+from pathlib import Path
+import re
+import sqlite3
+
+from coppy import answers, paths
+from coppy.template_cache import TemplateCache
+from coppy.utils import CalledProcessError
+
+
+DEFAULT_JOBS = min(16, (os.cpu_count() or 1) * 2)
+# Never contain projects and can be huge
+SKIP_DIRS = frozenset(
+    (
+        '.git',
+        '.hg',
+        '.venv',
+        'node_modules',
+        '__pycache__',
+        '.mypy_cache',
+        '.nox',
+        '.pytest_cache',
+        '.ruff_cache',
+        '.tox',
+    ),
+)
+# `git describe` suffix for commits after a tag, e.g. v1.20260101.1-3-gabc1234
+DESCRIBE_SUFFIX_RE = re.compile(r'-(\d+)-g[0-9a-f]+$')
+
+
+@dataclass(slots=True)
+class ProjectStatus:
+    project_dpath: Path
+    src_path: str
+    commit: str
+    answers: dict = field(repr=False)
+    # Read from the index instead of the answers file
+    cached: bool = False
+    latest: str = ''
+    # Released template versions newer than the project's, None when unknown
+    behind: int | None = None
+    message: str = ''
+
+    @property
+    def status(self) -> str:
+        if self.behind is None:
+            return 'unknown'
+        return 'behind' if self.behind else 'current'
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'src_path': self.src_path,
+            'commit': self.commit,
+            'latest': self.latest,
+            'behind': self.behind,
+            'message': self.message,
+            'answers': self.answers,
+        }
+
+
+@dataclass(slots=True)
+class FleetIndex:
+    """What's been read from each project's answers file, keyed on the file's mtime and size."""
+
+    fpath: Path = field(default_factory=lambda: paths.cache_dpath() / 'fleet-index.sqlite3')
+
+    # Bump when the table changes, older indexes are rebuilt.
+    SCHEMA_VERSION = 1
+
+    def connect(self) -> sqlite3.Connection:
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.fpath)
+        if conn.execute('PRAGMA user_version').fetchone()[0] != self.SCHEMA_VERSION:
+            with conn:
+                conn.execute('DROP TABLE IF EXISTS projects')
+                conn.execute(
+                    """
+                    CREATE TABLE projects (
+                        path TEXT PRIMARY KEY,
+                        mtime_ns INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        src_path TEXT NOT NULL,
+                        commit_ref TEXT NOT NULL,
+                        answers TEXT NOT NULL
+                    )
+                    """,
+                )
+                conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+        return conn
+
+    def scan(
+        self,
+        root_dpaths: Sequence[Path],
+        jobs: int = DEFAULT_JOBS,
+    ) -> list[ProjectStatus]:
+        """Every project under the roots, sorted by path.  Only changed answers files are read."""
+        root_dpaths = [dpath.resolve() for dpath in root_dpaths]
+        found = find_answers_files(root_dpaths, jobs)
+
+        with closing(self.connect()) as conn:
+            rows = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    'SELECT path, mtime_ns, size, src_path, commit_ref, answers FROM projects',
+                )
+            }
+
+            statuses = {}
+            stale = []
+            for fpath, key in found.items():
+                row = rows.get(fpath.as_posix())
+                if row and tuple(row[:2]) == key:
+                    src_path, commit, answers_json = row[2:]
+                    statuses[fpath] = ProjectStatus(
+                        fpath.parent,
+                        src_path,
+                        commit,
+                        json.loads(answers_json),
+                        cached=True,
+                    )
+                else:
+                    stale.append(fpath)
+
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                for fpath, status in zip(stale, executor.map(read_status, stale), strict=True):
+                    statuses[fpath] = status
+
+            gone = [
+                path
+                for path in rows
+                if Path(path) not in found and any(is_under(path, root) for root in root_dpaths)
+            ]
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?)',
+                    [
+                        (
+                            fpath.as_posix(),
+                            *found[fpath],
+                            statuses[fpath].src_path,
+                            statuses[fpath].commit,
+                            json.dumps(statuses[fpath].answers, default=str),
+                        )
+                        for fpath in stale
+                    ],
+                )
+                conn.executemany('DELETE FROM projects WHERE path = ?', [(path,) for path in gone])
+
+        return [statuses[fpath] for fpath in sorted(statuses)]
+
+
+def is_under(path: str, root_dpath: Path) -> bool:
+    return path.startswith(f'{root_dpath.as_posix().rstrip("/")}/')
+
+
+def walk(dpath: Path) -> Iterator[Path]:
+    """Answers files under `dpath`.  A project's own directories aren't searched."""
+    answers_fpath = answers.answers_fpath(dpath)
+    if answers_fpath.is_file():
+        yield answers_fpath
+        return
+
+    try:
+        entries = list(os.scandir(dpath))
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.name not in SKIP_DIRS and entry.is_dir(follow_symlinks=False):
+            yield from walk(Path(entry.path))
+
+
+def find_answers_files(root_dpaths: Iterable[Path], jobs: int) -> dict[Path, tuple[int, int]]:
+    """Each answers file under the roots mapped to its (mtime_ns, size)."""
+    # Each of a root's subdirectories is walked by its own worker.  Most workspaces are a
+    # directory of projects so this spreads the walk evenly.
+    dpaths = []
+    for root_dpath in root_dpaths:
+        if answers.answers_fpath(root_dpath).is_file():
+            dpaths.append(root_dpath)
+            continue
+        dpaths.extend(
+            Path(entry.path)
+            for entry in os.scandir(root_dpath)
+            if entry.name not in SKIP_DIRS and entry.is_dir(follow_symlinks=False)
+        )
+
+    def walk_stat(dpath: Path) -> list[tuple[Path, tuple[int, int]]]:
+        found = []
+        for fpath in walk(dpath):
+            stat = fpath.stat()
+            found.append((fpath, (stat.st_mtime_ns, stat.st_size)))
+        return found
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return dict(item for found in executor.map(walk_stat, dpaths) for item in found)
+
+
+def read_status(answers_fpath: Path) -> ProjectStatus:
+    project_dpath = answers_fpath.parent
+    try:
+        project_answers = answers.load(project_dpath)
+    except Exception as e:
+        return ProjectStatus(project_dpath, '', '', {}, message=f'unreadable answers: {e}')
+
+    return ProjectStatus(
+        project_dpath,
+        str(project_answers.get('_src_path', '')),
+        str(project_answers.get('_commit', '')),
+        {name: value for name, value in project_answers.items() if not name.startswith('_')},
+    )
+
+
+def commit_version(commit: str):
+    """The template version a project's `_commit` is at or after, None when it's not a tag."""
+    from packaging.version import InvalidVersion, Version
+
+    try:
+        return Version(DESCRIBE_SUFFIX_RE.sub('', commit))
+    except InvalidVersion:
+        return None
+
+
+def compare(statuses: Sequence[ProjectStatus], fetch: bool = False, **kwargs) -> None:
+    """
+    Set how many released template versions each project is behind.  Each template's cache is
+    only created when missing, or fetched when `fetch` is true, so no network is needed once the
+    cache exists.
+    """
+    by_src: dict[str, list[ProjectStatus]] = {}
+    for status in statuses:
+        if status.src_path:
+            by_src.setdefault(status.src_path, []).append(status)
+
+    for src_path, src_statuses in by_src.items():
+        cache = TemplateCache(src_path, **kwargs)
+        try:
+            if fetch or not cache.is_valid():
+                cache.refresh()
+            versions = cache.versions()
+        except CalledProcessError as e:
+            for status in src_statuses:
+                status.message = f'template unavailable: {str(e).strip().splitlines()[-1]}'
+            continue
+
+        if not versions:
+            continue
+
+        latest = versions[-1][1]
+        for status in src_statuses:
+            status.latest = latest
+            if (version := commit_version(status.commit)) is None:
+                status.message = status.message or f'{status.commit or "no _commit"} is not a tag'
+                continue
+            status.behind = sum(1 for tag_version, _ in versions if tag_version > version)
+
+
+def summary(statuses: Sequence[ProjectStatus]) -> dict:
+    counts = dict.fromkeys(('current', 'behind', 'unknown'), 0)
+    for status in statuses:
+        counts[status.status] += 1
+
+    return {
+        'counts': counts,
+        'projects': [status.as_dict() for status in statuses],
+    }
@@ -0,0 +1,126 @@
+"""
+`coppy-sync`: run `uv sync` only when a project's environment could be out of date.
+
+The template's mise `[hooks] enter` runs every time a shell enters a project, which made every
+`cd` pay for a full `uv sync`.  After a sync, a stamp in the venv records the stat and content
+hash of each file the sync depends on and of the venv's interpreter.  Entering a project whose
+stats all match costs only those stat calls.  When a stat changed but the contents didn't, e.g.
+after a branch switch and back, the stamp is refreshed without syncing.
+
+This module is the entry point's whole import cost, so it only uses the standard library.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+
+INPUT_FNAMES = ('pyproject.toml', 'uv.lock', 'uv.toml', '.python-version')
+STAMP_FNAME = '.coppy-sync.json'
+
+
+def project_root(start: Path) -> Path | None:
+    for dpath in (start, *start.parents):
+        if dpath.joinpath('pyproject.toml').exists():
+            return dpath
+    return None
+
+
+def venv_dpath(root: Path) -> Path:
+    # Relative values are relative to the project root, same as uv.
+    return root / os.environ.get('UV_PROJECT_ENVIRONMENT', '.venv')
+
+
+def input_fpaths(root: Path, venv: Path) -> dict[str, Path]:
+    return {fname: root / fname for fname in INPUT_FNAMES} | {
+        'pyvenv.cfg': venv / 'pyvenv.cfg',
+        # Stat follows the symlink to the interpreter the venv uses.
+        'python': venv / 'bin' / 'python',
+    }
+
+
+def file_stat(fpath: Path) -> list[int] | None:
+    try:
+        stat = fpath.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+def file_hash(name: str, fpath: Path) -> str | None:
+    try:
+        # The interpreter's identity, it's too big to hash on every change.
+        if name == 'python':
+            content = f'{fpath.resolve()}:{fpath.stat().st_size}'.encode()
+        else:
+            content = fpath.read_bytes()
+    except FileNotFoundError:
+        return None
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_stamp(fpath: Path) -> dict | None:
+    try:
+        return json.loads(fpath.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_stamp(fpath: Path, stamp: dict) -> None:
+    tmp_fpath = fpath.with_name(f'{fpath.name}.{os.getpid()}')
+    try:
+        tmp_fpath.write_text(json.dumps(stamp))
+        tmp_fpath.replace(fpath)
+    except OSError:
+        # Worst case the next enter syncs again.
+        tmp_fpath.unlink(missing_ok=True)
+
+
+def current_stamp(fpaths: dict[str, Path], args: list[str], hashes: bool) -> dict:
+    stamp = {'args': args, 'stats': {name: file_stat(fpath) for name, fpath in fpaths.items()}}
+    if hashes:
+        stamp['hashes'] = {name: file_hash(name, fpath) for name, fpath in fpaths.items()}
+    return stamp
+
+
+def sync(cwd: Path, args: list[str]) -> int:
+    """`uv sync` with the args, unless the stamp says the venv is current.  Returns an exit code."""
+    if (root := project_root(cwd)) is None:
+        return subprocess.run(('uv', 'sync', *args), cwd=cwd).returncode
+
+    venv = venv_dpath(root)
+    stamp_fpath = venv / STAMP_FNAME
+    fpaths = input_fpaths(root, venv)
+    stamp = read_stamp(stamp_fpath)
+
+    current = current_stamp(fpaths, args, hashes=False)
+    if stamp and current['stats']['python'] and stamp_matches(stamp, current, 'stats'):
+        return 0
+
+    current = current_stamp(fpaths, args, hashes=True)
+    if stamp and current['stats']['python'] and stamp_matches(stamp, current, 'hashes'):
+        write_stamp(stamp_fpath, current)
+        return 0
+
+    result = subprocess.run(('uv', 'sync', *args), cwd=root)
+    if result.returncode == 0:
+        # uv sync can change the lock and the venv, so stamp what it left.
+        write_stamp(stamp_fpath, current_stamp(fpaths, args, hashes=True))
+    return result.returncode
+
+
+def stamp_matches(stamp: dict, current: dict, key: str) -> bool:
+    return stamp.get('args') == current['args'] and stamp.get(key) == current[key]
+
+
+def main() -> None:
+    """Entry point: `coppy-sync [UV SYNC ARGS]...`"""
+    try:
+        sys.exit(sync(Path.cwd(), sys.argv[1:]))
+    except FileNotFoundError as e:
+        sys.exit(f'coppy-sync: {e.filename} not found')
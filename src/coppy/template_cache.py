@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import fcntl
+import hashlib
+import os
+from pathlib import Path
+import re
+import shutil
+import tempfile
+
+from coppy import answers, paths, trace
+from coppy.logs import logger
+from coppy.utils import CalledProcessError, sub_run
+
+
+log = logger()
+
+# Same shortcuts copier expands in `_src_path`.
+URL_SHORTCUTS = (
+    (re.compile(r'^gh:/?(.*\.git)$'), r'https://github.com/\1'),
+    (re.compile(r'^gh:/?(.*)$'), r'https://github.com/\1.git'),
+    (re.compile(r'^gl:/?(.*\.git)$'), r'https://gitlab.com/\1'),
+    (re.compile(r'^gl:/?(.*)$'), r'https://gitlab.com/\1.git'),
+)
+
+
+def template_url(src: str) -> str:
+    """The git URL copier will clone for an answers file's `_src_path`."""
+    for pattern, replacement in URL_SHORTCUTS:
+        src = pattern.sub(replacement, src)
+
+    if src.startswith('git+'):
+        return src[4:]
+
+    if src.startswith('https://') and not src.endswith('.git'):
+        return f'{src}.git'
+
+    if src.startswith('~'):
+        return Path(src).expanduser().as_posix()
+
+    return src
+
+
+@dataclass(slots=True)
+class TemplateCache:
+    """
+    A persistent bare mirror of a template repo shared by every project that uses it.
+
+    copier clones the template from scratch on every update.  Pointing it at the mirror with
+    `git_env()` turns that clone into a local one and the mirror itself only needs an
+    incremental `git fetch`.  Checkouts of specific template commits are kept as worktrees of
+    the mirror so coppy can reuse them between updates.
+
+    All mutations happen under a file lock so concurrent updates can share the cache.
+    """
+
+    src: str
+    cache_dpath: Path = field(default_factory=paths.cache_dpath)
+
+    @classmethod
+    def for_project(cls, project_dpath: Path, **kwargs) -> TemplateCache | None:
+        if not (src := answers.load(project_dpath).get('_src_path')):
+            return None
+
+        return cls(src, **kwargs)
+
+    @property
+    def url(self) -> str:
+        return template_url(self.src)
+
+    @property
+    def dpath(self) -> Path:
+        digest = hashlib.sha256(self.url.encode()).hexdigest()[:16]
+        name = self.url.rstrip('/').removesuffix('.git').rsplit('/', 1)[-1]
+        return self.cache_dpath / 'templates' / f'{name}-{digest}'
+
+    @property
+    def mirror_dpath(self) -> Path:
+        return self.dpath / 'mirror.git'
+
+    @property
+    def worktrees_dpath(self) -> Path:
+        return self.dpath / 'worktrees'
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        self.dpath.mkdir(parents=True, exist_ok=True)
+        with self.dpath.joinpath('lock').open('w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def git(self, *args, **kwargs):
+        return sub_run('git', '--git-dir', self.mirror_dpath, *args, capture=True, **kwargs)
+
+    def is_valid(self) -> bool:
+        if not self.mirror_dpath.joinpath('objects').is_dir():
+            return False
+
+        result = self.git('rev-parse', '--is-bare-repository', returns=(0, 128))
+        return result.returncode == 0 and result.stdout.strip() == 'true'
+
+    def refresh(self) -> Path:
+        """Create the mirror or bring it up-to-date with a single incremental fetch."""
+        with trace.span('template cache refresh', 'phase', url=self.url), self.lock():
+            if self.is_valid():
+                log.info(f'Template cache: fetching {self.url}')
+                self.git('fetch', '--prune', '--tags', 'origin')
+                # Forget worktrees whose directories were removed out from under git.
+                self.git('worktree', 'prune')
+                return self.mirror_dpath
+
+            log.info(f'Template cache: mirroring {self.url}')
+            shutil.rmtree(self.mirror_dpath, ignore_errors=True)
+            with tempfile.TemporaryDirectory(dir=self.dpath) as staging:
+                staging_dpath = Path(staging) / 'mirror.git'
+                sub_run('git', 'clone', '--mirror', '--', self.url, staging_dpath, capture=True)
+                staging_dpath.rename(self.mirror_dpath)
+
+        return self.mirror_dpath
+
+    def resolve(self, ref: str) -> str:
+        """Commit hash of `ref` in the mirror."""
+        result = self.git('rev-parse', '--verify', '--end-of-options', f'{ref}^{{commit}}')
+        return result.stdout.strip()
+
+    def versions(self) -> list[tuple]:
+        """Released template versions, oldest first, as (version, tag), leaving out prereleases."""
+        from packaging.version import InvalidVersion, Version
+
+        versions = {}
+        for tag in self.git('tag', '--list').stdout.split():
+            try:
+                version = Version(tag)
+            except InvalidVersion:
+                continue
+            if not version.is_prerelease:
+                versions[version] = tag
+
+        return sorted(versions.items())
+
+    def latest_tag(self) -> str | None:
+        """The tag copier updates to by default: the highest version that isn't a prerelease."""
+        versions = self.versions()
+        return versions[-1][1] if versions else None
+
+    def describe(self, ref: str) -> str:
+        """How copier records `ref` as the answers file's `_commit`."""
+        return self.git('describe', '--tags', '--always', ref).stdout.strip()
+
+    def worktree(self, ref: str) -> Path:
+        """A checkout of `ref`, created once per commit and then reused."""
+        commit = self.resolve(ref)
+        wt_dpath = self.worktrees_dpath / commit
+        # `git worktree add` creates the directory before checking files out, so only the
+        # marker written once it's done means the checkout is complete.
+        ready_fpath = self.worktrees_dpath / f'{commit}.ready'
+        if ready_fpath.exists() and wt_dpath.is_dir():
+            return wt_dpath
+
+        with self.lock():
+            # Another process may have created it while we waited on the lock.
+            if not (ready_fpath.exists() and wt_dpath.is_dir()):
+                self.worktrees_dpath.mkdir(exist_ok=True)
+                if wt_dpath.exists():
+                    # Left by an interrupted `worktree add`
+                    shutil.rmtree(wt_dpath)
+                    self.git('worktree', 'prune')
+                self.git('worktree', 'add', '--detach', '--force', wt_dpath, commit)
+                ready_fpath.touch()
+
+        return wt_dpath
+
+    def git_env(self) -> dict[str, str]:
+        """
+        Environment that makes git, and so copier, read the template from the mirror instead of
+        the template's real URL.  The project's `_src_path` is left untouched.
+        """
+        count = int(os.environ.get('GIT_CONFIG_COUNT', 0))
+        return {
+            'GIT_CONFIG_COUNT': str(count + 1),
+            f'GIT_CONFIG_KEY_{count}': f'url.{self.mirror_dpath.as_posix()}.insteadOf',
+            f'GIT_CONFIG_VALUE_{count}': self.url,
+        }
+
+
+def refreshed(project_dpaths: list[Path], **kwargs) -> dict[Path, TemplateCache | None]:
+    """
+    Each project's up-to-date template cache.  Each distinct template is refreshed once no matter
+    how many projects use it.  Projects whose template can't be cached get None.
+    """
+    caches: dict[str, TemplateCache | None] = {}
+    project_caches = {}
+    for project_dpath in project_dpaths:
+        if not (cache := TemplateCache.for_project(project_dpath, **kwargs)):
+            project_caches[project_dpath] = None
+            continue
+
+        if cache.url not in caches:
+            try:
+                cache.refresh()
+                caches[cache.url] = cache
+            except CalledProcessError as e:
+                log.warning(f'Template cache: unable to refresh {cache.url}, not using it.\n{e}')
+                caches[cache.url] = None
+
+        project_caches[project_dpath] = caches[cache.url]
+
+    return project_caches
+
+
+def git_envs(project_dpaths: list[Path], **kwargs) -> dict[Path, dict[str, str]]:
+    """
+    git env for each project that points copier at its template's cache.  Projects whose
+    template can't be cached get an empty env so copier falls back to cloning the template
+    itself.
+    """
+    return {
+        project_dpath: cache.git_env() if cache else {}
+        for project_dpath, cache in refreshed(project_dpaths, **kwargs).items()
+    }
@@ -0,0 +1,175 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import re
+import shutil
+import sys
+import sysconfig
+import tempfile
+
+from coppy import paths
+from coppy.utils import CalledProcessError, sub_run
+
+
+def find_prek() -> str | None:
+    """The prek coppy's migrations run, which is not necessarily the first one on PATH."""
+    # Installed as a dependency of coppy, next to coppy's Python
+    prek_fpath = Path(sysconfig.get_path('scripts')) / 'prek'
+    if prek_fpath.exists():
+        return prek_fpath.as_posix()
+
+    return shutil.which('prek')
+
+
+def prek_args(python_executable: str | Path = sys.executable) -> tuple:
+    """Command that runs the prek from `find_prek()`, or prek's module in `python_executable`."""
+    # `python -m prek` only execs the prek binary, so skip starting Python to find it.
+    if prek_fpath := find_prek():
+        return (prek_fpath,)
+    return (python_executable, '-m', 'prek')
+
+
+@dataclass(frozen=True, slots=True)
+class Tool:
+    name: str
+    min_version: tuple[int, ...]
+    # The groups are the version parts
+    version_re: re.Pattern
+    locate: Callable[[], str | None] | None = None
+
+    def fpath(self) -> Path | None:
+        fpath = self.locate() if self.locate else shutil.which(self.name)
+        return Path(fpath) if fpath else None
+
+    def parse(self, output: str) -> tuple[int, ...] | None:
+        if not (match := self.version_re.match(output)):
+            return None
+
+        return tuple(int(part) for part in match.groups())
+
+
+UV = Tool('uv', (0, 9, 17), re.compile(r'^uv (\d+)\.(\d+)\.(\d+)(?: \([^)]+\))?$'))
+# copier needs `--filter` support for its clones
+GIT = Tool('git', (2, 27, 0), re.compile(r'^git version (\d+)\.(\d+)\.(\d+)\b'))
+MISE = Tool('mise', (2025, 1, 0), re.compile(r'^(?:mise )?(\d+)\.(\d+)\.(\d+)\b'))
+PREK = Tool('prek', (0, 3, 13), re.compile(r'^prek (\d+)\.(\d+)\.(\d+)\b'), locate=find_prek)
+
+REQUIRED = (UV, GIT, MISE, PREK)
+
+
+def version_text(version: tuple[int, ...]) -> str:
+    return '.'.join(str(part) for part in version)
+
+
+@dataclass(slots=True)
+class Probe:
+    tool: Tool
+    # None when the tool could not be found
+    fpath: Path | None
+    output: str = ''
+    cached: bool = False
+
+    @property
+    def version(self) -> tuple[int, ...] | None:
+        return self.tool.parse(self.output)
+
+    @property
+    def problem(self) -> str | None:
+        if self.fpath is None:
+            return f'{self.tool.name} not found'
+
+        if (version := self.version) is None:
+            return f'Could not determine {self.tool.name} version from: {self.output}'
+
+        if version < self.tool.min_version:
+            return (
+                f'{self.tool.name} {version_text(version)} is too old; '
+                f'{version_text(self.tool.min_version)} or newer is required'
+            )
+
+        return None
+
+    def as_dict(self) -> dict:
+        version = self.version
+        return {
+            'tool': self.tool.name,
+            'path': self.fpath.as_posix() if self.fpath else None,
+            'version': version_text(version) if version else None,
+            'min_version': version_text(self.tool.min_version),
+            'cached': self.cached,
+            'problem': self.problem,
+        }
+
+
+@dataclass(slots=True)
+class ProbeCache:
+    """
+    `--version` output of each tool keyed on the binary's path, mtime, and size.  Upgrading a
+    tool replaces its binary which invalidates the entry.
+    """
+
+    fpath: Path = field(default_factory=lambda: paths.cache_dpath() / 'tool-versions.json')
+
+    def load(self) -> dict:
+        try:
+            return json.loads(self.fpath.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, entries: dict) -> None:
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent coppy processes never see a partial file.
+        with tempfile.NamedTemporaryFile('w', dir=self.fpath.parent, delete=False) as tmp_file:
+            json.dump(entries, tmp_file, indent=2)
+        Path(tmp_file.name).replace(self.fpath)
+
+    @staticmethod
+    def key(fpath: Path) -> list:
+        stat = fpath.stat()
+        return [fpath.as_posix(), stat.st_mtime_ns, stat.st_size]
+
+
+def version_output(fpath: Path) -> str:
+    try:
+        result = sub_run(fpath, '--version', capture=True)
+    except CalledProcessError:
+        return ''
+    return result.stdout.strip()
+
+
+def probe_all(tools: Iterable[Tool] = REQUIRED, cache: ProbeCache | None = None) -> list[Probe]:
+    """Probe tools concurrently, only running `--version` for binaries not already cached."""
+    cache = cache or ProbeCache()
+    tools = list(tools)
+    entries = cache.load()
+
+    def probe_one(tool: Tool) -> Probe:
+        if not (fpath := tool.fpath()):
+            return Probe(tool, None)
+
+        # Resolve symlinks so the key tracks the binary that actually runs.
+        key = ProbeCache.key(fpath.resolve())
+        entry = entries.get(tool.name)
+        if entry and entry['key'] == key:
+            return Probe(tool, fpath, entry['output'], cached=True)
+
+        return Probe(tool, fpath, version_output(fpath))
+
+    with ThreadPoolExecutor(max_workers=len(tools) or 1) as executor:
+        probes = list(executor.map(probe_one, tools))
+
+    fresh = {
+        probe.tool.name: {'key': ProbeCache.key(probe.fpath.resolve()), 'output': probe.output}
+        for probe in probes
+        if probe.fpath and not probe.cached and probe.output
+    }
+    if fresh:
+        cache.save(entries | fresh)
+
+    return probes
+
+
+def probe(tool: Tool, cache: ProbeCache | None = None) -> Probe:
+    return probe_all((tool,), cache)[0]
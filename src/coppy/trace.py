@@ -0,0 +1,139 @@
+"""
+Opt-in Chrome trace-event output of where coppy spends its time.
+
+Enable with `coppy --trace FILE` or by setting `COPPY_TRACE=FILE`.  Open the result in
+chrome://tracing or https://ui.perfetto.dev.
+
+copier runs `coppy migrate` as child processes and the tests run coppy through tasks and
+sandboxes, so the setting is passed on through the environment.  Child processes write their
+spans to part files next to FILE and the process that started tracing merges them into FILE
+when it exits.
+"""
+
+import atexit
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+
+
+ENV_VAR = 'COPPY_TRACE'
+# pid of the process that merges the trace
+ROOT_ENV_VAR = 'COPPY_TRACE_ROOT'
+
+
+@dataclass(slots=True)
+class Tracer:
+    fpath: Path
+    root: bool
+    events: list[dict] = field(default_factory=list)
+
+    @property
+    def part_glob(self) -> str:
+        return f'{self.fpath.name}.*.part'
+
+    def part_fpath(self, pid: int) -> Path:
+        return self.fpath.with_name(f'{self.fpath.name}.{pid}.part')
+
+    def add(self, name: str, cat: str, start_us: int, dur_us: int, args: dict) -> None:
+        # list.append() is atomic so threads don't need a lock.
+        self.events.append(
+            {
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': start_us,
+                'dur': dur_us,
+                'pid': os.getpid(),
+                'tid': threading.get_native_id(),
+                'args': args,
+            },
+        )
+
+    def process_event(self) -> dict:
+        return {
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': os.getpid(),
+            'args': {'name': ' '.join([Path(sys.argv[0]).name, *sys.argv[1:]])},
+        }
+
+    def save(self) -> None:
+        import json
+
+        events = [self.process_event(), *self.events]
+        if not self.root:
+            self.part_fpath(os.getpid()).write_text(json.dumps(events))
+            return
+
+        for part_fpath in sorted(self.fpath.parent.glob(self.part_glob)):
+            # A child killed mid-write leaves a partial file; lose its spans, not the trace.
+            with suppress(ValueError):
+                events.extend(json.loads(part_fpath.read_text()))
+            part_fpath.unlink()
+
+        self.fpath.parent.mkdir(parents=True, exist_ok=True)
+        self.fpath.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}))
+
+
+_tracer: Tracer | None = None
+_checked_env = False
+
+
+def start(fpath: Path) -> Tracer:
+    """Trace this process and, through the environment, its coppy child processes."""
+    global _tracer, _checked_env
+    fpath = fpath.resolve()
+    os.environ[ENV_VAR] = fpath.as_posix()
+    os.environ[ROOT_ENV_VAR] = str(os.getpid())
+    # Leftovers from an earlier run would be merged into this one.
+    for part_fpath in fpath.parent.glob(f'{fpath.name}.*.part'):
+        part_fpath.unlink()
+
+    _tracer = Tracer(fpath, root=True)
+    _checked_env = True
+    atexit.register(_tracer.save)
+    return _tracer
+
+
+def active() -> Tracer | None:
+    global _tracer, _checked_env
+    if _checked_env:
+        return _tracer
+
+    _checked_env = True
+    if not (trace_path := os.environ.get(ENV_VAR)):
+        return None
+
+    if os.environ.get(ROOT_ENV_VAR):
+        _tracer = Tracer(Path(trace_path), root=False)
+        atexit.register(_tracer.save)
+        return _tracer
+
+    # Set in the environment by something other than coppy, e.g. for a test run.
+    return start(Path(trace_path))
+
+
+@contextmanager
+def span(name: str, cat: str = 'coppy', **args) -> Iterator[dict]:
+    """
+    Record the enclosed code as a span.  Yields the span's args so the caller can add details,
+    like an exit code, that are only known at the end.
+    """
+    if not (tracer := active()):
+        yield args
+        return
+
+    start_us = time.time_ns() // 1000
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault('error', f'{type(e).__name__}: {e}')
+        raise
+    finally:
+        tracer.add(name, cat, start_us, int((time.perf_counter() - start) * 1_000_000), args)
@@ -0,0 +1,414 @@
+"""
+Upgrade dependencies across many projects, resolving each distinct set once: `coppy upgrade-deps`.
+
+The template's `upgrade-deps` mise task runs `mise lock --bump`, `uv sync --upgrade`, and
+`prek auto-update` in one project.  Projects generated from the same template mostly have the
+same tools, dependencies, and hook repos, so running it in each of them repeats the same
+resolutions.  Instead, projects are grouped by the inputs each step resolves from and each group
+is resolved once, in parallel, then applied to the rest of its members:
+
+- mise: projects with the same `[tools]` and `[settings]`, Python version, and locked platforms
+  get the first member's bumped `[tools]` table and `mise.lock`.
+- uv: projects with the same dependency specs, Python version, and uv settings re-lock offline
+  from uv's cache, which the first member's `uv lock --upgrade` just filled.  uv.lock records
+  the project itself so it can't be copied.
+- prek: every hook repo the projects use is listed once in a single `prek update` and the new
+  revs are written to each project's prek.toml.
+
+Only lock files and configs are changed.  Project environments sync on their next `mise` enter or
+`uv sync`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import hashlib
+import json
+from pathlib import Path
+import re
+import tempfile
+import tomllib
+
+from coppy import fleet, hooks, tools
+from coppy.hooks import HookRepo
+from coppy.utils import CalledProcessError, sub_run
+
+
+STEPS = ('mise', 'uv', 'prek')
+
+MISE_FNAME = 'mise.toml'
+MISE_LOCK_FNAME = 'mise.lock'
+PYTHON_VERSION_FNAME = '.python-version'
+UV_LOCK_FNAME = 'uv.lock'
+
+REPO_BLOCK_RE = re.compile(r'^\[\[repos\]\]\n.*?(?=^\[\[repos\]\]|\Z)', re.MULTILINE | re.DOTALL)
+REPO_RE = re.compile(r"""^repo\s*=\s*(['"])(?P<value>.+?)\1""", re.MULTILINE)
+REV_RE = re.compile(r"""^rev\s*=\s*(['"])(?P<value>.+?)\1""", re.MULTILINE)
+
+
+@dataclass(slots=True)
+class StepResult:
+    step: str
+    # One of: resolved, applied, unchanged, failed
+    status: str
+    message: str = ''
+
+    def as_dict(self) -> dict:
+        return {'step': self.step, 'status': self.status, 'message': self.message}
+
+
+@dataclass(slots=True)
+class ProjectUpgrade:
+    project_dpath: Path
+    steps: list[StepResult] = field(default_factory=list)
+    # Why the project wasn't upgraded
+    skipped: str = ''
+
+    @property
+    def status(self) -> str:
+        """One of: upgraded, unchanged, skipped, failed"""
+        if self.skipped:
+            return 'skipped'
+        if any(step.status == 'failed' for step in self.steps):
+            return 'failed'
+        if all(step.status == 'unchanged' for step in self.steps):
+            return 'unchanged'
+        return 'upgraded'
+
+    @property
+    def message(self) -> str:
+        return self.skipped or ', '.join(
+            f'{step.step} {step.message or step.status}' for step in self.steps
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'message': self.message,
+            'steps': [step.as_dict() for step in self.steps],
+        }
+
+
+@dataclass(slots=True)
+class Plan:
+    # Step -> groups of projects that resolve the same.  The first member of a mise or uv group
+    # resolves, a prek group is the projects using one hook repo.
+    groups: dict[str, list[list[Path]]] = field(default_factory=dict)
+    # Hook repo url -> each rev of it the projects use
+    hook_repos: dict[str, list[HookRepo]] = field(default_factory=dict)
+    # Project -> why it's skipped
+    skipped: dict[Path, str] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            'steps': {
+                step: {
+                    'resolutions': len(groups),
+                    'projects': len({dpath for members in groups for dpath in members}),
+                    'groups': [[dpath.as_posix() for dpath in members] for members in groups],
+                }
+                for step, groups in self.groups.items()
+            },
+            'skipped': {dpath.as_posix(): reason for dpath, reason in self.skipped.items()},
+        }
+
+
+def digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def read_text(fpath: Path) -> str | None:
+    try:
+        return fpath.read_text()
+    except FileNotFoundError:
+        return None
+
+
+def toml_table(text: str, name: str) -> str | None:
+    """The text of a top level TOML table, from its header to the next one."""
+    match = re.search(
+        rf'^\[{re.escape(name)}\][ \t]*\n.*?(?=^\[|\Z)',
+        text,
+        flags=re.MULTILINE | re.DOTALL,
+    )
+    return match.group() if match else None
+
+
+def lock_platforms(text: str | None) -> list[str]:
+    """Platforms mise.lock has entries for, since `mise lock` keeps the ones already there."""
+    if not text:
+        return []
+
+    platforms = set()
+
+    def walk(value):
+        if isinstance(value, dict):
+            platforms.update(value.get('platforms', ()))
+            for child in value.values():
+                walk(child)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child)
+
+    try:
+        walk(tomllib.loads(text))
+    except tomllib.TOMLDecodeError:
+        return []
+    return sorted(platforms)
+
+
+def mise_key(project_dpath: Path) -> str | None:
+    """Key of what `mise lock --bump` resolves from, None when there's no mise config."""
+    if (config := read_text(project_dpath / MISE_FNAME)) is None:
+        return None
+
+    return digest(
+        {
+            'tools': toml_table(config, 'tools'),
+            'settings': toml_table(config, 'settings'),
+            'python': read_text(project_dpath / PYTHON_VERSION_FNAME),
+            'platforms': lock_platforms(read_text(project_dpath / MISE_LOCK_FNAME)),
+        },
+    )
+
+
+def uv_key(project_dpath: Path) -> str | None:
+    """Key of what `uv lock --upgrade` resolves from, None when the project isn't locked by uv."""
+    if not project_dpath.joinpath(UV_LOCK_FNAME).exists():
+        return None
+    try:
+        pyproject = tomllib.loads(project_dpath.joinpath('pyproject.toml').read_text())
+    except (OSError, tomllib.TOMLDecodeError):
+        return None
+
+    project = pyproject.get('project', {})
+    return digest(
+        {
+            'dependencies': project.get('dependencies'),
+            'optional-dependencies': project.get('optional-dependencies'),
+            'requires-python': project.get('requires-python'),
+            'dependency-groups': pyproject.get('dependency-groups'),
+            'tool.uv': pyproject.get('tool', {}).get('uv'),
+            'uv.toml': read_text(project_dpath / 'uv.toml'),
+            'python': read_text(project_dpath / PYTHON_VERSION_FNAME),
+        },
+    )
+
+
+def group(projects: Iterable[Path], key: Callable[[Path], str | None]) -> list[list[Path]]:
+    """Projects with the same key, in the order given.  Projects without a key are left out."""
+    groups: dict[str, list[Path]] = {}
+    for project_dpath in projects:
+        if (project_key := key(project_dpath)) is not None:
+            groups.setdefault(project_key, []).append(project_dpath)
+    return list(groups.values())
+
+
+def plan(
+    projects: Sequence[Path],
+    steps: Sequence[str] = STEPS,
+    jobs: int = fleet.DEFAULT_JOBS,
+) -> Plan:
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        reasons = list(executor.map(fleet.skip_reason, projects))
+
+    upgrade_plan = Plan()
+    upgrade_plan.skipped = {
+        project_dpath: reason
+        for project_dpath, reason in zip(projects, reasons, strict=True)
+        if reason
+    }
+    eligible = [dpath for dpath in projects if dpath not in upgrade_plan.skipped]
+
+    keys = {'mise': mise_key, 'uv': uv_key}
+    for step in steps:
+        if step != 'prek':
+            upgrade_plan.groups[step] = group(eligible, keys[step])
+            continue
+
+        for hook_repo in hooks.collect(eligible).repos.values():
+            upgrade_plan.hook_repos.setdefault(hook_repo.repo, []).append(hook_repo)
+        upgrade_plan.groups['prek'] = [
+            list(dict.fromkeys(dpath for hook_repo in revs for dpath in hook_repo.projects))
+            for revs in upgrade_plan.hook_repos.values()
+        ]
+    return upgrade_plan
+
+
+def error_message(e: CalledProcessError) -> str:
+    output = (e.stderr or e.stdout or '').strip()
+    return output.splitlines()[-1] if output else str(e).strip().splitlines()[0]
+
+
+def upgrade_mise(members: list[Path]) -> list[tuple[Path, StepResult]]:
+    leader, *others = members
+    config_fpath = leader / MISE_FNAME
+    before = (read_text(config_fpath), read_text(leader / MISE_LOCK_FNAME))
+    try:
+        sub_run('mise', 'lock', '--bump', cwd=leader, capture=True)
+    except CalledProcessError as e:
+        return [(dpath, StepResult('mise', 'failed', error_message(e))) for dpath in members]
+
+    config = read_text(config_fpath)
+    lock = read_text(leader / MISE_LOCK_FNAME)
+    if (config, lock) == before:
+        return [(dpath, StepResult('mise', 'unchanged')) for dpath in members]
+
+    tools = toml_table(config, 'tools')
+    results = [(leader, StepResult('mise', 'resolved'))]
+    for dpath in others:
+        member_fpath = dpath / MISE_FNAME
+        member_config = member_fpath.read_text()
+        if tools and (member_tools := toml_table(member_config, 'tools')):
+            member_fpath.write_text(member_config.replace(member_tools, tools, 1))
+        if lock is not None:
+            dpath.joinpath(MISE_LOCK_FNAME).write_text(lock)
+        results.append((dpath, StepResult('mise', 'applied')))
+    return results
+
+
+def upgrade_uv(members: list[Path]) -> list[tuple[Path, StepResult]]:
+    leader = members[0]
+
+    def lock(dpath: Path) -> StepResult:
+        before = read_text(dpath / UV_LOCK_FNAME)
+        try:
+            if dpath is leader:
+                sub_run('uv', 'lock', '--upgrade', cwd=dpath, capture=True)
+                status = 'resolved'
+            else:
+                # The leader's resolution left everything this needs in uv's cache.
+                try:
+                    sub_run('uv', 'lock', '--upgrade', '--offline', cwd=dpath, capture=True)
+                    status = 'applied'
+                except CalledProcessError:
+                    sub_run('uv', 'lock', '--upgrade', cwd=dpath, capture=True)
+                    status = 'resolved'
+        except CalledProcessError as e:
+            return StepResult('uv', 'failed', error_message(e))
+
+        if read_text(dpath / UV_LOCK_FNAME) == before:
+            return StepResult('uv', 'unchanged')
+        return StepResult('uv', status)
+
+    return [(dpath, lock(dpath)) for dpath in members]
+
+
+def set_revs(config: str, revs: dict[str, str]) -> tuple[str, int]:
+    """Change the rev of each repo in a prek.toml.  Returns the config and the revs changed."""
+    changed = 0
+
+    def replace_block(block: re.Match) -> str:
+        nonlocal changed
+        text = block.group()
+        repo = REPO_RE.search(text)
+        rev = REV_RE.search(text)
+        if not repo or not rev or (new_rev := revs.get(repo['value'])) in (None, rev['value']):
+            return text
+        changed += 1
+        return f'{text[: rev.start("value")]}{new_rev}{text[rev.end("value") :]}'
+
+    return REPO_BLOCK_RE.sub(replace_block, config), changed
+
+
+def latest_revs(hook_repos: dict[str, list[HookRepo]]) -> dict[str, str]:
+    """Run `prek update` once over every repo, returns each repo's new rev."""
+    # yaml is slow to import and only needed here.
+    import yaml
+
+    # One entry per repo: the rev it's updated to doesn't depend on the rev it's at.
+    repos = []
+    for url, revs in hook_repos.items():
+        merged = HookRepo(url, revs[0].rev)
+        for hook_repo in revs:
+            merged.hooks.update(hook_repo.hooks)
+        repos.append(merged)
+
+    with tempfile.TemporaryDirectory(prefix='coppy-upgrade-') as tmp:
+        # prek only runs inside a git repo.
+        sub_run('git', 'init', '--quiet', cwd=tmp)
+        config_fpath = Path(tmp, '.pre-commit-config.yaml')
+        config_fpath.write_text(hooks.combined_config(repos))
+        sub_run(*tools.prek_args(), 'update', '--config', config_fpath, cwd=tmp, capture=True)
+        updated = yaml.safe_load(config_fpath.read_text())['repos']
+
+    # Every repo's rev, changed or not: a rev prek left alone is already the latest, so projects
+    # still on an older one get it too.
+    return {repo['repo']: repo['rev'] for repo in updated}
+
+
+def upgrade_prek(
+    hook_repos: dict[str, list[HookRepo]],
+    projects: Iterable[Path],
+) -> list[tuple[Path, StepResult]]:
+    projects = list(dict.fromkeys(projects))
+    try:
+        revs = latest_revs(hook_repos)
+    except CalledProcessError as e:
+        return [(dpath, StepResult('prek', 'failed', error_message(e))) for dpath in projects]
+
+    results = []
+    for dpath in projects:
+        config_fpath = dpath / hooks.CONFIG_FNAME
+        config, changed = set_revs(config_fpath.read_text(), revs)
+        if not changed:
+            results.append((dpath, StepResult('prek', 'unchanged')))
+            continue
+        config_fpath.write_text(config)
+        results.append((dpath, StepResult('prek', 'applied', f'{changed} rev(s)')))
+    return results
+
+
+def upgrade_fleet(
+    projects: Sequence[Path],
+    upgrade_plan: Plan,
+    jobs: int = fleet.DEFAULT_JOBS,
+) -> list[ProjectUpgrade]:
+    """Resolve each group on a bounded worker pool.  Results are returned in the order given."""
+    upgrades = {dpath: ProjectUpgrade(dpath) for dpath in projects}
+    for dpath, reason in upgrade_plan.skipped.items():
+        upgrades[dpath].skipped = reason
+
+    def collect(futures):
+        for future in futures:
+            for dpath, step_result in future.result():
+                upgrades[dpath].steps.append(step_result)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        # prek only changes prek.toml, so it runs alongside the other steps.
+        prek_futures = []
+        if upgrade_plan.hook_repos:
+            prek_projects = [dpath for members in upgrade_plan.groups['prek'] for dpath in members]
+            prek_futures.append(
+                executor.submit(upgrade_prek, upgrade_plan.hook_repos, prek_projects),
+            )
+
+        # Every mise group finishes before any uv group starts: both run in the same projects and
+        # uv may use the Python mise just bumped.
+        for step, upgrade_step in (('mise', upgrade_mise), ('uv', upgrade_uv)):
+            collect(
+                [
+                    executor.submit(upgrade_step, members)
+                    for members in upgrade_plan.groups.get(step, ())
+                ],
+            )
+        collect(prek_futures)
+
+    for upgrade in upgrades.values():
+        upgrade.steps.sort(key=lambda step_result: STEPS.index(step_result.step))
+    return list(upgrades.values())
+
+
+def summary(upgrade_plan: Plan, upgrades: Sequence[ProjectUpgrade]) -> dict:
+    counts = dict.fromkeys(('upgraded', 'unchanged', 'skipped', 'failed'), 0)
+    for upgrade in upgrades:
+        counts[upgrade.status] += 1
+
+    return {
+        'counts': counts,
+        'plan': upgrade_plan.as_dict(),
+        'projects': [upgrade.as_dict() for upgrade in upgrades],
+    }
@@ -1,16 +1,19 @@
-from collections.abc import Iterable, Iterator
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
 from contextlib import contextmanager
 import datetime as dt
 from json import loads as json_loads
+import logging
 import os
 from pathlib import Path
 import re
 import subprocess
 import tempfile
 import textwrap
+import threading
+from typing import Any
 
-from blazeutils import containers
-
+from . import trace
 from .logs import logger
 
 
@@ -20,13 +23,8 @@ src_dpath = tests_dpath = Path(__file__).parent.parent
 pkg_dpath = src_dpath.parent
 template = src_dpath.parent
 
-
-class LazyDict(containers.LazyDict):
-    def __getattr__(self, attr):
-        val = super().__getattr__(attr)
-        if isinstance(val, dict) and not isinstance(val, LazyDict):
-            return LazyDict(val)
-        return val
+# Lines of each stream `sub_run(stream=True)` keeps for the result and error messages
+STREAM_TAIL_LINES = 200
 
 
 class CalledProcessError(subprocess.CalledProcessError):
@@ -40,6 +38,9 @@ class CalledProcessError(subprocess.CalledProcessError):
         )
 
     def __str__(self):
+        if not isinstance(self.returncode, int):
+            # The command never ran, e.g. it wasn't found.
+            return f"Command '{self.cmd}' could not be run: {self.__cause__}"
         return super().__str__() + f'\nSTDOUT: {self.stdout}' + f'\nSTDERR: {self.stderr}'
 
 
@@ -48,10 +49,24 @@ def sub_run(
     capture=False,
     returns: Iterable[int] | None = None,
     json=False,
+    stream=False,
+    on_line: Callable[[str, str], None] | None = None,
+    tail: int = STREAM_TAIL_LINES,
     **kwargs,
 ) -> subprocess.CompletedProcess:
+    """
+    stream: capture output line by line as it arrives instead of all at once.  Lines are logged
+    at debug level and passed to `on_line(stream_name, line)`, from a reader thread for
+    stderr.  Only the last `tail` lines of stdout and stderr are kept for the result and error
+    messages so memory stays bounded.
+
+    json: parse stdout as one JSON document and return it.  `json='lines'` parses each non-blank
+    line as its own document, i.e. JSON Lines, and always returns a list of them.  When
+    streaming, lines are parsed as they arrive and stdout isn't limited to the tail for `json`.
+    """
+    stream = stream or on_line is not None
     kwargs.setdefault('check', not bool(returns))
-    capture = kwargs.setdefault('capture_output', capture or json)
+    capture = kwargs.setdefault('capture_output', capture or json or stream)
     args = args + kwargs.pop('args', ())
     env = kwargs.pop('env', None)
 
@@ -61,33 +76,177 @@ def sub_run(
     if capture:
         kwargs.setdefault('text', True)
 
-    try:
-        log.debug(f'Running: {" ".join(str(a) for a in args)}\nkwargs: {kwargs}')
-        result = subprocess.run(args, **kwargs)
-        if returns and result.returncode not in returns:
-            raise subprocess.CalledProcessError(result.returncode, args[0])
-
-        if capture and result.stderr:
-            log.debug('Captured STDERR', result.stderr)
-
-        if json:
-            return json_loads(result.stdout)
-
-        return result
-    except subprocess.CalledProcessError as e:
-        if capture:
-            raise CalledProcessError.from_cpe(e) from e
-        raise
-    except Exception as e:
-        raise CalledProcessError('n/a', args, '', '') from e
-
-
-def sudo_run(*args, sudo_user=None, env_path=None, **kwargs):
+    # Building the message isn't free and sub_run is called a lot.
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('Running: %s\nkwargs: %s', ' '.join(str(a) for a in args), kwargs)
+
+    with trace.span(trace_name(args), 'sub_run', cmd=[str(a) for a in args]) as span:
+        span['cwd'] = str(kwargs.get('cwd') or Path.cwd())
+        try:
+            if stream:
+                result, parsed = stream_run(args, on_line, tail, json, **kwargs)
+            else:
+                result = subprocess.run(args, **kwargs)
+            span['returncode'] = result.returncode
+            if returns and result.returncode not in returns:
+                raise subprocess.CalledProcessError(result.returncode, args[0])
+
+            if capture and result.stderr and not stream:
+                log.debug('Captured STDERR: %s', result.stderr)
+
+            if json and stream:
+                return parsed
+            if json == 'lines':
+                return [json_loads(line) for line in result.stdout.splitlines() if line.strip()]
+            if json:
+                return json_loads(result.stdout)
+
+            return result
+        except subprocess.CalledProcessError as e:
+            span['returncode'] = e.returncode
+            if capture:
+                raise CalledProcessError.from_cpe(e) from e
+            raise
+        except Exception as e:
+            raise CalledProcessError('n/a', args, '', '') from e
+
+
+class StreamTail:
+    """The last lines of an output stream and how many earlier ones were dropped."""
+
+    def __init__(self, max_lines: int):
+        self.lines = deque(maxlen=max_lines)
+        self.count = 0
+
+    def append(self, line: str) -> None:
+        self.lines.append(line)
+        self.count += 1
+
+    def text(self) -> str:
+        lines = list(self.lines)
+        if dropped := self.count - len(lines):
+            lines.insert(0, f'[{dropped} earlier lines not kept]')
+        return ''.join(f'{line}\n' for line in lines)
+
+
+def stream_run(
+    args: tuple,
+    on_line: Callable[[str, str], None] | None,
+    tail: int,
+    json: bool | str,
+    check: bool = False,
+    input: str | None = None,  # noqa: A002
+    timeout: float | None = None,
+    **kwargs,
+) -> tuple[subprocess.CompletedProcess, Any]:
+    """
+    `subprocess.run()` that reads output line by line.  Used by `sub_run(stream=True)`, which
+    see for `json`.  Returns the result and the parsed JSON, None without `json`.
+    """
+    kwargs.pop('capture_output', None)
+    kwargs.pop('text', None)
+    program = Path(str(args[0])).name
+    tails = {'stdout': StreamTail(tail), 'stderr': StreamTail(tail)}
+    # JSON Lines documents as each line arrives, or the whole stdout of a single document, which
+    # can't be parsed from the tail.
+    documents = []
+    stdout_lines = []
+
+    def read(name: str, pipe) -> None:
+        for line in pipe:
+            if name == 'stdout':
+                if json == 'lines' and line.strip():
+                    documents.append(json_loads(line))
+                elif json:
+                    stdout_lines.append(line)
+            line = line.removesuffix('\n')
+            tails[name].append(line)
+            log.debug('%s %s: %s', program, name, line)
+            if on_line:
+                on_line(name, line)
+
+    def write_input(pipe) -> None:
+        with pipe:
+            pipe.write(input)
+
+    with subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE if input is not None else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        **kwargs,
+    ) as proc:
+        # Both pipes have to be drained at once or the process can block writing to either.
+        threads = [threading.Thread(target=read, args=('stderr', proc.stderr), daemon=True)]
+        if input is not None:
+            threads.append(threading.Thread(target=write_input, args=(proc.stdin,), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        # Killing the process closes its pipes, which ends the reads, like subprocess.run().
+        expired = threading.Event()
+
+        def expire() -> None:
+            expired.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, expire) if timeout is not None else None
+        if timer:
+            timer.start()
+
+        try:
+            read('stdout', proc.stdout)
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            if timer:
+                timer.cancel()
+            for thread in threads:
+                thread.join()
+
+        returncode = proc.wait()
+
+    stdout = tails['stdout'].text()
+    stderr = tails['stderr'].text()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(args, timeout, stdout, stderr)
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, args, stdout, stderr)
+
+    parsed = None
+    if json == 'lines':
+        parsed = documents
+    elif json:
+        parsed = json_loads(''.join(stdout_lines))
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr), parsed
+
+
+def trace_name(args: tuple) -> str:
+    """Short span name: the program and its first argument, e.g. `git fetch`."""
+    parts = [Path(str(args[0])).name, *(str(arg) for arg in args[1:])]
+    # `python -m copier update` is more useful as `copier update`
+    if parts[1:2] == ['-m']:
+        parts = parts[2:]
+    return ' '.join(parts[:2])
+
+
+def sudo_run(*args, sudo_user=None, env_path=None, user_env=None, **kwargs):
+    """
+    `user_env` sets variables for the command run as `sudo_user`.  `env`, like with `sub_run()`,
+    is for sudo itself.
+    """
     user_args = ('-u', sudo_user, f'HOME=/home/{sudo_user}') if sudo_user else ()
+    env_vars = dict(user_env or {})
     # Sudo only looks for bins in: $ sudo grep secure_path /etc/sudoers
     # If we want to adjust the path, then we need to use `env` to do it.
-    env_args = ('env', f'PATH={env_path}') if env_path else ()
-    return sub_run('sudo', *user_args, *env_args, args=args, **kwargs)
+    if env_path:
+        env_vars['PATH'] = env_path
+    env_args = ('env', *(f'{name}={value}' for name, value in env_vars.items())) if env_vars else ()
+    with trace.span(trace_name(args), 'sudo_run', sudo_user=sudo_user):
+        return sub_run('sudo', *user_args, *env_args, args=args, **kwargs)
 
 
 def systemctl(*args, machine_user=None, **kwargs):
@@ -99,7 +258,8 @@ def systemctl(*args, machine_user=None, **kwargs):
         user_args = ('--user', f'--machine={machine_user}@.host')
         sudo_args = ('sudo',)
 
-    return sub_run(*sudo_args, 'systemctl', *user_args, *args, **kwargs)
+    with trace.span(trace_name(('systemctl', *args)), 'systemctl', machine_user=machine_user):
+        return sub_run(*sudo_args, 'systemctl', *user_args, *args, **kwargs)
 
 
 def loginctl(*args, machine_user=None, **kwargs):
@@ -0,0 +1,299 @@
+"""
+Verify projects after an update by running only the checks its changes affect: `coppy verify`.
+
+Running `uv sync`, `prek run --all-files`, and the full test suite after every update is slow
+and usually unnecessary: an update that only touched `rumdl.toml` can only break rumdl.  The
+files an update changed, uncommitted or since a given ref, are matched against each check's
+triggers and only the matching checks run.  Checks that need the project's dependencies
+installed wait for `uv sync`, the rest run at the same time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from pathlib import Path
+import time
+import tomllib
+
+from coppy import aio, fleet, hooks, tools
+from coppy.utils import CalledProcessError, sub_run
+
+
+@dataclass(frozen=True, slots=True)
+class Check:
+    name: str
+    args: tuple[str, ...]
+    # Patterns, matched with fnmatch so `*` crosses directories, of the project paths whose changes
+    # the check verifies.
+    triggers: tuple[str, ...]
+    # prek hooks the check runs.  It's left out when the project's prek config doesn't use them.
+    hook_ids: tuple[str, ...] = ()
+    # Runs before the other checks, which use what it installs
+    first: bool = False
+    # Other checks whose work this one includes
+    covers: tuple[str, ...] = ()
+
+    def triggered(self, paths: Iterable[str]) -> bool:
+        return any(fnmatchcase(path, pattern) for path in paths for pattern in self.triggers)
+
+    def command(self) -> tuple:
+        # prek runs as the one coppy uses, which isn't necessarily on PATH.
+        if self.args[0] == 'prek':
+            return (*tools.prek_args(), *self.args[1:], *self.hook_ids)
+        return self.args
+
+
+DEPENDENCY_FILES = ('pyproject.toml', 'uv.lock', 'uv.toml', '.python-version')
+
+CHECKS = (
+    # Neither copier nor the incremental update re-lock, so a template change to pyproject.toml
+    # leaves uv.lock stale and `uv sync --locked` would fail for a reason the update caused.
+    Check('lock', ('uv', 'lock'), ('pyproject.toml',), first=True),
+    Check('sync', ('uv', 'sync', '--locked'), DEPENDENCY_FILES, first=True),
+    Check(
+        'pytest',
+        ('uv', 'run', '--locked', 'nox', '--session', 'pytest'),
+        (*DEPENDENCY_FILES, 'noxfile.py', 'pytest.ini', '.coveragerc', 'src/*', 'tests/*'),
+    ),
+    Check(
+        'prek',
+        ('prek', 'run', '--all-files'),
+        ('prek.toml', '.pre-commit-config.yaml'),
+        covers=('ruff', 'rumdl'),
+    ),
+    Check(
+        'ruff',
+        ('prek', 'run', '--all-files'),
+        ('ruff.toml', '*.py'),
+        hook_ids=('ruff', 'ruff-format'),
+    ),
+    Check(
+        'rumdl',
+        ('prek', 'run', '--all-files'),
+        ('rumdl.toml', '.rumdl.toml', '*.md'),
+        hook_ids=('rumdl',),
+    ),
+)
+
+
+@dataclass(slots=True)
+class CheckResult:
+    name: str
+    # One of: planned, passed, failed, skipped
+    status: str
+    duration: float = 0.0
+    message: str = ''
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'status': self.status,
+            'duration': round(self.duration, 3),
+            'message': self.message,
+        }
+
+
+@dataclass(slots=True)
+class ProjectVerify:
+    project_dpath: Path
+    # One of: planned, passed, unaffected, failed, skipped
+    status: str
+    duration: float = 0.0
+    changed: list[str] = field(default_factory=list)
+    checks: list[CheckResult] = field(default_factory=list)
+    message: str = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.status != 'failed'
+
+    def as_dict(self) -> dict:
+        return {
+            'project': self.project_dpath.as_posix(),
+            'status': self.status,
+            'duration': round(self.duration, 3),
+            'message': self.message,
+            'changed': self.changed,
+            'checks': [check.as_dict() for check in self.checks],
+        }
+
+
+def changed_paths(project_dpath: Path, since: str | None = None) -> list[str]:
+    """
+    Project paths changed in the working tree, or since the ref, including untracked files.
+    Renames are a delete and an add.
+    """
+    if since:
+        diff = sub_run(
+            'git',
+            'diff',
+            '--name-only',
+            '--no-renames',
+            '-z',
+            since,
+            '--',
+            cwd=project_dpath,
+            capture=True,
+        )
+        paths = set(diff.stdout.split('\0'))
+        args = ('ls-files', '--others', '--exclude-standard', '-z')
+        untracked = sub_run('git', *args, cwd=project_dpath, capture=True)
+        paths.update(untracked.stdout.split('\0'))
+    else:
+        # Each entry is the two status letters, a space, and the path.
+        args = ('status', '--porcelain', '--no-renames', '--untracked-files=all', '-z')
+        status = sub_run('git', *args, cwd=project_dpath, capture=True)
+        paths = {entry[3:] for entry in status.stdout.split('\0')}
+
+    return sorted(path for path in paths if path)
+
+
+def prek_hook_ids(project_dpath: Path) -> set[str]:
+    """Ids of the hooks the project's prek config uses, empty without a readable config."""
+    try:
+        config = tomllib.loads(project_dpath.joinpath(hooks.CONFIG_FNAME).read_text())
+    except (OSError, tomllib.TOMLDecodeError):
+        return set()
+
+    return {
+        hook['id']
+        for repo in config.get('repos', ())
+        for hook in repo.get('hooks', ())
+        if 'id' in hook
+    }
+
+
+def plan(
+    paths: Sequence[str],
+    hook_ids: set[str],
+    checks: Sequence[Check] = CHECKS,
+) -> list[Check]:
+    """
+    The checks the changed paths affect, in the order given.  Checks running the same prek
+    command are merged into one that runs all their hooks.
+    """
+    planned = [
+        check
+        for check in checks
+        if check.triggered(paths) and all(hook_id in hook_ids for hook_id in check.hook_ids)
+    ]
+    covered = {name for check in planned for name in check.covers}
+    planned = [check for check in planned if check.name not in covered]
+
+    # Checks that run the same prek command with different hooks run as one: prek runs in the
+    # same project at the same time wait on each other for prek's store lock.
+    merged: dict[tuple[str, ...], list[Check]] = {}
+    for check in planned:
+        if check.hook_ids:
+            merged.setdefault(check.args, []).append(check)
+    for same in merged.values():
+        if len(same) > 1:
+            combined = Check(
+                '+'.join(check.name for check in same),
+                same[0].args,
+                tuple(pattern for check in same for pattern in check.triggers),
+                hook_ids=tuple(hook_id for check in same for hook_id in check.hook_ids),
+            )
+            planned = [
+                combined if check is same[0] else check
+                for check in planned
+                if check is same[0] or check not in same
+            ]
+    return planned
+
+
+async def run_check(project_dpath: Path, check: Check) -> CheckResult:
+    start = time.perf_counter()
+
+    def result(status: str, message: str = '') -> CheckResult:
+        return CheckResult(check.name, status, time.perf_counter() - start, message)
+
+    try:
+        await aio.sub_run(*check.command(), cwd=project_dpath, capture=True)
+    except CalledProcessError as e:
+        output = f'{e.stdout or ""}\n{e.stderr or ""}'.strip()
+        return result('failed', output.splitlines()[-1] if output else str(e))
+
+    return result('passed')
+
+
+def verify_project(
+    project_dpath: Path,
+    since: str | None = None,
+    dry_run: bool = False,
+    checks: Sequence[Check] = CHECKS,
+) -> ProjectVerify:
+    start = time.perf_counter()
+    verify = ProjectVerify(project_dpath, 'passed')
+
+    def result(status: str, message: str = '') -> ProjectVerify:
+        verify.status = status
+        verify.message = message
+        verify.duration = time.perf_counter() - start
+        return verify
+
+    try:
+        verify.changed = changed_paths(project_dpath, since)
+    except CalledProcessError as e:
+        return result('skipped', str(e).strip().splitlines()[-1])
+
+    planned = plan(verify.changed, prek_hook_ids(project_dpath), checks)
+    if not planned:
+        return result('unaffected', 'nothing to verify')
+    if dry_run:
+        verify.checks = [CheckResult(check.name, 'planned') for check in planned]
+        return result('planned')
+
+    first = [check for check in planned if check.first]
+    rest = [check for check in planned if not check.first]
+    for check in first:
+        verify.checks.append(asyncio.run(run_check(project_dpath, check)))
+        if verify.checks[-1].status == 'failed':
+            verify.checks += [
+                CheckResult(other.name, 'skipped', message=f'{check.name} failed') for other in rest
+            ]
+            return result('failed')
+
+    # Checks are only subprocesses, so they run on this thread's event loop rather than a thread
+    # each.  run_check() reports failures as results, so one doesn't cancel the others.
+    checks_run = aio.gather(*(run_check(project_dpath, check) for check in rest))
+    verify.checks += asyncio.run(checks_run)
+
+    if any(check.status == 'failed' for check in verify.checks):
+        return result('failed')
+    return result('passed')
+
+
+def verify_fleet(
+    projects: Sequence[Path],
+    jobs: int = fleet.DEFAULT_JOBS,
+    since: str | None = None,
+    dry_run: bool = False,
+    on_result: Callable[[ProjectVerify], None] | None = None,
+    checks: Sequence[Check] = CHECKS,
+) -> list[ProjectVerify]:
+    """Verify projects on a bounded worker pool.  Results are returned in the order given."""
+
+    def run(project_dpath: Path) -> ProjectVerify:
+        verify = verify_project(project_dpath, since, dry_run, checks)
+        if on_result:
+            on_result(verify)
+        return verify
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        return list(executor.map(run, projects))
+
+
+def summary(verifies: Sequence[ProjectVerify]) -> dict:
+    counts = dict.fromkeys(('planned', 'passed', 'unaffected', 'failed', 'skipped'), 0)
+    for verify in verifies:
+        counts[verify.status] += 1
+
+    return {
+        'counts': counts,
+        'projects': [verify.as_dict() for verify in verifies],
+    }
@@ -1,3 +1,5 @@
+import functools
+import os
 import re
 import subprocess
 import unicodedata
@@ -6,12 +8,38 @@ import jinja2
 from jinja2.ext import Extension
 
 
+@functools.cache
+def git_config() -> dict[str, str]:
+    """
+    All of git's config from a single `git config --list -z` call made once per process so
+    rendering many prompt defaults, or generating many projects, doesn't keep spawning git.
+    """
+    try:
+        result = subprocess.run(
+            ('git', 'config', '--list', '-z'),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return {}
+
+    config = {}
+    for entry in result.stdout.split('\0'):
+        key, _, value = entry.partition('\n')
+        if key:
+            # Later entries override earlier ones, same as git.
+            config[key] = value
+    return config
+
+
 def git_user_name() -> str:
-    return subprocess.getoutput('git config user.name').strip()
+    # Git's own identity env vars override config and spare the git call entirely.
+    return os.environ.get('GIT_AUTHOR_NAME') or git_config().get('user.name', '').strip()
 
 
 def git_user_email() -> str:
-    return subprocess.getoutput('git config user.email').strip()
+    return os.environ.get('GIT_AUTHOR_EMAIL') or git_config().get('user.email', '').strip()
 
 
 def slugify(value, separator='-'):
@@ -4,6 +4,7 @@
 
 import click
 from coppy_tests.libs.os_prep import Mive, User, sudoers_write
+from coppy_tests.libs.sandbox import SandboxSession
 
 from coppy import logs, utils
 from coppy.utils import dd
@@ -29,6 +30,11 @@ def main(systemd_skip: bool, systemd_force: bool, reinstall: bool):
     coppy_user = User(username)
 
     if reinstall and coppy_user.exists():
+        # Deleting the user kills its processes and removes every test session's files.
+        if active := SandboxSession.active(username):
+            paths = ', '.join(str(session.root_dpath) for session in active)
+            raise click.ClickException(f'Test sessions are running, try again when done: {paths}')
+
         result = utils.sudo_run('pkill', '-u', username, returns=(0, 1))
         if result.returncode == 0:
             log.info('Waiting on all coppy-tests processes to exit')
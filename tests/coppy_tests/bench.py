@@ -0,0 +1,316 @@
+"""
+Benchmarks for the operations that make up a coppy update: generating a project, updating it
+between template commits, running coppy's migrations, and starting the coppy CLI.
+
+Run with `mise run bench` or `nox -s bench`.  Results are compared to the baseline in
+tests/bench-baseline.json and the run fails when an operation is slower than the baseline by
+more than the threshold.  `--save` replaces the baseline with the current results.
+
+Baselines are recorded on whatever machine saved them, so each run also times starting a bare
+Python process and scales the baseline by how much faster or slower this machine is at that.
+"""
+
+from collections.abc import Callable
+from contextlib import redirect_stdout
+import io
+import json
+from pathlib import Path
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import click
+import copier
+
+from coppy import fleet, incremental
+from coppy.migrate import Migrator
+from coppy.template_cache import TemplateCache
+from coppy.utils import sub_run
+from coppy_tests.libs.paths import dirs
+
+
+BASELINE_FPATH = dirs.tests / 'bench-baseline.json'
+DEFAULT_THRESHOLD = 0.25
+# Benchmarks dominated by git, copier, and prek subprocesses vary more from run to run, so they
+# get a higher threshold than the default.
+THRESHOLDS = {
+    'generate': 0.4,
+    'update': 0.5,
+    'update-incremental': 0.5,
+    'migrate-prek': 0.5,
+}
+# Differences smaller than this are noise no matter the percentage
+MIN_REGRESSION = 0.01
+# A median of fewer rounds is mostly noise, even with --rounds-scale
+MIN_ROUNDS = 3
+
+# Same answers Package.generate() uses
+ANSWERS = {
+    'project_name': 'Enterprise',
+    'author_name': 'Picard',
+    'author_email': 'jpicard@starfleet.space',
+    'script_name': '',
+    'gh_org': 'starfleet',
+}
+
+PRE_COMMIT_CONFIG = """
+repos:
+  - repo: https://github.com/pre-commit/pre-commit-hooks
+    rev: v5.0.0
+    hooks:
+      - id: check-yaml
+""".lstrip()
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Bench',
+        '-c',
+        'user.email=coppy-bench@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+class Workspace:
+    """A template clone with two commits to update between and a project generated from it."""
+
+    def __init__(self, dpath: Path):
+        self.dpath = dpath
+        self.template_dpath = dpath / 'template'
+        self.project_dpath = dpath / 'project'
+
+    def prepare(self) -> None:
+        # A clone keeps uncommitted changes in the working tree out of the template.
+        sub_run('git', 'clone', '--quiet', dirs.pkg, self.template_dpath)
+
+        self.generate(self.project_dpath)
+        # Keep the migration from running `mise lock`, which needs the network.
+        self.project_dpath.joinpath('mise.lock').write_text('# bench\n')
+        git(self.project_dpath, 'init', '--quiet')
+        git(self.project_dpath, 'add', '--all')
+        git(self.project_dpath, 'commit', '--quiet', '-m', 'generated')
+
+        readme_fpath = self.template_dpath / 'template/readme.md.jinja'
+        readme_fpath.write_text(f'{readme_fpath.read_text()}\nBenchmark change\n')
+        git(self.template_dpath, 'commit', '--quiet', '--all', '-m', 'bench change')
+
+    def generate(self, dest: Path) -> None:
+        copier.run_copy(
+            self.template_dpath.as_posix(),
+            dest.as_posix(),
+            ANSWERS,
+            unsafe=True,
+            defaults=True,
+            vcs_ref='HEAD~1',
+            quiet=True,
+        )
+
+
+def bench_generate(ws: Workspace) -> Callable[[], None]:
+    dest = ws.dpath / 'generated'
+
+    def run():
+        shutil.rmtree(dest, ignore_errors=True)
+        ws.generate(dest)
+
+    return run
+
+
+def bench_update(ws: Workspace) -> Callable[[], None]:
+    base_commit = git(ws.project_dpath, 'rev-parse', 'HEAD')
+
+    def run():
+        git(ws.project_dpath, 'reset', '--quiet', '--hard', base_commit)
+        git(ws.project_dpath, 'clean', '--quiet', '-fdx')
+        sub_run(
+            *fleet.copier_update_args(ws.project_dpath, True, '--defaults', '--quiet'),
+            capture=True,
+        )
+
+    return run
+
+
+def bench_update_incremental(ws: Workspace) -> Callable[[], None]:
+    base_commit = git(ws.project_dpath, 'rev-parse', 'HEAD')
+    cache = TemplateCache(ws.template_dpath.as_posix(), cache_dpath=ws.dpath / 'cache')
+    cache.refresh()
+
+    def run():
+        git(ws.project_dpath, 'reset', '--quiet', '--hard', base_commit)
+        git(ws.project_dpath, 'clean', '--quiet', '-fdx')
+        assert incremental.update_project(ws.project_dpath, cache, use_head=True)
+
+    return run
+
+
+def bench_migrate(ws: Workspace, pre_commit: bool) -> Callable[[], None]:
+    # No git repo, so the migrations aren't recorded as done after the first round.
+    dpath = ws.dpath / ('migrate-prek' if pre_commit else 'migrate')
+    shutil.copytree(ws.project_dpath, dpath, ignore=shutil.ignore_patterns('.git'))
+
+    def run():
+        if pre_commit:
+            dpath.joinpath('.pre-commit-config.yaml').write_text(PRE_COMMIT_CONFIG)
+        migrator = Migrator(dpath, mise_lock=False)
+        with redirect_stdout(io.StringIO()):
+            migrator.before()
+            migrator.after()
+
+    return run
+
+
+def bench_cli(*args) -> Callable[[], None]:
+    def run():
+        sub_run(sys.executable, '-m', 'coppy.cli', *args, capture=True)
+
+    return run
+
+
+def bench_python() -> None:
+    sub_run(sys.executable, '-c', 'pass')
+
+
+def benchmarks(ws: Workspace) -> dict[str, tuple[Callable[[], None], int]]:
+    """name -> (benchmark, rounds)"""
+    return {
+        'python-startup': (bench_python, 10),
+        'cli-version': (bench_cli('version'), 10),
+        'cli-migrate-help': (bench_cli('migrate', '--help'), 10),
+        'migrate-noop': (bench_migrate(ws, pre_commit=False), 10),
+        'migrate-prek': (bench_migrate(ws, pre_commit=True), 15),
+        'generate': (bench_generate(ws), 5),
+        'update': (bench_update(ws), 3),
+        'update-incremental': (bench_update_incremental(ws), 15),
+    }
+
+
+def measure(func: Callable[[], None], rounds: int) -> dict:
+    func()  # warm up caches, e.g. imports and the OS file cache
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return {
+        'median': round(statistics.median(times), 4),
+        'min': round(min(times), 4),
+        'rounds': rounds,
+    }
+
+
+def run_all(only: tuple[str, ...] = (), rounds_scale: float = 1.0) -> dict:
+    with tempfile.TemporaryDirectory(prefix='coppy-bench-') as tmp:
+        ws = Workspace(Path(tmp))
+        ws.prepare()
+
+        results = {}
+        for name, (func, rounds) in benchmarks(ws).items():
+            # Always measured, it's what the comparison is calibrated with.
+            if only and name not in only and name != 'python-startup':
+                continue
+            results[name] = measure(func, max(MIN_ROUNDS, round(rounds * rounds_scale)))
+            click.echo(f'{name:>18}  {results[name]["median"] * 1000:9.1f}ms', err=True)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Messages for each benchmark slower than the (calibrated) baseline allows.  `threshold` is
+    raised to the benchmark's own in THRESHOLDS.  When both runs recorded their fastest round, it
+    has to be slower too, so a few slow rounds on a busy machine aren't a regression.
+    """
+    base_results = baseline['results']
+    calibration = 'python-startup'
+    scale = current['results'][calibration]['median'] / base_results[calibration]['median']
+
+    messages = []
+    for name, result in current['results'].items():
+        if name == calibration or name not in base_results:
+            continue
+
+        base = base_results[name]
+        allowed = 1 + max(threshold, THRESHOLDS.get(name, 0))
+        expected = base['median'] * scale
+        actual = result['median']
+        if actual <= expected * allowed or actual - expected <= MIN_REGRESSION:
+            continue
+        if 'min' in result and 'min' in base and result['min'] <= base['min'] * scale * allowed:
+            continue
+
+        messages.append(
+            f'{name}: {actual * 1000:.1f}ms vs baseline {expected * 1000:.1f}ms '
+            f'(+{(actual / expected - 1) * 100:.0f}%)',
+        )
+    return messages
+
+
+@click.command()
+@click.option('--save', is_flag=True, help='Save the results as the new baseline')
+@click.option(
+    '--baseline',
+    'baseline_fpath',
+    type=click.Path(path_type=Path, dir_okay=False),
+    default=BASELINE_FPATH,
+    show_default=True,
+)
+@click.option(
+    '--threshold',
+    type=float,
+    default=DEFAULT_THRESHOLD,
+    show_default=True,
+    help='Allowed slowdown, 0.25 is 25%',
+)
+@click.option('--only', multiple=True, help='Only run the named benchmark (repeatable)')
+@click.option('--rounds-scale', type=float, default=1.0, help='Multiply every rounds count')
+@click.option(
+    '--output',
+    type=click.Path(path_type=Path, dir_okay=False),
+    help='Also write the results to this file',
+)
+def main(
+    save: bool,
+    baseline_fpath: Path,
+    threshold: float,
+    only: tuple[str, ...],
+    rounds_scale: float,
+    output: Path | None,
+):
+    """Time coppy's key operations and compare them to the baseline"""
+    current = run_all(only, rounds_scale)
+    current_json = json.dumps(current, indent=2) + '\n'
+
+    if output:
+        output.write_text(current_json)
+
+    if save:
+        baseline_fpath.write_text(current_json)
+        click.echo(f'Saved baseline: {baseline_fpath}')
+        return
+
+    if not baseline_fpath.exists():
+        click.echo(f'No baseline at {baseline_fpath}, use --save to create one')
+        return
+
+    if messages := regressions(current, json.loads(baseline_fpath.read_text()), threshold):
+        raise click.ClickException(
+            'Slower than baseline:\n' + '\n'.join(f'  {msg}' for msg in messages),
+        )
+
+    click.echo('No regressions')
+
+
+if __name__ == '__main__':
+    main()
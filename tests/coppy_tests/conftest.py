@@ -1,5 +1,6 @@
 import pytest
 
+from coppy_tests.libs import mocks
 from coppy_tests.libs.click import CLIRunner
 from coppy_tests.libs.sandbox import UserBox
 
@@ -12,3 +13,10 @@ def coppy_install():
 @pytest.fixture(scope='session')
 def cli():
     return CLIRunner()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def coppy_cache_dir(tmp_path_factory):
+    """Keep tests out of the developer's coppy cache"""
+    with mocks.environ(COPPY_CACHE_DIR=str(tmp_path_factory.mktemp('coppy-cache'))):
+        yield
@@ -1,12 +1,223 @@
 from contextlib import contextmanager
+from dataclasses import dataclass, field
+import fcntl
+import functools
+import hashlib
+import os
 from pathlib import Path
 import shutil
+from typing import IO
+import uuid
 
 from coppy.utils import sub_run, sudo_run
 from coppy.version import VERSION
 
 from .os_prep import User
-from .paths import dirs, tmp_dir
+from .paths import dirs
+
+
+# TODO: if needed, we could get this from the environment so a dev could use a different user
+# by setting it in mise.local.toml.
+USERNAME = 'coppy-tests'
+SESSION_ENV_VAR = 'COPPY_TEST_SESSION'
+# Group members, i.e. the dev's user and the test user, can both manage session files.
+DIR_MODE = 0o2775
+
+
+class SessionBusy(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class SandboxSession:
+    """
+    The test user's runtime state for one test process: home, temp, cache, config, data, and uv
+    tool directories.  Everything a sandbox runs uses these instead of the test user's real home
+    so several pytest runs, and pytest-xdist workers, can share the one prepared user.
+
+    Sessions are slots under `~coppy-tests/tmp/sessions` held with a lock for the life of the
+    process.  Slots are reused by later runs so mise and uv caches stay warm.
+    """
+
+    session_id: str
+    username: str
+    base_home_dpath: Path
+    lock_file: IO | None = field(default=None, repr=False)
+
+    @property
+    def sessions_dpath(self) -> Path:
+        return self.base_home_dpath / 'tmp/sessions'
+
+    @property
+    def root_dpath(self) -> Path:
+        return self.sessions_dpath / self.session_id
+
+    @property
+    def lock_fpath(self) -> Path:
+        return self.sessions_dpath / f'{self.session_id}.lock'
+
+    @property
+    def home_dpath(self) -> Path:
+        return self.root_dpath / 'home'
+
+    @property
+    def tmp_dpath(self) -> Path:
+        return self.root_dpath / 'tmp'
+
+    @property
+    def cache_dpath(self) -> Path:
+        return self.root_dpath / 'cache'
+
+    @property
+    def config_dpath(self) -> Path:
+        return self.root_dpath / 'config'
+
+    @property
+    def data_dpath(self) -> Path:
+        return self.root_dpath / 'data'
+
+    @property
+    def tool_dpath(self) -> Path:
+        return self.root_dpath / 'uv-tools'
+
+    @property
+    def tool_bin_dpath(self) -> Path:
+        return self.root_dpath / 'bin'
+
+    @property
+    def dist_dpath(self) -> Path:
+        return self.root_dpath / 'dist'
+
+    @property
+    def pytest_dpath(self) -> Path:
+        """Where test packages are generated, emptied when the session starts."""
+        return self.root_dpath / 'pytest'
+
+    def env(self) -> dict[str, str]:
+        return {
+            'HOME': str(self.home_dpath),
+            'TMPDIR': str(self.tmp_dpath),
+            'XDG_CACHE_HOME': str(self.cache_dpath),
+            'XDG_CONFIG_HOME': str(self.config_dpath),
+            'XDG_DATA_HOME': str(self.data_dpath),
+            'MISE_CACHE_DIR': str(self.cache_dpath / 'mise'),
+            'MISE_CONFIG_DIR': str(self.config_dpath / 'mise'),
+            'MISE_DATA_DIR': str(self.data_dpath / 'mise'),
+            'UV_CACHE_DIR': str(self.cache_dpath / 'uv'),
+            'UV_TOOL_DIR': str(self.tool_dpath),
+            'UV_TOOL_BIN_DIR': str(self.tool_bin_dpath),
+        }
+
+    def lock(self) -> bool:
+        """Take the session's lock.  False when another process holds it."""
+        self.sessions_dpath.mkdir(parents=True, exist_ok=True)
+        lock_file = self.lock_fpath.open('a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        self.lock_file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self.lock_file:
+            self.lock_file.close()
+            self.lock_file = None
+
+    def is_locked(self) -> bool:
+        """Another process holds the session's lock."""
+        if not self.lock_fpath.exists():
+            return False
+
+        with self.lock_fpath.open() as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+        return False
+
+    def prepare(self) -> None:
+        """Create the session's directories and empty the ones only meant for this run."""
+        for dpath in (self.pytest_dpath, self.tmp_dpath):
+            shutil.rmtree(dpath, ignore_errors=True)
+
+        for dpath in (
+            self.root_dpath,
+            self.home_dpath,
+            self.tmp_dpath,
+            self.cache_dpath,
+            self.config_dpath,
+            self.data_dpath,
+            self.tool_dpath,
+            self.tool_bin_dpath,
+            self.dist_dpath,
+            self.pytest_dpath,
+        ):
+            dpath.mkdir(parents=True, exist_ok=True)
+            dpath.chmod(DIR_MODE)
+
+        # Git identity and safe.directory from test-user-prep
+        gitconfig_fpath = self.base_home_dpath / '.gitconfig'
+        session_gitconfig = self.home_dpath / '.gitconfig'
+        if gitconfig_fpath.exists() and not session_gitconfig.exists():
+            session_gitconfig.symlink_to(gitconfig_fpath)
+
+    @classmethod
+    def acquire(cls, username: str = USERNAME, base_home_dpath: Path | None = None):
+        """
+        The session named by `COPPY_TEST_SESSION` or else the first free numbered slot.
+        pytest-xdist workers get their own session within the named one.
+        """
+        base_home_dpath = base_home_dpath or User(username).home_dir()
+        name = os.environ.get(SESSION_ENV_VAR)
+        worker = os.environ.get('PYTEST_XDIST_WORKER')
+
+        if name:
+            session = cls('-'.join(filter(None, (name, worker))), username, base_home_dpath)
+            if not session.lock():
+                raise SessionBusy(f'Test session in use by another process: {session.root_dpath}')
+        else:
+            for slot in range(1, 100):
+                session = cls(f'slot-{slot}', username, base_home_dpath)
+                if session.lock():
+                    break
+            else:
+                raise SessionBusy('No free test session slot')
+
+        session.prepare()
+        return session
+
+    @classmethod
+    def active(cls, username: str = USERNAME, base_home_dpath: Path | None = None) -> list:
+        """Sessions held by running test processes."""
+        base_home_dpath = base_home_dpath or User(username).home_dir()
+        sessions = [
+            cls(lock_fpath.stem, username, base_home_dpath)
+            for lock_fpath in sorted(base_home_dpath.joinpath('tmp/sessions').glob('*.lock'))
+        ]
+        return [session for session in sessions if session.is_locked()]
+
+
+def source_hash(pkg_dpath: Path = dirs.pkg) -> str:
+    """Hash of everything that goes into coppy's wheel."""
+    src_fpaths = (
+        fpath
+        for fpath in pkg_dpath.joinpath('src/coppy').rglob('*')
+        if fpath.is_file() and '__pycache__' not in fpath.parts
+    )
+    digest = hashlib.sha256()
+    for fpath in sorted((pkg_dpath / 'pyproject.toml', pkg_dpath / 'hatch.toml', *src_fpaths)):
+        digest.update(fpath.relative_to(pkg_dpath).as_posix().encode())
+        digest.update(hashlib.sha256(fpath.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+@functools.cache
+def current_session() -> SandboxSession:
+    """This process's session, acquired the first time a sandbox needs it."""
+    return SandboxSession.acquire()
 
 
 class UserBox:
@@ -15,26 +226,48 @@ class UserBox:
     setup.
     """
 
-    # TODO: if needed, we could get this from the environment so a dev could use a different user
-    # by setting it in mise.local.toml.
-    username = 'coppy-tests'
+    username = USERNAME
 
     user = User(username)
-    home_dpath = user.home_dir()
-    tmp_dpath = home_dpath / 'tmp'
-    local_bin_dpath = home_dpath / '.local/bin'
-    sudo_PATH = f'{local_bin_dpath}:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin'
-    pytest_tmppath = tmp_dir(tmp_dpath, 'pytest-run')
+    base_home_dpath = user.home_dir()
+    # Shared mise and uv binaries, kept current by test-user-prep's systemd timer
+    local_bin_dpath = base_home_dpath / '.local/bin'
 
     def __init__(
         self,
         cwd: Path | None = None,
+        session: SandboxSession | None = None,
     ):
+        self.session = session or current_session()
         self.cwd = cwd or self.home_dpath
 
+    @property
+    def home_dpath(self) -> Path:
+        return self.session.home_dpath
+
+    @property
+    def tmp_dpath(self) -> Path:
+        return self.session.tmp_dpath
+
+    @property
+    def sudo_PATH(self) -> str:
+        return ':'.join(
+            (
+                str(self.session.tool_bin_dpath),
+                str(self.local_bin_dpath),
+                '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin',
+            ),
+        )
+
     def exec(self, *args, **kwargs):
         kwargs.setdefault('cwd', self.cwd)
-        return sudo_run(*args, sudo_user=self.username, env_path=self.sudo_PATH, **kwargs)
+        return sudo_run(
+            *args,
+            sudo_user=self.username,
+            env_path=self.sudo_PATH,
+            user_env=self.session.env(),
+            **kwargs,
+        )
 
     def exec_stdout(self, *args, **kwargs) -> str:
         result = self.exec(*args, capture=True, **kwargs)
@@ -67,11 +300,10 @@ class UserBox:
         return result.splitlines()
 
     def __enter__(self):
+        # Mise's cache belongs to this session so, unlike a shared one, doesn't need clearing to
+        # keep tests from interfering with each other.
         self.mise('trust')
 
-        # Help keep tests from interfering with each other
-        self.mise('--no-config', 'cache', 'clear')
-
         # uv_venv_auto detects projects by their uv.lock, so perform the same initial sync required
         # by the generated project's setup instructions before asking mise to activate the venv.
         self.uv('sync')
@@ -85,20 +317,57 @@ class UserBox:
         pass
 
     def coppy_install(self) -> Path:
-        version = VERSION
-        sub_run('uv', 'build', '--wheel', '--out-dir', dirs.dist, cwd=dirs.pkg)
-        wheel_name = f'coppy-{version}-py3-none-any.whl'
-        wheel_fpath = dirs.dist / wheel_name
+        """
+        Install the working tree's coppy as a uv tool in this session only.  The wheel build and
+        install are skipped when the session already has a build of the same sources.
+        """
+        coppy_fpath = self.session.tool_bin_dpath / 'coppy'
+        stamp_fpath = self.session.root_dpath / 'coppy-install.sha256'
+        src_hash = source_hash()
+        if coppy_fpath.exists() and stamp_fpath.exists() and stamp_fpath.read_text() == src_hash:
+            return coppy_fpath
 
-        sub_run('cp', wheel_fpath, self.tmp_dpath)
+        wheel_dpath = self.session.dist_dpath / src_hash
+        wheel_fpath = wheel_dpath / f'coppy-{VERSION}-py3-none-any.whl'
+        if not wheel_fpath.exists():
+            # Only the current build is worth keeping.
+            shutil.rmtree(self.session.dist_dpath, ignore_errors=True)
+            sub_run('uv', 'build', '--wheel', '--out-dir', wheel_dpath, cwd=dirs.pkg)
 
-        user_wheel_fpath = self.tmp_dpath / wheel_name
+        stamp_fpath.unlink(missing_ok=True)
         self.uv(
             'tool',
             'install',
-            user_wheel_fpath,
+            wheel_fpath,
             '--reinstall',
         )
+        stamp_fpath.write_text(src_hash)
+        return coppy_fpath
+
+    def clone(self, src_dpath: Path, dest_dpath: Path) -> None:
+        """
+        Copy a tree as the test user, sharing file data with the source where possible: reflinks
+        when the filesystem supports them, otherwise `.venv` is hardlinked, since uv replaces
+        files rather than writing into them, and everything else is copied.
+        """
+        self.exec('rm', '-rf', dest_dpath)
+        result = self.exec(
+            'cp',
+            '-a',
+            '--reflink=always',
+            src_dpath,
+            dest_dpath,
+            capture=True,
+            returns=(0, 1),
+        )
+        if result.returncode == 0:
+            return
+
+        self.exec('rm', '-rf', dest_dpath)
+        self.exec('cp', '-al', src_dpath, dest_dpath)
+        if copy_paths := [path for path in src_dpath.iterdir() if path.name != '.venv']:
+            # Replace the hardlinks so edits in the copy don't show up in the source.
+            self.exec('cp', '-a', '--remove-destination', *copy_paths, dest_dpath)
 
     @contextmanager
     def place(self, src_fpath: Path, dest_fpath: str):
@@ -108,7 +377,7 @@ class UserBox:
             dest_fpath: Path = Path(dest_fpath)
             assert dest_fpath.is_absolute()
 
-        bak_fpath = Path(str(dest_fpath) + '~')
+        bak_fpath = Path(f'{dest_fpath}~{uuid.uuid4().hex[:8]}')
 
         # Move existing file to backup path
         if dest_fpath.exists():
@@ -126,4 +395,3 @@ class UserBox:
         # Restore the original
         if bak_fpath.exists():
             bak_fpath.replace(dest_fpath)
-            bak_fpath.unlink()
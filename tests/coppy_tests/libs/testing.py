@@ -1,13 +1,17 @@
 from collections.abc import Iterator
 from contextlib import contextmanager
+import functools
+import hashlib
+import json
 from pathlib import Path
 import shutil
 import tomllib
 
 import copier
 
-from coppy import utils
-from coppy_tests.libs.sandbox import UserBox
+from coppy import render, utils
+from coppy.containers import LazyDict
+from coppy_tests.libs.sandbox import UserBox, current_session
 
 from .paths import dirs
 
@@ -20,7 +24,16 @@ def data_fpath(rel_path):
 
 def toml_load(fpath: Path):
     with fpath.open('rb') as f:
-        return utils.LazyDict(tomllib.load(f))
+        return LazyDict(tomllib.load(f))
+
+
+DEFAULT_ANSWERS = {
+    'project_name': 'Enterprise',
+    'author_name': 'Picard',
+    'author_email': 'jpicard@starfleet.space',
+    'script_name': '',
+    'gh_org': 'starfleet',
+}
 
 
 class Package:
@@ -28,19 +41,13 @@ class Package:
         self.dpath = dpath
 
     def generate(self, rm_first=True, **kwargs):
-        kwargs.setdefault('project_name', 'Enterprise')
-        kwargs.setdefault('author_name', 'Picard')
-        kwargs.setdefault('author_email', 'jpicard@starfleet.space')
-        kwargs.setdefault('script_name', '')
-        kwargs.setdefault('gh_org', 'starfleet')
-
         if rm_first and self.dpath.exists():
             shutil.rmtree(self.dpath)
 
         copier.run_copy(
             utils.pkg_dpath.as_posix(),
             self.dpath.as_posix(),
-            kwargs,
+            DEFAULT_ANSWERS | kwargs,
             unsafe=True,
             defaults=True,
             vcs_ref='HEAD',
@@ -48,7 +55,7 @@ class Package:
 
     def toml_config(self, fname):
         with self.dpath.joinpath(fname).open('rb') as f:
-            return utils.LazyDict(tomllib.load(f))
+            return LazyDict(tomllib.load(f))
 
     def path(self, path: str):
         return self.dpath.joinpath(path)
@@ -64,12 +71,71 @@ class Package:
         return full_path.exists()
 
 
+class RenderedPackage:
+    """
+    A package rendered in memory by `coppy.render` instead of generated by copier.  For tests that
+    only look at the generated files.
+    """
+
+    def __init__(self):
+        self.files: dict[str, str | bytes] = {}
+
+    def generate(self, **kwargs):
+        self.files = render.render(DEFAULT_ANSWERS | kwargs)
+
+    def toml_config(self, fname):
+        return LazyDict(tomllib.loads(self.read_text(fname)))
+
+    def exists(self, path: str):
+        return path in self.files
+
+    def read_text(self, path: str):
+        return self.files[path]
+
+    def write(self, dpath: Path) -> Package:
+        for rel_path, content in self.files.items():
+            fpath = dpath / rel_path
+            fpath.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, bytes):
+                fpath.write_bytes(content)
+            else:
+                fpath.write_text(content)
+        return Package(dpath)
+
+
 class UserPackage(Package):
     def __init__(self, ident: str):
-        pkg_dpath = UserBox.pytest_tmppath / ident
+        pkg_dpath = current_session().pytest_dpath / ident
         super().__init__(pkg_dpath)
 
+    @classmethod
+    def from_snapshot(cls, ident: str, **answers) -> 'UserPackage':
+        """
+        A copy of a project generated with `answers` and already synced in the sandbox.  Much
+        quicker than `generate()` and a first sandbox entry, and safe for tests that change the
+        package.
+        """
+        package = cls(ident)
+        UserBox().clone(snapshot_dpath(**answers), package.dpath)
+        return package
+
     @contextmanager
     def sandbox(self, *args, **kwargs) -> Iterator[UserBox]:
         with UserBox(self.dpath, *args, **kwargs) as sb:
             yield sb
+
+
+@functools.cache
+def snapshot_dpath(**answers) -> Path:
+    """Generate and sync a project once per answer set and test session."""
+    key = hashlib.sha256(json.dumps(answers, sort_keys=True).encode()).hexdigest()[:12]
+    package = Package(current_session().pytest_dpath / 'snapshots' / key)
+    package.generate(**answers)
+
+    sb = UserBox(package.dpath)
+    # Scripts in a relocatable venv don't point at the snapshot so they keep working in copies.
+    sb.uv('venv', '--relocatable')
+    with sb:
+        pass
+
+    return package.dpath
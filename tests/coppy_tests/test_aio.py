@@ -0,0 +1,158 @@
+import asyncio
+import os
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+import pytest
+
+from coppy import aio
+from coppy.utils import CalledProcessError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def python(code: str) -> tuple:
+    return (sys.executable, '-c', code)
+
+
+class TestSubRun:
+    def test_capture(self, tmp_path: Path):
+        result = run(aio.sub_run('pwd', cwd=tmp_path, capture=True))
+
+        assert isinstance(result, subprocess.CompletedProcess)
+        assert result.returncode == 0
+        assert result.stdout == f'{tmp_path}\n'
+
+    def test_not_captured(self, capfd):
+        result = run(aio.sub_run('echo', 'hi'))
+
+        assert result.stdout is None
+        assert capfd.readouterr().out == 'hi\n'
+
+    def test_json(self):
+        assert run(aio.sub_run(*python('print(\'{"a": 1}\')'), json=True)) == {'a': 1}
+
+    def test_json_lines(self):
+        code = 'print(1); print(\'{"a": 1}\')'
+        assert run(aio.sub_run(*python(code), json='lines')) == [1, {'a': 1}]
+
+    def test_timeout(self):
+        code = 'import time; time.sleep(30)'
+
+        start = time.perf_counter()
+        with pytest.raises(CalledProcessError) as exc_info:
+            run(aio.sub_run(*python(code), capture=True, timeout=0.5))
+
+        assert time.perf_counter() - start < 10
+        assert isinstance(exc_info.value.__cause__, subprocess.TimeoutExpired)
+
+    def test_input_and_env(self):
+        code = 'import os, sys; print(os.environ["COPPY_AIO"] + sys.stdin.read())'
+
+        result = run(
+            aio.sub_run(*python(code), input='-in', env={'COPPY_AIO': 'env'}, capture=True),
+        )
+
+        assert result.stdout == 'env-in\n'
+
+    def test_error_enriched(self):
+        with pytest.raises(CalledProcessError) as exc_info:
+            run(aio.sub_run(*python('import sys; sys.exit("boom")'), capture=True))
+
+        assert exc_info.value.returncode == 1
+        assert exc_info.value.stderr == 'boom\n'
+        assert 'STDERR: boom' in str(exc_info.value)
+
+    def test_error_not_captured(self):
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            run(aio.sub_run('false'))
+
+        assert not isinstance(exc_info.value, CalledProcessError)
+
+    def test_returns(self):
+        result = run(aio.sub_run(*python('import sys; sys.exit(3)'), returns=(0, 3)))
+        assert result.returncode == 3
+
+        with pytest.raises(subprocess.CalledProcessError):
+            run(aio.sub_run(*python('import sys; sys.exit(4)'), returns=(0, 3)))
+
+    def test_not_found(self):
+        with pytest.raises(CalledProcessError) as exc_info:
+            run(aio.sub_run('coppy-no-such-program'))
+
+        assert isinstance(exc_info.value.__cause__, FileNotFoundError)
+
+    def test_cancel_kills_process(self, tmp_path: Path):
+        pid_fpath = tmp_path / 'pid'
+        code = (
+            f'import os, time; open({str(pid_fpath)!r}, "w").write(str(os.getpid())); '
+            'time.sleep(30)'
+        )
+
+        async def cancel_after_start():
+            task = asyncio.create_task(aio.sub_run(*python(code)))
+            while not pid_fpath.exists() or not pid_fpath.read_text():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run(cancel_after_start())
+
+        pid = int(pid_fpath.read_text())
+        with pytest.raises(ProcessLookupError):
+            # Signal 0 only checks the process exists.
+            os.kill(pid, 0)
+
+
+class TestGather:
+    def test_results_in_order(self):
+        async def value(val: int, delay: float):
+            await asyncio.sleep(delay)
+            return val
+
+        assert run(aio.gather(value(1, 0.03), value(2, 0.01), value(3, 0))) == [1, 2, 3]
+
+    def test_limit(self):
+        running = 0
+        peak = 0
+
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        run(aio.gather(*(work() for _ in range(6)), limit=2))
+
+        assert peak == 2
+
+    def test_subprocesses_concurrent(self):
+        start = time.perf_counter()
+
+        run(aio.gather(*(aio.sub_run('sleep', '0.3') for _ in range(4)), limit=4))
+
+        assert time.perf_counter() - start < 1.0
+
+    def test_first_failure_cancels_rest(self):
+        finished = []
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError('first')
+
+        async def slow(name: str):
+            await asyncio.sleep(5)
+            finished.append(name)
+
+        start = time.perf_counter()
+        with pytest.raises(ValueError, match='first'):
+            run(aio.gather(slow('a'), fail(), slow('b'), slow('c'), limit=2))
+
+        assert finished == []
+        assert time.perf_counter() - start < 1
@@ -0,0 +1,58 @@
+from coppy_tests import bench
+
+
+def results(**medians) -> dict:
+    return {'results': {name: {'median': median} for name, median in medians.items()}}
+
+
+class TestRegressions:
+    def test_within_threshold(self):
+        baseline = results(**{'python-startup': 0.02, 'update': 2.0})
+        current = results(**{'python-startup': 0.02, 'update': 2.4})
+
+        assert bench.regressions(current, baseline, threshold=0.25) == []
+
+    def test_regression(self):
+        baseline = results(**{'python-startup': 0.02, 'cli-version': 0.1})
+        current = results(**{'python-startup': 0.02, 'cli-version': 0.13})
+
+        assert bench.regressions(current, baseline, threshold=0.25) == [
+            'cli-version: 130.0ms vs baseline 100.0ms (+30%)',
+        ]
+
+    def test_subprocess_heavy_threshold(self):
+        baseline = results(**{'python-startup': 0.02, 'update-incremental': 0.026})
+
+        current = results(**{'python-startup': 0.02, 'update-incremental': 0.035})
+        assert bench.regressions(current, baseline, threshold=0.25) == []
+
+        current = results(**{'python-startup': 0.02, 'update-incremental': 0.045})
+        assert len(bench.regressions(current, baseline, threshold=0.25)) == 1
+
+    def test_fastest_round_not_slower(self):
+        baseline = results(**{'python-startup': 0.02, 'cli-version': 0.1})
+        baseline['results']['cli-version']['min'] = 0.09
+        # A few slow rounds moved the median but the fastest is as fast as ever.
+        current = results(**{'python-startup': 0.02, 'cli-version': 0.14})
+        current['results']['cli-version']['min'] = 0.09
+
+        assert bench.regressions(current, baseline, threshold=0.25) == []
+
+    def test_scaled_by_machine_speed(self):
+        baseline = results(**{'python-startup': 0.02, 'update': 2.0})
+        # Everything is twice as slow on this machine
+        current = results(**{'python-startup': 0.04, 'update': 4.4})
+
+        assert bench.regressions(current, baseline, threshold=0.25) == []
+
+    def test_ignores_noise(self):
+        baseline = results(**{'python-startup': 0.02, 'migrate-noop': 0.001})
+        current = results(**{'python-startup': 0.02, 'migrate-noop': 0.003})
+
+        assert bench.regressions(current, baseline, threshold=0.25) == []
+
+    def test_new_benchmark(self):
+        baseline = results(**{'python-startup': 0.02})
+        current = results(**{'python-startup': 0.02, 'update': 2.0})
+
+        assert bench.regressions(current, baseline, threshold=0.25) == []
@@ -1,11 +1,11 @@
 from pathlib import Path
-import subprocess
 import sys
 
 import pytest
 
-from coppy import cli as cli_mod
-from coppy import utils
+from coppy import tools, utils
+from coppy.commands import migrate as migrate_cmd
+from coppy.commands import update as update_cmd
 
 from .libs import mocks
 from .libs.click import CLIRunner
@@ -32,11 +32,11 @@ class TestCoppy:
         assert coppy_lines[: coppy_boundary + 1] == template_lines[: template_boundary + 1]
 
 
-@mocks.patch_obj(cli_mod, 'sub_run')
+@mocks.patch_obj(update_cmd, 'sub_run')
 class TestCoppyCLI:
     @pytest.fixture(autouse=True)
     def uv_version_check(self):
-        with mocks.patch_obj(cli_mod.UvVersion, 'check'):
+        with mocks.patch_obj(update_cmd.UvVersion, 'check'):
             yield
 
     def test_defaults(self, m_sub_run, cli: CLIRunner):
@@ -89,15 +89,15 @@ class TestCoppyCLI:
 
 class TestCoppyCLIUvVersion:
     def test_supported_reaches_copier(self, cli: CLIRunner):
-        uv_result = subprocess.CompletedProcess(('uv', '--version'), 0, 'uv 0.9.17\n', '')
+        uv_probe = tools.Probe(tools.UV, Path('/usr/bin/uv'), 'uv 0.9.17')
 
         with (
-            mocks.patch('coppy.migrate.sub_run', return_value=uv_result) as m_uv_sub_run,
-            mocks.patch_obj(cli_mod, 'sub_run') as m_copier_sub_run,
+            mocks.patch('coppy.tools.probe', return_value=uv_probe) as m_uv_probe,
+            mocks.patch_obj(update_cmd, 'sub_run') as m_copier_sub_run,
         ):
             cli.invoke('update')
 
-        m_uv_sub_run.assert_called_once_with('uv', '--version', capture=True)
+        m_uv_probe.assert_called_once_with(tools.UV)
         m_copier_sub_run.assert_called_once_with(
             sys.executable,
             '-m',
@@ -129,23 +129,23 @@ class TestCoppyCLIUvVersion:
         uv_output: str,
         expected_error: str,
     ):
-        uv_result = subprocess.CompletedProcess(('uv', '--version'), 0, uv_output, '')
+        uv_probe = tools.Probe(tools.UV, Path('/usr/bin/uv'), uv_output.strip())
 
         with (
-            mocks.patch('coppy.migrate.sub_run', return_value=uv_result) as m_uv_sub_run,
-            mocks.patch_obj(cli_mod, 'sub_run') as m_copier_sub_run,
+            mocks.patch('coppy.tools.probe', return_value=uv_probe) as m_uv_probe,
+            mocks.patch_obj(update_cmd, 'sub_run') as m_copier_sub_run,
         ):
             result = cli.invoke('update', check=False)
 
         assert result.exit_code == 1
         assert result.output == f'Error: {expected_error}\n'
-        m_uv_sub_run.assert_called_once_with('uv', '--version', capture=True)
+        m_uv_probe.assert_called_once_with(tools.UV)
         m_copier_sub_run.assert_not_called()
 
 
 class TestCoppyMigrateCLI:
     def test_before(self, cli: CLIRunner):
-        with mocks.patch_obj(cli_mod, 'Migrator') as m_migrator:
+        with mocks.patch_obj(migrate_cmd, 'Migrator') as m_migrator:
             cli.invoke('migrate', 'before')
 
         m_migrator.assert_called_once_with(project_dpath=Path.cwd())
@@ -153,7 +153,7 @@ class TestCoppyMigrateCLI:
         m_migrator.return_value.after.assert_not_called()
 
     def test_after(self, cli: CLIRunner):
-        with mocks.patch_obj(cli_mod, 'Migrator') as m_migrator:
+        with mocks.patch_obj(migrate_cmd, 'Migrator') as m_migrator:
             cli.invoke('migrate', 'after')
 
         m_migrator.assert_called_once_with(project_dpath=Path.cwd())
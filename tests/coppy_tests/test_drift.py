@@ -0,0 +1,167 @@
+import json
+from pathlib import Path
+
+import copier
+import pytest
+
+from coppy import drift
+from coppy.answers import ANSWERS_FNAME
+from coppy.template_cache import TemplateCache
+from coppy.utils import sub_run
+
+from .libs.click import CLIRunner
+
+
+COPIER_YAML = f"""
+_answers_file: {ANSWERS_FNAME}
+_subdirectory: template
+
+name:
+  type: str
+  default: enterprise
+""".lstrip()
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Tests',
+        '-c',
+        'user.email=coppy-tests@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+@pytest.fixture()
+def template_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'template'
+    files = {
+        'copier.yaml': COPIER_YAML,
+        'template/{{ _copier_conf.answers_file }}.jinja': '{{ _copier_answers|to_nice_yaml }}',
+        'template/readme.md.jinja': '# {{ name }}\n',
+        'template/noxfile.py': 'import nox\n\n\n@nox.session\ndef tests(s):\n    s.run("pytest")\n',
+        'template/mise.toml': '[tools]\nuv = "latest"\n',
+        # Filled by the mise-lock migration
+        'template/mise.lock': '',
+    }
+    for rel_path, content in files.items():
+        dpath.joinpath(rel_path).parent.mkdir(parents=True, exist_ok=True)
+        dpath.joinpath(rel_path).write_text(content)
+    git(dpath, 'init')
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'template')
+    git(dpath, 'tag', 'v1.0.0')
+    # Drift is measured against the project's version, not the latest.
+    dpath.joinpath('template/mise.toml').write_text('[tools]\nuv = "0.9"\n')
+    git(dpath, 'commit', '--all', '-m', 'pin uv')
+    git(dpath, 'tag', 'v1.1.0')
+    return dpath
+
+
+@pytest.fixture()
+def cache(template_dpath: Path, tmp_path: Path) -> TemplateCache:
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+    return cache
+
+
+def generate(template_dpath: Path, dpath: Path) -> Path:
+    copier.run_copy(
+        template_dpath.as_posix(),
+        dpath,
+        {'name': 'Enterprise'},
+        defaults=True,
+        quiet=True,
+        vcs_ref='v1.0.0',
+    )
+    return dpath
+
+
+def test_clean(template_dpath: Path, cache: TemplateCache, tmp_path: Path):
+    project_dpath = generate(template_dpath, tmp_path / 'project')
+
+    result = drift.drift_project(project_dpath, cache)
+
+    assert (result.status, result.commit, result.files) == ('clean', 'v1.0.0', [])
+
+
+def test_filled_placeholder(template_dpath: Path, cache: TemplateCache, tmp_path: Path):
+    project_dpath = generate(template_dpath, tmp_path / 'project')
+    project_dpath.joinpath('mise.lock').write_text('[[tools.uv]]\nversion = "0.9.2"\n')
+
+    assert drift.drift_project(project_dpath, cache).status == 'clean'
+
+    project_dpath.joinpath('mise.lock').unlink()
+    result = drift.drift_project(project_dpath, cache)
+    assert [(file.path, file.status) for file in result.files] == [('mise.lock', 'missing')]
+
+
+def test_drifted(template_dpath: Path, cache: TemplateCache, tmp_path: Path):
+    project_dpath = generate(template_dpath, tmp_path / 'project')
+    noxfile_fpath = project_dpath / 'noxfile.py'
+    noxfile_fpath.write_text(
+        noxfile_fpath.read_text().replace('"pytest"', '"pytest", "-x"') + '\n# local\n',
+    )
+    project_dpath.joinpath('readme.md').unlink()
+    # Project files the template doesn't manage aren't drift.
+    project_dpath.joinpath('app.py').write_text('print()\n')
+
+    result = drift.drift_project(project_dpath, cache)
+
+    assert result.status == 'drifted'
+    assert [file.as_dict() for file in result.files] == [
+        {'path': 'noxfile.py', 'status': 'modified', 'added': 3, 'removed': 1},
+        {'path': 'readme.md', 'status': 'missing', 'added': None, 'removed': None},
+    ]
+    assert result.lines == 4
+
+
+def test_skipped_and_failed(cache: TemplateCache, tmp_path: Path):
+    no_answers = drift.drift_project(tmp_path, cache)
+    assert (no_answers.status, no_answers.message) == ('skipped', f'no {ANSWERS_FNAME}')
+
+    project_dpath = tmp_path / 'unknown-commit'
+    project_dpath.mkdir()
+    project_dpath.joinpath(ANSWERS_FNAME).write_text('_commit: v9.9.9\nname: x\n')
+    assert drift.drift_project(project_dpath, cache).status == 'failed'
+
+
+def test_render_failed(template_dpath: Path, tmp_path: Path):
+    broken_dpath = generate(template_dpath, tmp_path / 'broken')
+    project_dpath = generate(template_dpath, tmp_path / 'project')
+
+    # The broken project's version has a template Jinja can't parse.
+    template_dpath.joinpath('template/readme.md.jinja').write_text('# {{ name }\n')
+    git(template_dpath, 'commit', '--all', '-m', 'break readme')
+    git(template_dpath, 'tag', 'v1.2.0')
+    answers_fpath = broken_dpath / ANSWERS_FNAME
+    answers_fpath.write_text(answers_fpath.read_text().replace('v1.0.0', 'v1.2.0'))
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+
+    projects = [broken_dpath, project_dpath]
+    broken, clean = drift.drift_fleet(projects, jobs=2, caches=dict.fromkeys(projects, cache))
+
+    assert broken.status == 'failed'
+    assert broken.message.startswith('render failed: template/readme.md.jinja:1: ')
+    assert clean.status == 'clean'
+
+
+def test_cli(template_dpath: Path, tmp_path: Path, cli: CLIRunner):
+    clean_dpath = generate(template_dpath, tmp_path / 'clean')
+    drifted_dpath = generate(template_dpath, tmp_path / 'drifted')
+    drifted_dpath.joinpath('mise.toml').write_text('[tools]\nuv = "0.8"\n')
+
+    result = cli.invoke('drift', str(clean_dpath), str(drifted_dpath))
+    assert result.stdout.splitlines() == [
+        f'  1 files      2 lines  {drifted_dpath} (v1.0.0)',
+        '    modified +1 -1        mise.toml',
+        f'  0 files      0 lines  {clean_dpath} (v1.0.0)',
+    ]
+    assert result.stderr == '2 projects: 1 clean, 1 drifted, 0 skipped, 0 failed\n'
+
+    result = cli.invoke('drift', '--json', str(clean_dpath))
+    assert json.loads(result.stdout)['counts']['clean'] == 1
@@ -0,0 +1,56 @@
+import subprocess
+
+import pytest
+
+import coppy_extensions
+
+from .libs import mocks
+
+
+GIT_CONFIG = 'user.name=Global Picard\0core.editor=vim\0user.name=Picard\0user.email=jp@sf.space\0'
+
+
+@pytest.fixture(autouse=True)
+def git_config_cache():
+    coppy_extensions.git_config.cache_clear()
+    yield
+    coppy_extensions.git_config.cache_clear()
+
+
+@pytest.fixture()
+def m_run():
+    result = subprocess.CompletedProcess((), 0, GIT_CONFIG.replace('=', '\n'), '')
+    with (
+        mocks.environ(values={'GIT_AUTHOR_NAME': '', 'GIT_AUTHOR_EMAIL': ''}),
+        mocks.patch('coppy_extensions.subprocess.run', return_value=result) as m_run,
+    ):
+        yield m_run
+
+
+class TestGitIdentity:
+    def test_one_git_call(self, m_run):
+        assert coppy_extensions.git_user_name() == 'Picard'
+        assert coppy_extensions.git_user_email() == 'jp@sf.space'
+        assert coppy_extensions.git_user_name() == 'Picard'
+
+        m_run.assert_called_once_with(
+            ('git', 'config', '--list', '-z'),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    def test_env_override(self, m_run):
+        with mocks.environ(values={'GIT_AUTHOR_NAME': 'Riker', 'GIT_AUTHOR_EMAIL': 'wr@sf.space'}):
+            assert coppy_extensions.git_user_name() == 'Riker'
+            assert coppy_extensions.git_user_email() == 'wr@sf.space'
+
+        m_run.assert_not_called()
+
+    def test_git_missing(self):
+        with (
+            mocks.environ(values={'GIT_AUTHOR_NAME': '', 'GIT_AUTHOR_EMAIL': ''}),
+            mocks.patch('coppy_extensions.subprocess.run', side_effect=FileNotFoundError),
+        ):
+            assert coppy_extensions.git_user_name() == ''
+            assert coppy_extensions.git_user_email() == ''
@@ -0,0 +1,212 @@
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import click
+import pytest
+
+from coppy import fleet
+from coppy.commands import update as update_cmd
+from coppy.fleet import ProjectResult
+from coppy.utils import CalledProcessError, sub_run
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+def init_project(dpath: Path, *, answers=True, commit=True) -> Path:
+    dpath.mkdir(parents=True, exist_ok=True)
+    sub_run('git', 'init', cwd=dpath, capture=True)
+    sub_run('git', 'config', 'user.name', 'Coppy Tests', cwd=dpath)
+    sub_run('git', 'config', 'user.email', 'coppy-tests@example.com', cwd=dpath)
+    if answers:
+        dpath.joinpath('.copier-answers-py.yaml').write_text('_commit: v1.20260101.1\n')
+    if commit:
+        sub_run('git', 'add', '.', cwd=dpath)
+        sub_run('git', 'commit', '--allow-empty', '-m', 'initial', cwd=dpath, capture=True)
+    return dpath
+
+
+class TestFindProjects:
+    def test_dedupes_and_orders(self, tmp_path: Path):
+        a_dpath = tmp_path.joinpath('a')
+        b_dpath = tmp_path.joinpath('b')
+        a_dpath.mkdir()
+        b_dpath.mkdir()
+        tmp_path.joinpath('not-a-dir').write_text('')
+
+        projects = fleet.find_projects(
+            [b_dpath, a_dpath],
+            globs=[f'{tmp_path}/*'],
+        )
+
+        assert projects == [b_dpath, a_dpath]
+
+    def test_manifest(self, tmp_path: Path):
+        for name in ('a', 'b'):
+            tmp_path.joinpath(name).mkdir()
+        manifest_fpath = tmp_path / 'fleet.txt'
+        manifest_fpath.write_text(f'# The fleet\nb\n\n{tmp_path / "a"}  # absolute\n')
+
+        projects = fleet.find_projects(manifest_fpath=manifest_fpath)
+
+        assert projects == [tmp_path / 'b', tmp_path / 'a']
+
+    def test_manifest_missing(self, tmp_path: Path):
+        tmp_path.joinpath('a').mkdir()
+        manifest_fpath = tmp_path / 'fleet.txt'
+        manifest_fpath.write_text('a\ntypo\n')
+
+        with pytest.raises(click.UsageError) as exc_info:
+            fleet.find_projects(manifest_fpath=manifest_fpath)
+
+        assert exc_info.value.message == (
+            f'Not a directory, listed in {manifest_fpath}: {tmp_path / "typo"}'
+        )
+
+
+class TestSkipReason:
+    def test_clean(self, tmp_path: Path):
+        assert fleet.skip_reason(init_project(tmp_path)) is None
+
+    def test_dirty(self, tmp_path: Path):
+        init_project(tmp_path).joinpath('new.txt').write_text('')
+        assert fleet.skip_reason(tmp_path) == 'working tree is dirty'
+
+    def test_no_answers(self, tmp_path: Path):
+        assert fleet.skip_reason(init_project(tmp_path, answers=False)) == (
+            'no .copier-answers-py.yaml'
+        )
+
+    def test_not_git(self, tmp_path: Path):
+        tmp_path.joinpath('.copier-answers-py.yaml').write_text('')
+        assert fleet.skip_reason(tmp_path) == 'not a git repository'
+
+
+class TestUpdateProject:
+    def test_updated(self, tmp_path: Path):
+        init_project(tmp_path)
+        git_status = sub_run('git', 'status', '--porcelain', cwd=tmp_path, capture=True)
+        copier_result = subprocess.CompletedProcess(('copier',), 0, '', '')
+
+        with mocks.patch_obj(fleet, 'sub_run', side_effect=[git_status, copier_result]) as m_sub:
+            result = fleet.update_project(tmp_path, use_head=True)
+
+        assert result.status == 'updated'
+        assert result.duration > 0
+        # git status, then copier
+        assert m_sub.call_count == 2
+        m_sub.assert_called_with(
+            sys.executable,
+            '-m',
+            'copier',
+            'update',
+            '--answers-file',
+            '.copier-answers-py.yaml',
+            '--trust',
+            '--skip-answered',
+            '--defaults',
+            '--vcs-ref',
+            'HEAD',
+            tmp_path,
+            stream=True,
+            env=None,
+        )
+
+    def test_failed(self, tmp_path: Path):
+        init_project(tmp_path)
+        exc = CalledProcessError(1, ('copier',), '', 'noise\nConflict in pyproject.toml\n')
+
+        with (
+            mocks.patch_obj(fleet, 'skip_reason', return_value=None),
+            mocks.patch_obj(fleet, 'sub_run', side_effect=exc),
+        ):
+            result = fleet.update_project(tmp_path, use_head=False)
+
+        assert result == ProjectResult(
+            tmp_path,
+            'failed',
+            result.duration,
+            'Conflict in pyproject.toml',
+        )
+
+    def test_skipped_before_copier(self, tmp_path: Path):
+        init_project(tmp_path).joinpath('new.txt').write_text('')
+
+        with mocks.patch_obj(fleet, 'sub_run', side_effect=sub_run) as m_sub_run:
+            result = fleet.update_project(tmp_path, use_head=False)
+
+        assert result.status == 'skipped'
+        assert m_sub_run.call_count == 1
+
+
+class TestUpdateFleet:
+    def test_results_in_given_order(self, tmp_path: Path):
+        projects = [tmp_path / name for name in 'abc']
+        seen = []
+
+        def update_project(project_dpath, use_head, git_env):
+            status = 'skipped' if project_dpath.name == 'b' else 'updated'
+            return ProjectResult(project_dpath, status, 0.1)
+
+        with mocks.patch_obj(fleet, 'update_project', side_effect=update_project):
+            results = fleet.update_fleet(projects, use_head=False, jobs=2, on_result=seen.append)
+
+        assert [r.project_dpath for r in results] == projects
+        assert sorted(seen, key=lambda r: r.project_dpath) == results
+        assert fleet.summary(results, 1.5)['counts'] == {
+            'updated': 2,
+            'current': 0,
+            'skipped': 1,
+            'failed': 0,
+        }
+
+
+class TestFleetCLI:
+    @pytest.fixture(autouse=True)
+    def uv_version_check(self):
+        with mocks.patch_obj(update_cmd.UvVersion, 'check') as m_check:
+            yield m_check
+
+    @pytest.fixture()
+    def m_update_project(self):
+        def update_project(project_dpath, use_head, git_env):
+            status = 'failed' if project_dpath.name == 'c' else 'updated'
+            return ProjectResult(project_dpath, status, 0.5, 'boom' if status == 'failed' else '')
+
+        with mocks.patch_obj(fleet, 'update_project', side_effect=update_project) as m:
+            yield m
+
+    def test_json_summary(self, tmp_path: Path, cli: CLIRunner, m_update_project, uv_version_check):
+        for name in 'ab':
+            tmp_path.joinpath(name).mkdir()
+
+        result = cli.invoke('update', '--glob', f'{tmp_path}/*', '--json')
+
+        summary = json.loads(result.stdout)
+        assert summary['counts'] == {
+            'updated': 2,
+            'current': 0,
+            'skipped': 0,
+            'failed': 0,
+        }
+        assert [p['project'] for p in summary['projects']] == [
+            (tmp_path / 'a').as_posix(),
+            (tmp_path / 'b').as_posix(),
+        ]
+        uv_version_check.assert_called_once_with()
+        assert m_update_project.call_count == 2
+
+    def test_failure_exit_code(self, tmp_path: Path, cli: CLIRunner, m_update_project):
+        for name in 'bc':
+            tmp_path.joinpath(name).mkdir()
+
+        result = cli.invoke('update', str(tmp_path / 'b'), str(tmp_path / 'c'), check=False)
+
+        assert result.exit_code == 1
+        assert 'updated' in result.stdout
+        assert f'  failed     0.5s  {tmp_path / "c"}  boom' in result.stdout
+        assert '2 projects in ' in result.stdout
+        assert '1 updated, 0 current, 0 skipped, 1 failed' in result.stdout
+        assert 'Error: 1 project update(s) failed' in result.stderr
@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from coppy import hooks
+from coppy.hooks import HookEnv
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+PREK_TOML = """
+[[repos]]
+repo = 'https://github.com/pre-commit/pre-commit-hooks'
+rev = 'v6.0.0'
+hooks = [{{ id = 'check-yaml' }}, {{ id = 'end-of-file-fixer', exclude = 'tasks/version' }}]
+
+[[repos]]
+repo = 'https://github.com/astral-sh/ruff-pre-commit'
+rev = '{ruff_rev}'
+hooks = [{{ id = 'ruff' }}, {{ id = 'ruff-format', args = ['--check'] }}]
+
+[[repos]]
+repo = 'local'
+hooks = [{{ id = 'pytest', name = 'pytest', entry = 'pytest', language = 'system' }}]
+""".lstrip()
+
+
+def write_project(dpath: Path, ruff_rev: str = 'v0.16.2') -> Path:
+    dpath.mkdir(parents=True)
+    dpath.joinpath('prek.toml').write_text(PREK_TOML.format(ruff_rev=ruff_rev))
+    return dpath
+
+
+@pytest.fixture()
+def projects(tmp_path: Path) -> list[Path]:
+    return [
+        write_project(tmp_path / 'a'),
+        write_project(tmp_path / 'b'),
+        write_project(tmp_path / 'c', ruff_rev='v0.15.0'),
+    ]
+
+
+@pytest.fixture()
+def fake_prek(tmp_path: Path):
+    """A prek that saves the config it's given instead of building anything."""
+    saved_fpath = tmp_path / 'prek-config.yaml'
+    fpath = tmp_path / 'prek'
+    fpath.write_text(f'#!/bin/sh\ncp "$3" {saved_fpath}\necho "$1" > {saved_fpath}.cmd\n')
+    fpath.chmod(0o755)
+    with mocks.patch_obj(hooks.tools, 'find_prek', return_value=fpath.as_posix()):
+        yield saved_fpath
+
+
+def test_collect(projects: list[Path], tmp_path: Path):
+    no_config = tmp_path / 'd'
+    no_config.mkdir()
+
+    collected = hooks.collect([*projects, no_config])
+
+    assert collected.references == 6
+    assert collected.skipped == {no_config: 'no prek.toml'}
+    assert [(repo.repo.rsplit('/', 1)[-1], repo.rev) for repo in collected.repos.values()] == [
+        ('pre-commit-hooks', 'v6.0.0'),
+        ('ruff-pre-commit', 'v0.16.2'),
+        ('ruff-pre-commit', 'v0.15.0'),
+    ]
+    pre_commit_hooks = next(iter(collected.repos.values()))
+    assert pre_commit_hooks.projects == projects
+    # Only what changes the environment is kept
+    assert pre_commit_hooks.hooks == {HookEnv('check-yaml'), HookEnv('end-of-file-fixer')}
+
+
+def test_hook_env_variants(tmp_path: Path):
+    dpath = tmp_path / 'project'
+    dpath.mkdir()
+    dpath.joinpath('prek.toml').write_text(
+        """
+[[repos]]
+repo = 'https://github.com/pre-commit/mirrors-mypy'
+rev = 'v1.0.0'
+hooks = [
+  { id = 'mypy' },
+  { id = 'mypy', additional_dependencies = ['types-requests'], language_version = '3.12' },
+]
+""",
+    )
+
+    (repo,) = hooks.collect([dpath]).repos.values()
+
+    assert repo.as_config()['hooks'] == [
+        {'id': 'mypy'},
+        {'id': 'mypy', 'additional_dependencies': ['types-requests'], 'language_version': '3.12'},
+    ]
+
+
+def test_warm(projects: list[Path], fake_prek: Path):
+    hooks.warm(hooks.collect(projects).repos.values())
+
+    assert fake_prek.with_suffix('.yaml.cmd').read_text() == 'install-hooks\n'
+    config = yaml.safe_load(fake_prek.read_text())
+    assert [(repo['repo'].rsplit('/', 1)[-1], repo['rev']) for repo in config['repos']] == [
+        ('ruff-pre-commit', 'v0.15.0'),
+        ('ruff-pre-commit', 'v0.16.2'),
+        ('pre-commit-hooks', 'v6.0.0'),
+    ]
+    assert config['repos'][1]['hooks'] == [{'id': 'ruff'}, {'id': 'ruff-format'}]
+
+
+def test_cli(projects: list[Path], fake_prek: Path, cli: CLIRunner):
+    result = cli.invoke('hooks', 'warm', '--dry-run', *map(str, projects))
+    assert 'https://github.com/astral-sh/ruff-pre-commit@v0.16.2  2 projects\n' in result.stdout
+    assert '3 unique hook repos from 6 references in 3 projects' in result.stderr
+    assert not fake_prek.exists()
+
+    result = cli.invoke('hooks', 'warm', '--json', *map(str, projects))
+    assert json.loads(result.stdout)['references'] == 6
+    assert fake_prek.exists()
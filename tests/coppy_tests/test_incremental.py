@@ -0,0 +1,241 @@
+from pathlib import Path
+import shutil
+
+import copier
+import pytest
+
+from coppy import incremental
+from coppy.answers import ANSWERS_FNAME
+from coppy.commands import update as update_cmd
+from coppy.template_cache import TemplateCache
+from coppy.utils import sub_run
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+COPIER_YAML = f"""
+_answers_file: {ANSWERS_FNAME}
+_subdirectory: template
+
+name:
+  type: str
+  default: enterprise
+""".lstrip()
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Tests',
+        '-c',
+        'user.email=coppy-tests@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+def commit(dpath: Path, files: dict[str, str | None], tag: str | None = None):
+    for rel_path, content in files.items():
+        fpath = dpath / rel_path
+        if content is None:
+            fpath.unlink()
+            continue
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.write_text(content)
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'change')
+    if tag:
+        git(dpath, 'tag', tag)
+
+
+def read_tree(dpath: Path) -> dict[str, str]:
+    return {
+        fpath.relative_to(dpath).as_posix(): fpath.read_text()
+        for fpath in dpath.rglob('*')
+        if fpath.is_file() and '.git' not in fpath.relative_to(dpath).parts
+    }
+
+
+@pytest.fixture()
+def template_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'template'
+    dpath.mkdir()
+    git(dpath, 'init')
+    commit(
+        dpath,
+        {
+            'copier.yaml': COPIER_YAML,
+            'template/{{ _copier_conf.answers_file }}.jinja': '{{ _copier_answers|to_nice_yaml }}',
+            'template/readme.md.jinja': '# {{ name }}\n',
+            'template/config.txt': 'a\nb\nc\nd\ne\n',
+            'template/old.txt': 'old\n',
+            'template/same.txt.jinja': '{{ name }} stays\n',
+        },
+        tag='v1.0.0',
+    )
+    return dpath
+
+
+@pytest.fixture()
+def project_dpath(template_dpath: Path, tmp_path: Path) -> Path:
+    dpath = tmp_path / 'project'
+    copier.run_copy(
+        template_dpath.as_posix(),
+        dpath,
+        {'name': 'Enterprise'},
+        defaults=True,
+        quiet=True,
+    )
+    git(dpath, 'init')
+    # A populated lock file means the mise-lock migration has nothing to do.
+    commit(dpath, {'config.txt': 'a\nb\nc\nd\nE\n', 'mise.lock': '# locked\n'})
+    return dpath
+
+
+@pytest.fixture()
+def cache(template_dpath: Path, tmp_path: Path) -> TemplateCache:
+    return TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+
+
+def release(template_dpath: Path, cache: TemplateCache, files: dict[str, str | None]):
+    commit(template_dpath, files, tag='v2.0.0')
+    cache.refresh()
+
+
+def test_matches_copier_update(
+    template_dpath: Path,
+    project_dpath: Path,
+    cache: TemplateCache,
+    tmp_path: Path,
+):
+    release(
+        template_dpath,
+        cache,
+        {
+            'template/readme.md.jinja': '# {{ name }}\n\nMore\n',
+            'template/config.txt': 'A\nb\nc\nd\ne\n',
+            'template/old.txt': None,
+            'template/new.txt': 'new\n',
+        },
+    )
+    copier_dpath = tmp_path / 'copier-project'
+    shutil.copytree(project_dpath, copier_dpath)
+    copier.run_update(
+        copier_dpath,
+        answers_file=ANSWERS_FNAME,
+        defaults=True,
+        overwrite=True,
+        quiet=True,
+    )
+
+    result = incremental.update_project(project_dpath, cache, use_head=False)
+
+    assert result.status == 'updated'
+    # The answers file plus the four files the release changed, not same.txt
+    assert result.message == 'incremental: 5 template files, 5 changed'
+    assert read_tree(project_dpath) == read_tree(copier_dpath)
+
+
+def test_changed_include(template_dpath: Path, tmp_path: Path, cache: TemplateCache):
+    commit(
+        template_dpath,
+        {
+            'includes/footer.jinja': 'Made by {{ name }}\n',
+            'template/notice.txt.jinja': '{% include "includes/footer.jinja" %}',
+        },
+        tag='v1.1.0',
+    )
+    project_dpath = tmp_path / 'project'
+    copier.run_copy(template_dpath.as_posix(), project_dpath, defaults=True, quiet=True)
+    git(project_dpath, 'init')
+    commit(project_dpath, {'mise.lock': '# locked\n'})
+    release(template_dpath, cache, {'includes/footer.jinja': 'Maintained by {{ name }}\n'})
+
+    result = incremental.update_project(project_dpath, cache, use_head=False)
+
+    # The answers file and notice.txt, which only changed through its include
+    assert result.message == 'incremental: 2 template files, 2 changed'
+    assert project_dpath.joinpath('notice.txt').read_text() == 'Maintained by enterprise\n'
+
+
+def test_render_failed(template_dpath: Path, project_dpath: Path, cache: TemplateCache):
+    release(template_dpath, cache, {'template/readme.md.jinja': '# {{ name }\n'})
+
+    assert incremental.update_project(project_dpath, cache, use_head=False) is None
+    assert git(project_dpath, 'status', '--porcelain') == ''
+
+
+def test_current(project_dpath: Path, cache: TemplateCache):
+    cache.refresh()
+
+    result = incremental.update_project(project_dpath, cache, use_head=False)
+
+    assert (result.status, result.message) == ('current', 'already current')
+
+
+def test_full_update_needed(template_dpath: Path, project_dpath: Path, cache: TemplateCache):
+    release(template_dpath, cache, {'copier.yaml': COPIER_YAML + '\nextra:\n  default: 1\n'})
+
+    assert incremental.update_project(project_dpath, cache, use_head=False) is None
+    assert git(project_dpath, 'status', '--porcelain') == ''
+
+
+def test_migration_needs_full_update(
+    template_dpath: Path,
+    project_dpath: Path,
+    cache: TemplateCache,
+):
+    release(template_dpath, cache, {'template/readme.md.jinja': '# {{ name }}!\n'})
+    commit(project_dpath, {'mise.lock': None})
+
+    assert incremental.update_project(project_dpath, cache, use_head=False) is None
+
+
+def test_cli_falls_back(
+    template_dpath: Path,
+    project_dpath: Path,
+    tmp_path: Path,
+    cli: CLIRunner,
+):
+    ok_dpath = tmp_path / 'ok'
+    shutil.copytree(project_dpath, ok_dpath)
+    commit(project_dpath, {'mise.lock': None})
+    commit(template_dpath, {'template/readme.md.jinja': '# {{ name }}!\n'}, tag='v2.0.0')
+
+    with (
+        mocks.patch_obj(update_cmd.UvVersion, 'check'),
+        mocks.patch_obj(update_cmd.fleet, 'update_project') as m_update_project,
+    ):
+        m_update_project.side_effect = lambda project_dpath, use_head, git_env: (
+            update_cmd.fleet.ProjectResult(project_dpath, 'updated', 0.1)
+        )
+        result = cli.invoke('update', '--incremental', str(project_dpath), str(ok_dpath))
+
+    assert 'incremental: 2 template files, 2 changed' in result.stdout
+    assert '2 projects in ' in result.stdout
+    # Only the project missing its lock file had copier update it.
+    assert [call.args[0] for call in m_update_project.call_args_list] == [project_dpath]
+    assert ok_dpath.joinpath('readme.md').read_text() == '# Enterprise!\n'
+
+    result = cli.invoke('update', '--incremental', '--no-cache', str(ok_dpath), check=False)
+    assert result.exit_code == 2
+
+
+def test_cli_single_project(project_dpath: Path, cli: CLIRunner):
+    with (
+        mocks.patch_obj(update_cmd.UvVersion, 'check'),
+        mocks.patch_obj(update_cmd.verify_cmd, 'verify_projects') as m_verify_projects,
+    ):
+        # Already current isn't an update, so there's nothing to verify.
+        result = cli.invoke('update', '--incremental', '--verify', str(project_dpath))
+        assert 'already current' in result.stdout
+        assert not m_verify_projects.called
+
+        # Skipped fails like copier refusing to update a dirty project.
+        project_dpath.joinpath('readme.md').write_text('dirty\n')
+        result = cli.invoke('update', '--incremental', str(project_dpath), check=False)
+        assert result.exit_code == 1
+        assert 'project update skipped: working tree is dirty' in result.stderr
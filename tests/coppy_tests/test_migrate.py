@@ -5,8 +5,18 @@ import click
 import pytest
 import yaml
 
-from coppy import utils
-from coppy.migrate import Migrator, UvVersion
+from coppy import tools, utils
+from coppy.migrate import (
+    MISE_LOCK,
+    PREK_CONFIG,
+    Migration,
+    MigrationLog,
+    Migrator,
+    UvVersion,
+    git_hooks_dpath,
+    parse_version,
+    template_versions,
+)
 from coppy.utils import sub_run
 
 from .libs import mocks
@@ -72,18 +82,172 @@ class TestUvVersion:
 
         assert exc_info.value.message == f'Could not determine uv version from: {uv_output}'
 
-    def test_sub_run_uv_call(self):
+    def test_probes_uv(self):
         """
-        The tests above all use uv_output to bypass sub_run().
+        The tests above all use uv_output to bypass the uv probe.
 
-        This test checks to make sure sub_run() is used to call uv correctly.
+        This test checks to make sure the (cached) tool probe is used to get uv's version.
         """
-        result = subprocess.CompletedProcess(('uv', '--version'), 0, 'uv 0.9.17\n', '')
+        probe = tools.Probe(tools.UV, Path('/usr/bin/uv'), 'uv 0.9.17')
 
-        with mocks.patch('coppy.migrate.sub_run', return_value=result) as m_sub_run:
+        with mocks.patch('coppy.tools.probe', return_value=probe) as m_probe:
             UvVersion.check()
 
-        m_sub_run.assert_called_once_with('uv', '--version', capture=True)
+        m_probe.assert_called_once_with(tools.UV)
+
+    def test_uv_missing(self):
+        with (
+            mocks.patch('coppy.tools.probe', return_value=tools.Probe(tools.UV, None)),
+            pytest.raises(click.ClickException) as exc_info,
+        ):
+            UvVersion.check()
+
+        assert exc_info.value.message == 'uv not found.  Install uv then retry `coppy update`.'
+
+
+class TestMigrationRegistry:
+    @pytest.mark.parametrize(
+        ('text', 'version'),
+        [
+            ('v1.20260813.1', (1, 20260813, 1)),
+            ('1.20260813.1', (1, 20260813, 1)),
+            ('1.20260813.1.post2.dev0+g1234567', (1, 20260813, 1)),
+            ('abc1234', None),
+            ('', None),
+            (None, None),
+        ],
+    )
+    def test_parse_version(self, text: str | None, version: tuple | None):
+        assert parse_version(text) == version
+
+    @pytest.mark.parametrize(
+        ('from_version', 'to_version', 'applies'),
+        [
+            ((1, 1), (1, 3), True),
+            ((1, 1), (1, 2), True),
+            ((1, 2), (1, 3), False),
+            ((1, 3), (1, 4), False),
+            ((1, 0), (1, 1), False),
+            (None, (1, 3), True),
+            ((1, 1), None, True),
+            (None, None, True),
+        ],
+    )
+    def test_applies_in_range(self, from_version, to_version, applies: bool):
+        migration = Migration('test', introduced=(1, 2))
+        assert migration.applies(from_version, to_version) is applies
+
+    def test_unversioned_always_applies(self):
+        assert Migration('test').applies((9, 9), (9, 9))
+
+    def test_versions_from_copier_env(self, tmp_path: Path):
+        tmp_path.joinpath('.copier-answers-py.yaml').write_text('_commit: v1.20260101.1\n')
+        env = {
+            'VERSION_FROM': 'v1.20260201.1',
+            'VERSION_PEP440_FROM': '1.20260201.1',
+            'VERSION_PEP440_TO': '1.20260301.1',
+        }
+
+        with mocks.environ(values=env):
+            assert template_versions(tmp_path) == ((1, 20260201, 1), (1, 20260301, 1))
+
+    def test_versions_from_answers(self, tmp_path: Path):
+        tmp_path.joinpath('.copier-answers-py.yaml').write_text('_commit: v1.20260101.1\n')
+        assert template_versions(tmp_path) == ((1, 20260101, 1), None)
+
+    def test_skips_prek_conversion_outside_range(self, tmp_path: Path):
+        (tmp_path / '.pre-commit-config.yaml').write_text(PRE_COMMIT_CONFIG)
+        env = {'VERSION_PEP440_FROM': '1.20260812.1', 'VERSION_PEP440_TO': '1.20260813.1'}
+
+        with mocks.environ(values=env), mocks.patch('coppy.migrate.sub_run') as m_sub_run:
+            Migrator(tmp_path, mise_lock=False).before()
+
+        m_sub_run.assert_not_called()
+        assert not (tmp_path / '.coppy-prek.toml').exists()
+
+    def test_records_completed(self, tmp_path: Path):
+        sub_run('git', 'init', cwd=tmp_path, capture=True)
+        (tmp_path / 'mise.lock').write_text('locked\n')
+
+        with mocks.environ(values={'VERSION_PEP440_TO': '1.20260813.1'}):
+            Migrator(tmp_path).after()
+
+        completed = MigrationLog.for_project(tmp_path).completed()
+        assert set(completed) == {PREK_CONFIG.name, MISE_LOCK.name}
+        assert completed[MISE_LOCK.name]['template_version'] == '1.20260813.1'
+
+        # mise.lock is blank again but the migration already ran.
+        (tmp_path / 'mise.lock').write_text('')
+        with mocks.patch('coppy.migrate.sub_run') as m_sub_run:
+            migrator = Migrator(tmp_path)
+            migrator.after()
+
+        m_sub_run.assert_not_called()
+        assert not migrator.pending(MISE_LOCK)
+
+    def test_failed_mise_lock_not_recorded(self, tmp_path: Path):
+        sub_run('git', 'init', cwd=tmp_path, capture=True)
+
+        with mocks.patch('coppy.migrate.sub_run') as m_sub_run:
+            m_sub_run.return_value = subprocess.CompletedProcess(('mise', 'lock'), 1, '', '')
+            Migrator(tmp_path).after()
+
+        assert MISE_LOCK.name not in MigrationLog.for_project(tmp_path).completed()
+
+    def test_log_without_git(self, tmp_path: Path):
+        log = MigrationLog.for_project(tmp_path)
+
+        log.record([MISE_LOCK], None)
+
+        assert log.fpath is None
+        assert log.completed() == {}
+
+
+class TestGitHooksDpath:
+    def git_hooks_path(self, project_dpath: Path) -> Path:
+        result = sub_run('git', 'rev-parse', '--git-path', 'hooks', cwd=project_dpath, capture=True)
+        return (project_dpath / result.stdout.strip()).resolve()
+
+    def test_repo(self, tmp_path: Path):
+        sub_run('git', 'init', cwd=tmp_path, capture=True)
+        tmp_path.joinpath('pkg').mkdir()
+
+        assert git_hooks_dpath(tmp_path) == self.git_hooks_path(tmp_path)
+        assert git_hooks_dpath(tmp_path / 'pkg') == self.git_hooks_path(tmp_path)
+
+    def test_worktree_uses_common_hooks(self, tmp_path: Path):
+        repo_dpath = tmp_path / 'repo'
+        repo_dpath.mkdir()
+        sub_run('git', 'init', cwd=repo_dpath, capture=True)
+        sub_run(
+            'git',
+            '-c',
+            'user.name=Coppy Tests',
+            '-c',
+            'user.email=coppy-tests@example.com',
+            'commit',
+            '--allow-empty',
+            '-m',
+            'initial',
+            cwd=repo_dpath,
+            capture=True,
+        )
+        wt_dpath = tmp_path / 'wt'
+        sub_run('git', 'worktree', 'add', wt_dpath, cwd=repo_dpath, capture=True)
+
+        assert git_hooks_dpath(wt_dpath) == repo_dpath / '.git/hooks'
+        assert git_hooks_dpath(wt_dpath) == self.git_hooks_path(wt_dpath)
+
+    def test_hooks_path_config_defers_to_git(self, tmp_path: Path):
+        sub_run('git', 'init', cwd=tmp_path, capture=True)
+        sub_run('git', 'config', 'core.hooksPath', 'my-hooks', cwd=tmp_path)
+
+        assert git_hooks_dpath(tmp_path) is None
+        assert Migrator(tmp_path).pre_commit_hook_fpath() == tmp_path / 'my-hooks/pre-commit'
+
+    def test_not_a_repo(self, tmp_path: Path):
+        assert git_hooks_dpath(tmp_path) is None
+        assert Migrator(tmp_path).pre_commit_hook_fpath() is None
 
 
 class TestMigrate:
@@ -317,29 +481,63 @@ repo = 'https://example.com/custom-hooks'
         assert '`mise lock` failed with exit code 1' in out.err
         assert 'boom' in out.err
 
-    def test_after_runs_prek_install_before_failed_mise_lock(self, project_dpath: Path, capsys):
+    def test_after_runs_prek_install_despite_failed_mise_lock(self, project_dpath: Path, capsys):
         hook_fpath = project_dpath / '.git/hooks/pre-commit'
         hook_fpath.parent.mkdir(parents=True, exist_ok=True)
         hook_fpath.write_text('#!/bin/sh\n')
         (project_dpath / '.coppy-prek.toml').write_text('repos = []\n')
         migrator = Migrator(project_dpath)
 
+        def fake_sub_run(*args, **kwargs):
+            returncode = 1 if args == ('mise', 'lock') else 0
+            return subprocess.CompletedProcess(args, returncode, '', 'boom\n')
+
         with (
             mocks.patch_obj(Migrator, 'pre_commit_hook_fpath', return_value=hook_fpath),
-            mocks.patch('coppy.migrate.sub_run') as m_sub_run,
+            mocks.patch('coppy.migrate.sub_run', side_effect=fake_sub_run) as m_sub_run,
         ):
-            m_sub_run.side_effect = [
-                subprocess.CompletedProcess((migrator.python_executable, '-m', 'prek'), 0, '', ''),
-                subprocess.CompletedProcess(('mise', 'lock'), 1, '', 'boom\n'),
-            ]
-
             migrator.after()
 
         assert (project_dpath / 'prek.toml').exists()
         out = capsys.readouterr()
         assert '`mise lock` failed with exit code 1' in out.err
-        assert m_sub_run.call_args_list[0].args[1:4] == ('-m', 'prek', 'install')
-        assert m_sub_run.call_args_list[1].args == ('mise', 'lock')
+        # The steps run concurrently, so don't depend on their order.
+        commands = sorted(call.args[-4:] for call in m_sub_run.call_args_list)
+        assert commands == [('install', '-f', '-t', 'pre-commit'), ('mise', 'lock')]
+        assert set(migrator.durations) == {'prek install', 'mise lock'}
+        assert '`prek install` finished in ' in out.out
+        assert '`mise lock` finished in ' in out.out
+
+    def test_after_without_work_runs_nothing(self, project_dpath: Path, capsys):
+        self.write_mise_lock(project_dpath)
+
+        with mocks.patch('coppy.migrate.sub_run') as m_sub_run:
+            migrator = Migrator(project_dpath)
+            migrator.after()
+
+        m_sub_run.assert_not_called()
+        assert migrator.durations == {}
+        assert capsys.readouterr().out == ''
+
+    def test_runs_prek_binary(self, project_dpath: Path):
+        self.write_pre_commit_config(project_dpath)
+
+        with mocks.patch('coppy.migrate.sub_run') as m_sub_run:
+            Migrator(project_dpath).before()
+
+        assert m_sub_run.call_args.args[:3] == (tools.find_prek(), 'util', 'yaml-to-toml')
+
+    def test_runs_prek_module_without_binary(self, project_dpath: Path):
+        self.write_pre_commit_config(project_dpath)
+
+        with (
+            mocks.patch('coppy.tools.find_prek', return_value=None),
+            mocks.patch('coppy.migrate.sub_run') as m_sub_run,
+        ):
+            migrator = Migrator(project_dpath)
+            migrator.before()
+
+        assert m_sub_run.call_args.args[:4] == (migrator.python_executable, '-m', 'prek', 'util')
 
     def test_copier_wires_hidden_migrate_commands(self):
         copier_cfg = yaml.safe_load((utils.pkg_dpath / 'copier.yaml').read_text())
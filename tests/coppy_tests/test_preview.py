@@ -0,0 +1,196 @@
+import json
+from pathlib import Path
+
+import copier
+import pytest
+
+from coppy import preview
+from coppy.answers import ANSWERS_FNAME
+from coppy.template_cache import TemplateCache
+from coppy.utils import sub_run
+
+from .libs.click import CLIRunner
+
+
+COPIER_YAML = f"""
+_answers_file: {ANSWERS_FNAME}
+_subdirectory: template
+
+name:
+  type: str
+  default: enterprise
+""".lstrip()
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Tests',
+        '-c',
+        'user.email=coppy-tests@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+def write(dpath: Path, files: dict[str, str | None]):
+    for rel_path, content in files.items():
+        fpath = dpath / rel_path
+        if content is None:
+            fpath.unlink()
+            continue
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.write_text(content)
+
+
+def commit(dpath: Path, files: dict[str, str | None], tag: str | None = None):
+    write(dpath, files)
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'change')
+    if tag:
+        git(dpath, 'tag', tag)
+
+
+@pytest.fixture()
+def template_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'template'
+    dpath.mkdir()
+    git(dpath, 'init')
+    commit(
+        dpath,
+        {
+            'copier.yaml': COPIER_YAML,
+            'template/{{ _copier_conf.answers_file }}.jinja': '{{ _copier_answers|to_nice_yaml }}',
+            'template/readme.md.jinja': '# {{ name }}\n',
+            'template/config.txt': 'a\nb\nc\nd\ne\n',
+            'template/old.txt': 'old\n',
+            'template/edited.txt': 'one\n',
+        },
+        tag='v1.0.0',
+    )
+    return dpath
+
+
+@pytest.fixture()
+def project_dpath(template_dpath: Path, tmp_path: Path) -> Path:
+    dpath = tmp_path / 'project'
+    copier.run_copy(
+        template_dpath.as_posix(),
+        dpath,
+        {'name': 'Enterprise'},
+        defaults=True,
+        quiet=True,
+    )
+    git(dpath, 'init')
+    # The project's own edits: one the template's change merges with and one it conflicts with.
+    commit(dpath, {'config.txt': 'a\nb\nc\nd\nE\n', 'edited.txt': 'project\n'})
+    return dpath
+
+
+def test_preview_matches_copier_update(template_dpath: Path, project_dpath: Path, tmp_path: Path):
+    commit(
+        template_dpath,
+        {
+            'template/readme.md.jinja': '# {{ name }}\n\nMore\n',
+            'template/config.txt': 'A\nb\nc\nd\ne\n',
+            'template/old.txt': None,
+            'template/new.txt': 'new\n',
+            'template/edited.txt': 'template\n',
+        },
+        tag='v2.0.0',
+    )
+    before = sub_run('git', 'status', '--porcelain', cwd=project_dpath, capture=True).stdout
+
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+    (result,) = preview.preview_fleet(
+        [project_dpath],
+        use_head=False,
+        caches={project_dpath: cache},
+    )
+
+    assert (result.status, result.from_ref, result.to_ref) == ('changes', 'v1.0.0', 'v2.0.0')
+    changes = {change.path: change for change in result.changes}
+    assert {path: change.status for path, change in changes.items()} == {
+        ANSWERS_FNAME: 'modified',
+        'config.txt': 'modified',
+        'edited.txt': 'conflict',
+        'new.txt': 'added',
+        'old.txt': 'deleted',
+        'readme.md': 'modified',
+    }
+    assert '+\n+More\n' in changes['readme.md'].diff
+    # Nothing in the project was touched.
+    assert sub_run('git', 'status', '--porcelain', cwd=project_dpath, capture=True).stdout == before
+
+    copier.run_update(
+        project_dpath,
+        answers_file=ANSWERS_FNAME,
+        defaults=True,
+        overwrite=True,
+        unsafe=True,
+        quiet=True,
+    )
+
+    for path, change in changes.items():
+        if change.status == 'conflict':
+            continue
+        fpath = project_dpath / path
+        if change.after is None:
+            assert not fpath.exists()
+        else:
+            assert fpath.read_text() == change.after, path
+
+
+def test_current(template_dpath: Path, project_dpath: Path, tmp_path: Path):
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+
+    (result,) = preview.preview_fleet(
+        [project_dpath],
+        use_head=False,
+        caches={project_dpath: cache},
+    )
+
+    assert result.status == 'current'
+    assert result.changes == []
+
+
+def test_skipped_and_failed(tmp_path: Path):
+    broken_dpath = tmp_path / 'broken'
+    broken_dpath.mkdir()
+    broken_dpath.joinpath(ANSWERS_FNAME).write_text('_src_path: /nope\n')
+
+    results = preview.preview_fleet([tmp_path, broken_dpath], use_head=False, caches={})
+
+    assert [(result.status, result.message) for result in results] == [
+        ('skipped', f'no {ANSWERS_FNAME}'),
+        ('failed', 'template cache unavailable'),
+    ]
+
+
+def test_render_failed(template_dpath: Path, project_dpath: Path, tmp_path: Path):
+    commit(template_dpath, {'template/readme.md.jinja': '# {{ name }\n'}, tag='v2.0.0')
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+
+    caches = {project_dpath: cache}
+    (result,) = preview.preview_fleet([project_dpath], use_head=False, caches=caches)
+
+    assert (result.status, result.from_ref, result.to_ref) == ('failed', 'v1.0.0', 'v2.0.0')
+    assert result.message == "render failed: template/readme.md.jinja:1: unexpected '}'"
+
+
+def test_cli(template_dpath: Path, project_dpath: Path, cli: CLIRunner):
+    commit(template_dpath, {'template/new.txt': 'new\n'}, tag='v2.0.0')
+
+    result = cli.invoke('update', '--dry-run', str(project_dpath))
+    assert '--- /dev/null\n+++ b/new.txt\n@@ -0,0 +1 @@\n+new\n' in result.stdout
+
+    result = cli.invoke('update', '--dry-run', '--json', str(project_dpath))
+    summary = json.loads(result.stdout)
+    assert summary['counts']['changes'] == 1
+    assert {'path': 'new.txt', 'status': 'added'} in summary['projects'][0]['files']
+    assert not project_dpath.joinpath('new.txt').exists()
@@ -0,0 +1,183 @@
+import json
+from pathlib import Path
+
+import copier
+import pytest
+
+from coppy import reanswer
+from coppy.answers import ANSWERS_FNAME
+from coppy.template_cache import TemplateCache
+from coppy.utils import sub_run
+
+from .libs.click import CLIRunner
+
+
+COPIER_YAML = f"""
+_answers_file: {ANSWERS_FNAME}
+_subdirectory: template
+
+name:
+  type: str
+  default: enterprise
+
+use_lint:
+  type: bool
+  default: true
+""".lstrip()
+
+TEMPLATE_FILES = {
+    'copier.yaml': COPIER_YAML,
+    'template/{{ _copier_conf.answers_file }}.jinja': '{{ _copier_answers|to_nice_yaml }}',
+    'template/readme.md.jinja': '# {{ name }}\n',
+    'template/{% if use_lint %}lint.toml{% endif %}': 'strict = true\n',
+    'template/mise.toml.jinja': (
+        '[tools]\nuv = "latest"\n{% if use_lint %}ruff = "latest"\n{% endif %}\n[tasks]\n'
+    ),
+}
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Tests',
+        '-c',
+        'user.email=coppy-tests@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+@pytest.fixture()
+def template_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'template'
+    for rel_path, content in TEMPLATE_FILES.items():
+        dpath.joinpath(rel_path).parent.mkdir(parents=True, exist_ok=True)
+        dpath.joinpath(rel_path).write_text(content)
+    git(dpath, 'init')
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'template')
+    git(dpath, 'tag', 'v1.0.0')
+    return dpath
+
+
+@pytest.fixture()
+def cache(template_dpath: Path, tmp_path: Path) -> TemplateCache:
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+    return cache
+
+
+def generate(template_dpath: Path, dpath: Path, **answers) -> Path:
+    copier.run_copy(
+        template_dpath.as_posix(),
+        dpath,
+        {'name': 'Enterprise'} | answers,
+        defaults=True,
+        quiet=True,
+    )
+    return dpath
+
+
+@pytest.fixture()
+def project_dpath(template_dpath: Path, tmp_path: Path) -> Path:
+    dpath = generate(template_dpath, tmp_path / 'project')
+    # Local edits: one next to the answer's change and one in a file it doesn't affect.
+    mise_fpath = dpath / 'mise.toml'
+    mise_fpath.write_text(mise_fpath.read_text() + 'test = "pytest"\n')
+    dpath.joinpath('readme.md').write_text('# Enterprise\n\nOurs\n')
+    git(dpath, 'init')
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'generated')
+    return dpath
+
+
+def test_parse_answers():
+    assert reanswer.parse_answers(['use_lint=false', 'name=a=b']) == {
+        'use_lint': 'false',
+        'name': 'a=b',
+    }
+    with pytest.raises(ValueError, match='Expected NAME=VALUE: use_lint'):
+        reanswer.parse_answers(['use_lint'])
+
+
+def test_matches_copier(
+    template_dpath: Path,
+    project_dpath: Path,
+    cache: TemplateCache,
+    tmp_path: Path,
+):
+    result = reanswer.reanswer_project(project_dpath, cache, {'use_lint': 'false'})
+
+    assert (result.status, result.message) == ('changed', '')
+    assert {change.path: change.status for change in result.changes} == {
+        ANSWERS_FNAME: 'modified',
+        'lint.toml': 'deleted',
+        'mise.toml': 'modified',
+    }
+    # Only the files that use the answer were rendered.
+    assert result.rendered == 3
+
+    expected_dpath = generate(template_dpath, tmp_path / 'expected', use_lint=False)
+    for fname in (ANSWERS_FNAME, 'mise.toml'):
+        expected = expected_dpath.joinpath(fname).read_text()
+        if fname == 'mise.toml':
+            expected += 'test = "pytest"\n'
+        assert project_dpath.joinpath(fname).read_text() == expected
+    assert not project_dpath.joinpath('lint.toml').exists()
+    assert project_dpath.joinpath('readme.md').read_text() == '# Enterprise\n\nOurs\n'
+
+    # Already answered
+    git(project_dpath, 'commit', '--all', '-m', 'no lint')
+    assert reanswer.reanswer_project(project_dpath, cache, {'use_lint': 'no'}).status == 'current'
+
+
+def test_skipped_and_failed(project_dpath: Path, cache: TemplateCache):
+    result = reanswer.reanswer_project(project_dpath, cache, {'nope': '1'})
+    assert (result.status, result.message) == ('failed', 'unknown question(s): nope')
+
+    project_dpath.joinpath('readme.md').write_text('dirty\n')
+    result = reanswer.reanswer_project(project_dpath, cache, {'use_lint': 'false'})
+    assert (result.status, result.message) == ('skipped', 'working tree is dirty')
+
+    # Dry runs only read the project.
+    result = reanswer.reanswer_project(project_dpath, cache, {'use_lint': 'false'}, dry_run=True)
+    assert result.status == 'changed'
+    assert project_dpath.joinpath('lint.toml').exists()
+
+
+def test_render_failed(template_dpath: Path, tmp_path: Path):
+    # Only renders with the new answer fail.
+    mise_fpath = template_dpath / 'template/mise.toml.jinja'
+    broken = '{% if not use_lint %}{{ nope.attr }}{% endif %}'
+    mise_fpath.write_text(mise_fpath.read_text() + broken)
+    git(template_dpath, 'commit', '--all', '-m', 'break mise.toml')
+    git(template_dpath, 'tag', 'v1.1.0')
+    project_dpath = generate(template_dpath, tmp_path / 'project')
+    git(project_dpath, 'init')
+    git(project_dpath, 'add', '--all')
+    git(project_dpath, 'commit', '-m', 'generated')
+    cache = TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+    cache.refresh()
+
+    result = reanswer.reanswer_project(project_dpath, cache, {'use_lint': 'false'})
+
+    assert (result.status, result.message) == ('failed', "render failed: 'nope' is undefined")
+    assert project_dpath.joinpath('lint.toml').exists()
+
+
+def test_cli(project_dpath: Path, cli: CLIRunner):
+    result = cli.invoke('reanswer', '--dry-run', '-a', 'use_lint=false', str(project_dpath))
+    assert '-ruff = "latest"\n' in result.stdout
+    assert f'changed  {project_dpath}\n' in result.stderr
+    assert project_dpath.joinpath('lint.toml').exists()
+
+    result = cli.invoke('reanswer', '--json', '-a', 'use_lint=false', str(project_dpath))
+    summary = json.loads(result.stdout)
+    assert summary['counts']['changed'] == 1
+    assert not project_dpath.joinpath('lint.toml').exists()
+
+    result = cli.invoke('reanswer', '-a', 'use_lint', str(project_dpath), check=False)
+    assert result.exit_code == 2
+    assert 'Expected NAME=VALUE: use_lint' in result.stderr
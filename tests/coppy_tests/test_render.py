@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pytest
+
+from coppy import render
+from coppy.paths import dirs
+
+from .libs.testing import DEFAULT_ANSWERS, Package
+
+
+def read_tree(dpath: Path) -> dict[str, str]:
+    return {
+        fpath.relative_to(dpath).as_posix(): fpath.read_text()
+        for fpath in dpath.rglob('*')
+        if fpath.is_file()
+    }
+
+
+def without_commit(text: str) -> str:
+    return ''.join(line for line in text.splitlines(True) if not line.startswith('_commit:'))
+
+
+class TestRender:
+    @pytest.mark.parametrize(
+        'answers',
+        [
+            {},
+            {'use_gh_nox': False},
+            {'use_rumdl': False, 'use_js_cooldown': False, 'script_name': 'ent'},
+        ],
+    )
+    def test_matches_copier(self, tmp_path: Path, answers: dict):
+        package = Package(tmp_path / 'pkg')
+        package.generate(**answers)
+        generated = read_tree(package.dpath)
+
+        files = render.render(DEFAULT_ANSWERS | answers)
+
+        assert files.keys() == generated.keys()
+        answers_fname = '.copier-answers-py.yaml'
+        assert files.pop(answers_fname) == without_commit(generated.pop(answers_fname))
+        assert files == generated
+
+    def test_commit(self):
+        files = render.render(DEFAULT_ANSWERS, commit='v1.20260813.1')
+
+        assert '_commit: v1.20260813.1\n' in files['.copier-answers-py.yaml']
+
+    def test_unasked_question_defaults(self):
+        files = render.render(DEFAULT_ANSWERS | {'use_gh_nox': False})
+
+        # use_codecov is only asked with use_gh_nox but its default is still rendered with.
+        assert 'use_codecov' not in files['.copier-answers-py.yaml']
+        assert 'use_circleci: true' in files['.copier-answers-py.yaml']
+        assert '.circleci/config.yml' in files
+
+
+class TestDependencies:
+    def test_index(self):
+        template = render.Template.load(dirs.pkg)
+
+        affected = {path.as_posix() for path in template.affected(['use_rumdl'])}
+
+        assert affected == {
+            '.editorconfig.jinja',
+            'mise.toml.jinja',
+            'prek.toml.jinja',
+            '{% if use_rumdl %}rumdl.toml{% endif %}',
+            '{{ _copier_conf.answers_file }}.jinja',
+        }
+        # Through python_version_min's default
+        assert Path('.python-version.jinja') in template.affected(['python_version'])
+
+    @pytest.mark.parametrize(
+        'answers',
+        [
+            {'use_rumdl': False},
+            {'python_version': '3.12'},
+            {'script_name': 'ent'},
+            {'project_name': 'Voyager'},
+            {'use_gh_nox': False},
+            {'use_js_cooldown': False},
+        ],
+    )
+    def test_affected_covers_changes(self, answers: dict):
+        template = render.Template.load(dirs.pkg)
+        old_files = template.render(DEFAULT_ANSWERS)
+        new_files = template.render(DEFAULT_ANSWERS | answers)
+        changed = {
+            path
+            for path in old_files.keys() | new_files.keys()
+            if old_files.get(path) != new_files.get(path)
+        }
+
+        only = template.affected(answers)
+        old_only = template.render(DEFAULT_ANSWERS, only=only)
+        new_only = template.render(DEFAULT_ANSWERS | answers, only=only)
+
+        assert changed
+        assert changed <= old_only.keys() | new_only.keys()
+        assert new_only == {path: new_files[path] for path in new_only}
+        assert len(new_only) < len(new_files)
@@ -2,26 +2,130 @@ from pathlib import Path
 
 import pytest
 
-from .libs.sandbox import UserBox
+from .libs import mocks
+from .libs.sandbox import SandboxSession, SessionBusy, UserBox, source_hash
 from .libs.testing import UserPackage
 
 
+class TestSession:
+    @pytest.fixture(autouse=True)
+    def release(self):
+        self.sessions = []
+        yield
+        for session in self.sessions:
+            session.release()
+
+    def acquire(self, base_home_dpath: Path, name: str = '', worker: str = '') -> SandboxSession:
+        env = {'COPPY_TEST_SESSION': name, 'PYTEST_XDIST_WORKER': worker}
+        with mocks.environ(values=env):
+            session = SandboxSession.acquire(base_home_dpath=base_home_dpath)
+        self.sessions.append(session)
+        return session
+
+    def test_free_slots(self, tmp_path: Path):
+        first = self.acquire(tmp_path)
+        second = self.acquire(tmp_path)
+
+        assert (first.session_id, second.session_id) == ('slot-1', 'slot-2')
+        assert [
+            session.session_id for session in SandboxSession.active(base_home_dpath=tmp_path)
+        ] == [
+            'slot-1',
+            'slot-2',
+        ]
+
+        # Slots are reused once their process is done with them.
+        first.release()
+        assert self.acquire(tmp_path).session_id == 'slot-1'
+
+    def test_named(self, tmp_path: Path):
+        session = self.acquire(tmp_path, 'alpha', 'gw1')
+        assert session.root_dpath == tmp_path / 'tmp/sessions/alpha-gw1'
+
+        assert self.acquire(tmp_path, 'alpha', 'gw2').session_id == 'alpha-gw2'
+        with pytest.raises(SessionBusy):
+            self.acquire(tmp_path, 'alpha', 'gw1')
+
+    def test_prepare(self, tmp_path: Path):
+        tmp_path.joinpath('.gitconfig').write_text('[user]\n')
+        session = self.acquire(tmp_path)
+        session.pytest_dpath.joinpath('pkg').mkdir()
+        session.cache_dpath.joinpath('uv').mkdir()
+        session.release()
+
+        session = self.acquire(tmp_path)
+
+        # Run output is cleared, caches are kept warm.
+        assert not session.pytest_dpath.joinpath('pkg').exists()
+        assert session.cache_dpath.joinpath('uv').is_dir()
+        assert session.home_dpath.joinpath('.gitconfig').read_text() == '[user]\n'
+
+    def test_exec_env(self, tmp_path: Path):
+        session = self.acquire(tmp_path)
+        sb = UserBox(session=session)
+
+        with mocks.patch('coppy_tests.libs.sandbox.sudo_run') as m_sudo_run:
+            sb.exec('id')
+
+        kwargs = m_sudo_run.call_args.kwargs
+        assert kwargs['cwd'] == session.home_dpath
+        assert kwargs['env_path'].startswith(f'{session.tool_bin_dpath}:{sb.local_bin_dpath}:')
+        assert kwargs['user_env']['HOME'] == str(session.home_dpath)
+        # Nothing the sandbox writes goes outside the session.
+        for value in kwargs['user_env'].values():
+            assert Path(value).is_relative_to(session.root_dpath)
+
+    def test_install_cached(self, tmp_path: Path):
+        sb = UserBox(session=self.acquire(tmp_path))
+
+        def uv(self, *args, **kwargs):
+            self.session.tool_bin_dpath.joinpath('coppy').touch()
+
+        with (
+            mocks.patch('coppy_tests.libs.sandbox.source_hash', return_value='abc') as m_hash,
+            mocks.patch('coppy_tests.libs.sandbox.sub_run') as m_sub_run,
+            mocks.patch_obj(UserBox, 'uv', side_effect=uv) as m_uv,
+        ):
+            sb.coppy_install()
+            sb.coppy_install()
+            assert m_sub_run.call_count == m_uv.call_count == 1
+
+            m_hash.return_value = 'def'
+            assert sb.coppy_install() == sb.session.tool_bin_dpath / 'coppy'
+            assert m_sub_run.call_count == m_uv.call_count == 2
+            assert m_sub_run.call_args.args[4] == sb.session.dist_dpath / 'def'
+
+    def test_source_hash(self, tmp_path: Path):
+        tmp_path.joinpath('src/coppy').mkdir(parents=True)
+        for fname in ('pyproject.toml', 'hatch.toml', 'src/coppy/cli.py'):
+            tmp_path.joinpath(fname).write_text('')
+        src_hash = source_hash(tmp_path)
+
+        tmp_path.joinpath('src/coppy/__pycache__').mkdir()
+        tmp_path.joinpath('src/coppy/__pycache__/cli.pyc').write_text('')
+        assert source_hash(tmp_path) == src_hash
+
+        tmp_path.joinpath('src/coppy/cli.py').write_text('# changed')
+        assert source_hash(tmp_path) != src_hash
+
+
 class TestUserBox:
     @classmethod
     @pytest.fixture(scope='class')
     def package(cls):
-        package = UserPackage('test-sandbox')
-        package.generate()
-        return package
+        return UserPackage.from_snapshot('test-sandbox')
 
     def test_sudo_integration(self):
         sb = UserBox()
         assert sb.exec_stdout('id', '-un') == 'coppy-tests'
-        assert sb.exec_stdout('printenv', 'PATH').startswith('/home/coppy-tests/.local/bin:')
-        assert sb.uv_python('import os; print(os.getcwd())') == '/home/coppy-tests'
-        assert (
-            sb.uv_python('import os; print(os.getcwd())', cwd='/home/coppy-tests/tmp')
-            == '/home/coppy-tests/tmp'
+        assert sb.exec_stdout('printenv', 'PATH').startswith(
+            f'{sb.session.tool_bin_dpath}:{sb.local_bin_dpath}:',
+        )
+        assert sb.exec_stdout('printenv', 'HOME') == str(sb.home_dpath)
+        assert sb.exec_stdout('printenv', 'UV_CACHE_DIR') == str(sb.session.cache_dpath / 'uv')
+        assert sb.uv_python('import os; print(os.getcwd())') == str(sb.home_dpath)
+        assert sb.uv_python('import os; print(os.getcwd())', cwd=sb.tmp_dpath) == str(
+            sb.tmp_dpath,
         )
 
     def test_sandbox(self, package: UserPackage):
@@ -66,3 +170,12 @@ class TestUserBox:
             # `uv run` should have triggered a `uv sync`
             result = sb.uv('pip', 'freeze', capture=True)
             assert len(result.stdout.strip().splitlines()) > 0
+
+    def test_snapshot_copies(self, package: UserPackage):
+        other = UserPackage.from_snapshot('test-sandbox-other')
+
+        UserBox(package.dpath).exec('sh', '-c', 'echo changed > readme.md')
+        assert other.read_text('readme.md') != 'changed\n'
+
+        with other.sandbox() as sb:
+            assert sb.mise_env('VIRTUAL_ENV') == [other.path('.venv').as_posix()]
@@ -0,0 +1,96 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|(\s*)(\S+)$')
+
+# Microseconds of import self-time above a bare interpreter.  Generous so slow CI machines
+# don't flake; blowing one means something heavy is being imported at startup again.
+BUDGETS = {
+    ('version',): 150_000,
+    # Imports everything `migrate before/after` do without running a migration.
+    ('migrate', '--help'): 250_000,
+    ('update', '--help'): 300_000,
+    ('upgrade-deps', '--help'): 250_000,
+    ('doctor', '--help'): 250_000,
+    ('drift', '--help'): 250_000,
+    ('hooks', 'warm', '--help'): 250_000,
+    ('reanswer', '--help'): 250_000,
+    ('status', '--help'): 250_000,
+    ('verify', '--help'): 250_000,
+}
+
+# Modules the entry point has no business importing.
+HEAVY = ('blazeutils', 'colorlog', 'copier', 'jinja2', 'yaml')
+FORBIDDEN = {
+    ('version',): (*HEAVY, 'coppy.commands', 'coppy.utils'),
+    ('migrate', '--help'): HEAVY,
+    ('update', '--help'): HEAVY,
+    ('upgrade-deps', '--help'): HEAVY,
+    ('doctor', '--help'): HEAVY,
+    ('drift', '--help'): HEAVY,
+    ('hooks', 'warm', '--help'): HEAVY,
+    ('reanswer', '--help'): HEAVY,
+    ('status', '--help'): HEAVY,
+    ('verify', '--help'): HEAVY,
+}
+
+
+def import_times(*args) -> dict[str, int]:
+    """Self import time, in microseconds, of every module `python -X importtime` reports."""
+    result = subprocess.run(
+        (sys.executable, '-X', 'importtime', *args),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if match := IMPORT_TIME_RE.match(line):
+            times[match.group(3)] = int(match.group(1))
+    return times
+
+
+@pytest.fixture(scope='module')
+def baseline() -> set[str]:
+    return set(import_times('-c', 'pass'))
+
+
+@pytest.mark.parametrize('args', list(BUDGETS), ids=' '.join)
+def test_startup(args: tuple[str, ...], baseline: set[str]):
+    times = import_times('-m', 'coppy.cli', *args)
+    # coppy.cli itself runs as __main__
+    assert 'coppy.version' in times
+
+    imported = set(times) - baseline
+    forbidden = sorted(
+        name
+        for name in imported
+        for prefix in FORBIDDEN[args]
+        if name == prefix or name.startswith(f'{prefix}.')
+    )
+    assert forbidden == []
+
+    total = sum(times[name] for name in imported)
+    assert total < BUDGETS[args], f'{total / 1000:.1f}ms of imports'
+
+
+def test_sync_startup(baseline: set[str]):
+    """coppy-sync runs on every mise enter, it shouldn't import more than the standard library."""
+    times = import_times('-c', 'import coppy.sync')
+
+    imported = set(times) - baseline
+    assert (
+        sorted(
+            name
+            for name in imported
+            if name not in ('coppy', 'coppy.sync')
+            and name.split('.')[0] not in sys.stdlib_module_names
+        )
+        == []
+    )
+    total = sum(times[name] for name in imported)
+    assert total < 50_000, f'{total / 1000:.1f}ms of imports'
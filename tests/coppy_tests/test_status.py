@@ -0,0 +1,166 @@
+from contextlib import closing
+import json
+from pathlib import Path
+import shutil
+import sqlite3
+
+import pytest
+
+from coppy import status as fleet_status
+from coppy.status import FleetIndex
+from coppy.utils import sub_run
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run('git', *args, cwd=dpath, capture=True).stdout.strip()
+
+
+@pytest.fixture()
+def template_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'template'
+    dpath.mkdir()
+    git(dpath, 'init')
+    git(dpath, 'config', 'user.name', 'Coppy Tests')
+    git(dpath, 'config', 'user.email', 'coppy-tests@example.com')
+    for tag in ('v1.0.0', 'v1.1.0', 'v2.0.0rc1', 'v2.0.0'):
+        git(dpath, 'commit', '--allow-empty', '-m', tag)
+        git(dpath, 'tag', tag)
+    return dpath
+
+
+def write_project(dpath: Path, src: str, commit: str) -> Path:
+    dpath.mkdir(parents=True, exist_ok=True)
+    dpath.joinpath('.copier-answers-py.yaml').write_text(
+        f'_commit: {commit}\n_src_path: {src}\nproject_name: {dpath.name}\n',
+    )
+    return dpath
+
+
+@pytest.fixture()
+def workspace(tmp_path: Path, template_dpath: Path) -> Path:
+    dpath = tmp_path / 'workspace'
+    src = template_dpath.as_posix()
+    write_project(dpath / 'alpha', src, 'v1.0.0')
+    write_project(dpath / 'bravo', src, 'v2.0.0')
+    write_project(dpath / 'clients' / 'charlie', src, 'v1.1.0-2-gabc1234')
+    write_project(dpath / 'delta', src, 'abc1234')
+    # Not searched: inside a project and a skipped directory
+    write_project(dpath / 'alpha' / 'vendored', src, 'v1.0.0')
+    write_project(dpath / 'node_modules' / 'echo', src, 'v1.0.0')
+    dpath.joinpath('notes').mkdir()
+    return dpath
+
+
+class TestFleetIndex:
+    def test_scan(self, workspace: Path, tmp_path: Path):
+        index = FleetIndex(tmp_path / 'index.sqlite3')
+
+        statuses = index.scan([workspace])
+
+        assert [status.project_dpath.relative_to(workspace).as_posix() for status in statuses] == [
+            'alpha',
+            'bravo',
+            'clients/charlie',
+            'delta',
+        ]
+        assert not any(status.cached for status in statuses)
+        assert statuses[0].commit == 'v1.0.0'
+        assert statuses[0].answers == {'project_name': 'alpha'}
+
+    def test_rescan_reads_changed_only(self, workspace: Path, tmp_path: Path):
+        index = FleetIndex(tmp_path / 'index.sqlite3')
+        index.scan([workspace])
+
+        write_project(workspace / 'bravo', 'gh:level12/coppy', 'v1.1.0')
+        shutil.rmtree(workspace / 'delta')
+        with mocks.patch_obj(
+            fleet_status,
+            'read_status',
+            side_effect=fleet_status.read_status,
+        ) as m_read_status:
+            statuses = index.scan([workspace])
+
+        m_read_status.assert_called_once_with(workspace / 'bravo/.copier-answers-py.yaml')
+        by_name = {status.project_dpath.name: status for status in statuses}
+        assert sorted(by_name) == ['alpha', 'bravo', 'charlie']
+        assert by_name['alpha'].cached
+        assert not by_name['bravo'].cached
+        assert by_name['bravo'].commit == 'v1.1.0'
+
+        # Removed projects are dropped from the index, not just from the results.
+        with closing(index.connect()) as conn:
+            paths = [row[0] for row in conn.execute('SELECT path FROM projects ORDER BY path')]
+        assert [Path(path).parent.name for path in paths] == ['alpha', 'bravo', 'charlie']
+
+        # Projects outside the roots scanned stay indexed.
+        statuses = index.scan([workspace / 'clients'])
+        assert [status.project_dpath.name for status in statuses] == ['charlie']
+        assert index.scan([workspace / 'alpha'])[0].cached
+
+    def test_schema_change_rebuilds(self, workspace: Path, tmp_path: Path):
+        index = FleetIndex(tmp_path / 'index.sqlite3')
+        index.scan([workspace])
+
+        with closing(sqlite3.connect(index.fpath)) as conn:
+            conn.execute('PRAGMA user_version = 0')
+        statuses = index.scan([workspace])
+
+        assert not any(status.cached for status in statuses)
+
+
+class TestCompare:
+    def test_behind(self, workspace: Path, tmp_path: Path):
+        statuses = FleetIndex(tmp_path / 'index.sqlite3').scan([workspace])
+
+        fleet_status.compare(statuses, cache_dpath=tmp_path / 'cache')
+
+        by_name = {status.project_dpath.name: status for status in statuses}
+        assert {name: status.behind for name, status in by_name.items()} == {
+            'alpha': 2,
+            'bravo': 0,
+            'charlie': 1,
+            'delta': None,
+        }
+        assert {status.latest for status in statuses} == {'v2.0.0'}
+        assert by_name['delta'].message == 'abc1234 is not a tag'
+        assert fleet_status.summary(statuses)['counts'] == {
+            'current': 1,
+            'behind': 2,
+            'unknown': 1,
+        }
+
+    def test_no_fetch_once_cached(self, workspace: Path, tmp_path: Path):
+        statuses = FleetIndex(tmp_path / 'index.sqlite3').scan([workspace])
+        fleet_status.compare(statuses, cache_dpath=tmp_path / 'cache')
+
+        with mocks.patch_obj(fleet_status.TemplateCache, 'refresh') as m_refresh:
+            fleet_status.compare(statuses, cache_dpath=tmp_path / 'cache')
+            m_refresh.assert_not_called()
+
+            fleet_status.compare(statuses, fetch=True, cache_dpath=tmp_path / 'cache')
+            m_refresh.assert_called_once()
+
+    def test_template_unavailable(self, tmp_path: Path):
+        write_project(tmp_path / 'project', (tmp_path / 'missing').as_posix(), 'v1.0.0')
+        statuses = FleetIndex(tmp_path / 'index.sqlite3').scan([tmp_path / 'project'])
+
+        fleet_status.compare(statuses, cache_dpath=tmp_path / 'cache')
+
+        assert statuses[0].behind is None
+        assert statuses[0].message.startswith('template unavailable: ')
+
+
+def test_cli(workspace: Path, cli: CLIRunner):
+    result = cli.invoke('status', str(workspace))
+    assert f'  2  v1.0.0               {workspace / "alpha"}\n' in result.stdout
+    assert '4 projects: 1 current, 2 behind, 1 unknown (latest: v2.0.0)' in result.stderr
+
+    result = cli.invoke('status', '--outdated', '--json', str(workspace))
+    summary = json.loads(result.stdout)
+    assert [project['project'] for project in summary['projects']] == [
+        (workspace / 'alpha').as_posix(),
+        (workspace / 'clients/charlie').as_posix(),
+    ]
@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from coppy import sync
+
+from .libs import mocks
+
+
+# Stands in for uv: logs the call and creates the venv the way `uv sync` would.
+FAKE_UV = """#!/bin/sh
+echo "$*" >> {log}
+mkdir -p .venv/bin
+ln -sf {python} .venv/bin/python
+echo "version = 3.12" > .venv/pyvenv.cfg
+exit ${{FAKE_UV_EXIT:-0}}
+"""
+
+
+@pytest.fixture()
+def project_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'project'
+    dpath.mkdir()
+    dpath.joinpath('pyproject.toml').write_text("[project]\nname = 'enterprise'\n")
+    dpath.joinpath('uv.lock').write_text('version = 1\n')
+    dpath.joinpath('.python-version').write_text('3.12\n')
+    return dpath
+
+
+@pytest.fixture()
+def uv_calls(tmp_path: Path):
+    log_fpath = tmp_path / 'uv.log'
+    bin_dpath = tmp_path / 'bin'
+    bin_dpath.mkdir()
+    bin_dpath.joinpath('uv').write_text(FAKE_UV.format(log=log_fpath, python=sys.executable))
+    bin_dpath.joinpath('uv').chmod(0o755)
+
+    def calls() -> list[str]:
+        return log_fpath.read_text().splitlines() if log_fpath.exists() else []
+
+    with mocks.environ(PATH=f'{bin_dpath}{os.pathsep}{os.environ["PATH"]}'):
+        yield calls
+
+
+def test_stamp(project_dpath: Path, uv_calls):
+    assert sync.sync(project_dpath, []) == 0
+    assert uv_calls() == ['sync']
+    assert project_dpath.joinpath('.venv', sync.STAMP_FNAME).exists()
+
+    # Nothing changed, from a subdirectory too
+    subdir_dpath = project_dpath / 'src'
+    subdir_dpath.mkdir()
+    assert sync.sync(subdir_dpath, []) == 0
+    assert uv_calls() == ['sync']
+
+    # Same content, new mtime
+    lock_fpath = project_dpath / 'uv.lock'
+    lock_fpath.write_text(lock_fpath.read_text())
+    os.utime(lock_fpath, ns=(0, 0))
+    sync.sync(project_dpath, [])
+    assert uv_calls() == ['sync']
+
+    lock_fpath.write_text('version = 2\n')
+    sync.sync(project_dpath, [])
+    assert uv_calls() == ['sync', 'sync']
+
+    # Different args are a different environment
+    sync.sync(project_dpath, ['--group', 'docs'])
+    assert uv_calls() == ['sync', 'sync', 'sync --group docs']
+
+
+@pytest.mark.parametrize('remove', ['.python-version', '.venv/bin/python', '.venv'])
+def test_stale(project_dpath: Path, uv_calls, remove: str):
+    sync.sync(project_dpath, [])
+
+    subprocess.run(('rm', '-r', project_dpath / remove), check=True)
+    sync.sync(project_dpath, [])
+
+    assert uv_calls() == ['sync', 'sync']
+
+
+def test_failure(project_dpath: Path, uv_calls):
+    with mocks.environ(FAKE_UV_EXIT='2'):
+        assert sync.sync(project_dpath, []) == 2
+    assert not project_dpath.joinpath('.venv', sync.STAMP_FNAME).exists()
+
+    assert sync.sync(project_dpath, []) == 0
+    assert uv_calls() == ['sync', 'sync']
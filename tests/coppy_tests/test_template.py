@@ -4,33 +4,31 @@ from pathlib import Path
 import pytest
 
 from coppy import utils
-from coppy.utils import LazyDict
+from coppy.containers import LazyDict
 
 from .libs.sandbox import UserBox
-from .libs.testing import Package, UserPackage, data_fpath
+from .libs.testing import Package, RenderedPackage, UserPackage, data_fpath
 
 
 @pytest.fixture()
-def package(tmp_path_factory):
-    temp_path: Path = tmp_path_factory.mktemp('test-py-pkg')
-    return Package(temp_path)
+def package():
+    return RenderedPackage()
 
 
-def assert_pkg_file_eq(package: Package, p_fpath, d_fpath):
+def assert_pkg_file_eq(package: RenderedPackage, p_fpath, d_fpath):
     assert package.read_text(p_fpath) == data_fpath(d_fpath).read_text()
 
 
 class TestTemplateGen:
     @classmethod
     @pytest.fixture(scope='class')
-    def gen_pkg(cls, tmp_path_factory):
+    def gen_pkg(cls):
         """A package with default config"""
-        temp_path: Path = tmp_path_factory.mktemp('test-py-pkg')
-        gen_pkg = Package(temp_path)
+        gen_pkg = RenderedPackage()
         gen_pkg.generate()
         return gen_pkg
 
-    def test_pyproject(self, gen_pkg: Package):
+    def test_pyproject(self, gen_pkg: RenderedPackage):
         config = gen_pkg.toml_config('pyproject.toml')
 
         assert config.project.name == 'Enterprise'
@@ -42,7 +40,7 @@ class TestTemplateGen:
         assert author.name == 'Picard'
         assert author.email == 'jpicard@starfleet.space'
 
-    def test_pyproject_python_version_min(self, package: Package):
+    def test_pyproject_python_version_min(self, package: RenderedPackage):
         package.generate(python_version='3.13', python_version_min='3.12')
 
         config = package.toml_config('pyproject.toml')
@@ -50,7 +48,7 @@ class TestTemplateGen:
         assert config.project['requires-python'] == '>=3.12'
         assert package.read_text('.python-version').strip() == '3.13'
 
-    def test_hatchling_backend(self, gen_pkg: Package):
+    def test_hatchling_backend(self, gen_pkg: RenderedPackage):
         config = gen_pkg.toml_config('pyproject.toml')
         hatch = gen_pkg.toml_config('hatch.toml')
 
@@ -61,11 +59,11 @@ class TestTemplateGen:
         assert hatch.version.source == 'regex'
         assert hatch.version.path == 'src/enterprise/version.py'
 
-    def test_version_source(self, gen_pkg: Package):
+    def test_version_source(self, gen_pkg: RenderedPackage):
         assert gen_pkg.read_text('src/enterprise/__init__.py') == ''
         assert gen_pkg.read_text('src/enterprise/version.py') == "VERSION = '0.1.0'\n"
 
-    def test_static_files(self, gen_pkg: Package):
+    def test_static_files(self, gen_pkg: RenderedPackage):
         assert gen_pkg.exists('.python-version')
         assert gen_pkg.exists('rumdl.toml')
         assert gen_pkg.exists('mise.lock')
@@ -75,10 +73,10 @@ class TestTemplateGen:
 
         assert "{ id = 'rumdl' }" in gen_pkg.read_text('prek.toml')
 
-    def test_mise(self, gen_pkg: Package):
+    def test_mise(self, gen_pkg: RenderedPackage):
         assert_pkg_file_eq(gen_pkg, 'mise.toml', 'mise.toml')
 
-    def test_editorconfig_rumdl(self, gen_pkg: Package):
+    def test_editorconfig_rumdl(self, gen_pkg: RenderedPackage):
         expected = """
 [*.md]
 # Match the line length setting in rumdl.toml.
@@ -86,10 +84,10 @@ max_line_length = 90
 """.lstrip()
         assert expected in gen_pkg.read_text('.editorconfig')
 
-    def test_rumdl(self, gen_pkg: Package):
-        utils.sub_run('rumdl', 'check', '.', cwd=gen_pkg.dpath)
+    def test_rumdl(self, gen_pkg: RenderedPackage, tmp_path: Path):
+        utils.sub_run('rumdl', 'check', '.', cwd=gen_pkg.write(tmp_path).dpath)
 
-    def test_without_rumdl(self, package: Package):
+    def test_without_rumdl(self, package: RenderedPackage):
         package.generate(use_rumdl=False)
 
         assert not package.exists('rumdl.toml')
@@ -97,7 +95,7 @@ max_line_length = 90
         assert 'rumdl' not in package.read_text('prek.toml')
         assert 'max_line_length' not in package.read_text('.editorconfig')
 
-    def test_supply_chain_configs(self, gen_pkg: Package, package: Package):
+    def test_supply_chain_configs(self, gen_pkg: RenderedPackage, package: RenderedPackage):
         template_expected = {
             '.npmrc': 'min-release-age=3',
             'pnpm-workspace.yaml': 'minimumReleaseAge: 4320',
@@ -118,7 +116,7 @@ max_line_length = 90
         for rel_fpath in template_expected:
             assert not package.exists(rel_fpath)
 
-    def test_ci_options(self, gen_pkg: Package, package: Package):
+    def test_ci_options(self, gen_pkg: RenderedPackage, package: RenderedPackage):
         # default
         assert_pkg_file_eq(gen_pkg, '.github/workflows/nox.yaml', 'gh-nox.yaml')
         assert not gen_pkg.exists('.circleci/config.yml')
@@ -152,7 +150,7 @@ max_line_length = 90
         assert not package.exists('.github/workflows/nox.yaml')
         assert not package.exists('.circleci/config.yml')
 
-    def test_scripts(self, gen_pkg: Package, package: Package):
+    def test_scripts(self, gen_pkg: RenderedPackage, package: RenderedPackage):
         # No script by default
         proj = gen_pkg.toml_config('pyproject.toml')
         assert proj.project.get('scripts') is None
@@ -191,9 +189,7 @@ class TestTemplateWithSandbox:
     @classmethod
     @pytest.fixture(scope='class')
     def pkg(cls):
-        package = UserPackage('template-with-sandbox')
-        package.generate()
-        return package
+        return UserPackage.from_snapshot('template-with-sandbox')
 
     @classmethod
     @pytest.fixture(scope='class')
@@ -220,12 +216,9 @@ class TestTemplateWithSandbox:
         sb.mise_exec('sh', '-c', 'test -z "${UV_PROJECT_ENVIRONMENT+x}"')
         sb.mise_exec('sh', '-c', 'test -z "${UV_PYTHON+x}"')
 
-    def test_tasks(self, pkg: UserPackage):
-        # TODO: we should revisit the pkg vs sandbox isolation for a test like this that modifies
-        # the package.  When the sandbox used docker, modifications in the sandbox didn't affect
-        # subsequent runs because we created a new container for each sandbox and copied the
-        # package into it.  We might want to have the sandbox generate packages as needed instead
-        # of having a package use a sandbox.
+    def test_tasks(self):
+        # This test modifies the package so it gets its own copy.
+        pkg = UserPackage.from_snapshot('template-tasks')
         with pkg.sandbox() as sb:
             # Task listing
             task_meta = sb.mise('tasks', '--json', json=True)
@@ -274,8 +267,8 @@ class TestTemplateWithSandbox:
             assert sb.exec_stdout('git', 'tag', '--list') == f'v{version}'
             assert f'Release v{version}' in sb.exec_stdout('git', 'cat-file', '-p', f'v{version}')
 
-    def test_script_run(self, pkg: UserPackage):
-        pkg.generate(script_name='ent')
+    def test_script_run(self):
+        pkg = UserPackage.from_snapshot('template-script', script_name='ent')
 
         with pkg.sandbox() as sb:
             ent_hello = sb.uv_run('ent')
@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from coppy import template_cache
+from coppy.template_cache import TemplateCache, template_url
+from coppy.utils import CalledProcessError, sub_run
+
+from .libs import mocks
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run('git', *args, cwd=dpath, capture=True).stdout.strip()
+
+
+def commit_file(repo_dpath: Path, name: str, content: str) -> str:
+    repo_dpath.joinpath(name).write_text(content)
+    git(repo_dpath, 'add', name)
+    git(repo_dpath, 'commit', '-m', f'{name}: {content}')
+    return git(repo_dpath, 'rev-parse', 'HEAD')
+
+
+@pytest.fixture()
+def template_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'template'
+    dpath.mkdir()
+    git(dpath, 'init')
+    git(dpath, 'config', 'user.name', 'Coppy Tests')
+    git(dpath, 'config', 'user.email', 'coppy-tests@example.com')
+    commit_file(dpath, 'version.txt', '1')
+    git(dpath, 'tag', 'v1.0.0')
+    return dpath
+
+
+@pytest.fixture()
+def cache(template_dpath: Path, tmp_path: Path) -> TemplateCache:
+    return TemplateCache(template_dpath.as_posix(), cache_dpath=tmp_path / 'cache')
+
+
+class TestTemplateUrl:
+    @pytest.mark.parametrize(
+        ('src', 'url'),
+        [
+            ('gh:level12/coppy', 'https://github.com/level12/coppy.git'),
+            ('gh:level12/coppy.git', 'https://github.com/level12/coppy.git'),
+            ('gl:level12/coppy', 'https://gitlab.com/level12/coppy.git'),
+            ('https://github.com/level12/coppy', 'https://github.com/level12/coppy.git'),
+            ('git+https://example.com/coppy', 'https://example.com/coppy'),
+            ('git@github.com:level12/coppy.git', 'git@github.com:level12/coppy.git'),
+            ('/projects/coppy-pkg', '/projects/coppy-pkg'),
+        ],
+    )
+    def test_url(self, src: str, url: str):
+        assert template_url(src) == url
+
+    def test_home(self):
+        assert template_url('~/coppy') == Path('~/coppy').expanduser().as_posix()
+
+
+class TestTemplateCache:
+    def test_for_project(self, tmp_path: Path):
+        assert TemplateCache.for_project(tmp_path) is None
+
+        tmp_path.joinpath('.copier-answers-py.yaml').write_text('_src_path: gh:level12/coppy\n')
+        cache = TemplateCache.for_project(tmp_path, cache_dpath=tmp_path)
+
+        assert cache.url == 'https://github.com/level12/coppy.git'
+        assert cache.dpath.parent == tmp_path / 'templates'
+        assert cache.dpath.name.startswith('coppy-')
+
+    def test_refresh_is_incremental(self, cache: TemplateCache, template_dpath: Path):
+        cache.refresh()
+        assert cache.is_valid()
+        first_commit = cache.resolve('v1.0.0')
+
+        new_commit = commit_file(template_dpath, 'version.txt', '2')
+        with mocks.patch_obj(template_cache, 'sub_run', side_effect=sub_run) as m_sub_run:
+            cache.refresh()
+
+        assert cache.resolve('HEAD') == new_commit
+        assert cache.resolve('v1.0.0') == first_commit
+        git_args = [arg for call in m_sub_run.call_args_list for arg in call.args]
+        assert 'clone' not in git_args
+        assert 'fetch' in git_args
+
+    def test_refresh_replaces_corrupt_mirror(self, cache: TemplateCache):
+        cache.mirror_dpath.joinpath('objects').mkdir(parents=True)
+
+        cache.refresh()
+
+        assert cache.resolve('v1.0.0')
+
+    def test_worktree_reused(self, cache: TemplateCache, template_dpath: Path):
+        cache.refresh()
+        commit_file(template_dpath, 'version.txt', '2')
+        cache.refresh()
+
+        v1_dpath = cache.worktree('v1.0.0')
+        head_dpath = cache.worktree('HEAD')
+
+        assert v1_dpath.joinpath('version.txt').read_text() == '1'
+        assert head_dpath.joinpath('version.txt').read_text() == '2'
+
+        with mocks.patch_obj(template_cache, 'sub_run', side_effect=sub_run) as m_sub_run:
+            assert cache.worktree('v1.0.0') == v1_dpath
+
+        # Only the ref lookup, no new worktree.
+        assert m_sub_run.call_count == 1
+
+    def test_concurrent_worktrees(self, cache: TemplateCache):
+        cache.refresh()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            dpaths = list(executor.map(cache.worktree, ['v1.0.0'] * 8))
+
+        assert len(set(dpaths)) == 1
+        # Every caller gets a complete checkout, not one still being created.
+        assert [dpath.joinpath('version.txt').read_text() for dpath in dpaths] == ['1'] * 8
+
+    def test_interrupted_worktree_rebuilt(self, cache: TemplateCache):
+        cache.refresh()
+        wt_dpath = cache.worktree('v1.0.0')
+        # What an interrupted `git worktree add` leaves behind
+        cache.worktrees_dpath.joinpath(f'{cache.resolve("v1.0.0")}.ready').unlink()
+        wt_dpath.joinpath('version.txt').unlink()
+
+        assert cache.worktree('v1.0.0').joinpath('version.txt').read_text() == '1'
+
+    def test_git_env_redirects_clone_to_mirror(
+        self,
+        cache: TemplateCache,
+        template_dpath: Path,
+        tmp_path: Path,
+    ):
+        cache.refresh()
+        # Not yet fetched into the mirror, so a clone that has it didn't come from the mirror.
+        commit_file(template_dpath, 'version.txt', '2')
+
+        clone_dpath = tmp_path / 'clone'
+        sub_run('git', 'clone', cache.url, clone_dpath, capture=True, env=cache.git_env())
+
+        assert clone_dpath.joinpath('version.txt').read_text() == '1'
+        # The clone still remembers the template's real URL.
+        assert git(clone_dpath, 'remote', 'get-url', 'origin') == cache.url
+
+    def test_git_env_appends_to_existing_config(self, cache: TemplateCache):
+        with mocks.environ(values={'GIT_CONFIG_COUNT': '2'}):
+            env = cache.git_env()
+
+        assert env['GIT_CONFIG_COUNT'] == '3'
+        assert env['GIT_CONFIG_VALUE_2'] == cache.url
+
+
+class TestGitEnvs:
+    def test_refreshes_each_template_once(self, template_dpath: Path, tmp_path: Path):
+        projects = [tmp_path / name for name in 'abc']
+        for dpath in projects[:2]:
+            dpath.mkdir()
+            dpath.joinpath('.copier-answers-py.yaml').write_text(f'_src_path: {template_dpath}\n')
+        projects[2].mkdir()
+
+        with mocks.patch_obj(TemplateCache, 'refresh') as m_refresh:
+            envs = template_cache.git_envs(projects, cache_dpath=tmp_path / 'cache')
+
+        m_refresh.assert_called_once()
+        assert envs[projects[0]] == envs[projects[1]]
+        assert envs[projects[0]]['GIT_CONFIG_COUNT']
+        assert envs[projects[2]] == {}
+
+    def test_refresh_failure_skips_cache(self, tmp_path: Path):
+        tmp_path.joinpath('.copier-answers-py.yaml').write_text(f'_src_path: {tmp_path}/nope\n')
+
+        envs = template_cache.git_envs([tmp_path], cache_dpath=tmp_path / 'cache')
+
+        assert envs == {tmp_path: {}}
+
+    def test_refresh_failure_is_called_process_error(self, tmp_path: Path):
+        cache = TemplateCache(f'{tmp_path}/nope', cache_dpath=tmp_path / 'cache')
+
+        with pytest.raises(CalledProcessError):
+            cache.refresh()
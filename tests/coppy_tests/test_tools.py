@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+import re
+
+import pytest
+
+from coppy import tools
+from coppy.tools import Probe, ProbeCache, Tool
+from coppy.utils import sub_run
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+def fake_tool(tmp_path: Path, name: str, output: str) -> Tool:
+    fpath = tmp_path / name
+    fpath.write_text(f'#!/bin/sh\necho "{output}"\n')
+    fpath.chmod(0o755)
+    return Tool(
+        name,
+        (1, 2, 0),
+        re.compile(rf'^{name} (\d+)\.(\d+)\.(\d+)$'),
+        locate=lambda: str(fpath),
+    )
+
+
+class TestTool:
+    @pytest.mark.parametrize(
+        ('tool', 'output', 'version'),
+        [
+            (tools.UV, 'uv 0.12.3 (x86_64-unknown-linux-gnu)', (0, 12, 3)),
+            (tools.UV, 'uv 0.9.17garbage', None),
+            (tools.GIT, 'git version 2.43.0', (2, 43, 0)),
+            (tools.MISE, '2026.5.2 linux-x64 (2026-05-10)', (2026, 5, 2)),
+            (tools.MISE, 'mise 2026.5.2 linux-x64 (2026-05-10)', (2026, 5, 2)),
+            (tools.PREK, 'prek 0.4.12 (abc123 2026-05-01)', (0, 4, 12)),
+        ],
+    )
+    def test_parse(self, tool: Tool, output: str, version):
+        assert tool.parse(output) == version
+
+
+class TestProbe:
+    def test_problems(self, tmp_path: Path):
+        tool = fake_tool(tmp_path, 'fake', '')
+
+        assert Probe(tool, None).problem == 'fake not found'
+        assert Probe(tool, tmp_path, 'fake 1.2.0').problem is None
+        assert Probe(tool, tmp_path, 'fake 1.1.9').problem == (
+            'fake 1.1.9 is too old; 1.2.0 or newer is required'
+        )
+        assert Probe(tool, tmp_path, 'huh').problem == 'Could not determine fake version from: huh'
+
+    def test_cached_until_binary_changes(self, tmp_path: Path):
+        tool = fake_tool(tmp_path, 'fake', 'fake 1.2.0')
+        cache = ProbeCache(tmp_path / 'cache.json')
+
+        probe = tools.probe(tool, cache)
+        assert probe.version == (1, 2, 0)
+        assert not probe.cached
+
+        with mocks.patch_obj(tools, 'sub_run', side_effect=sub_run) as m_sub_run:
+            probe = tools.probe(tool, cache)
+
+        assert probe.cached
+        assert probe.version == (1, 2, 0)
+        m_sub_run.assert_not_called()
+
+        # An upgrade replaces the binary
+        tool = fake_tool(tmp_path, 'fake', 'fake 1.10.0')
+        probe = tools.probe(tool, cache)
+        assert not probe.cached
+        assert probe.version == (1, 10, 0)
+
+    def test_missing_not_cached(self, tmp_path: Path):
+        tool = Tool('fake', (1,), re.compile(r'(\d+)'), locate=lambda: None)
+        cache = ProbeCache(tmp_path / 'cache.json')
+
+        assert tools.probe(tool, cache).problem == 'fake not found'
+        assert not cache.fpath.exists()
+
+    def test_corrupt_cache(self, tmp_path: Path):
+        tool = fake_tool(tmp_path, 'fake', 'fake 1.2.0')
+        cache = ProbeCache(tmp_path / 'cache.json')
+        cache.fpath.write_text('{')
+
+        assert tools.probe(tool, cache).version == (1, 2, 0)
+        assert 'fake' in json.loads(cache.fpath.read_text())
+
+    def test_probe_all(self, tmp_path: Path):
+        a_tool = fake_tool(tmp_path, 'a', 'a 1.2.0')
+        b_tool = fake_tool(tmp_path, 'b', 'b 1.0.0')
+        cache = ProbeCache(tmp_path / 'cache.json')
+
+        probes = tools.probe_all((a_tool, b_tool), cache)
+
+        assert [probe.tool for probe in probes] == [a_tool, b_tool]
+        assert [probe.problem for probe in probes] == [
+            None,
+            'b 1.0.0 is too old; 1.2.0 or newer is required',
+        ]
+        assert set(json.loads(cache.fpath.read_text())) == {'a', 'b'}
+
+
+class TestDoctorCLI:
+    def test_ok(self, cli: CLIRunner):
+        probes = [Probe(tools.UV, Path('/usr/bin/uv'), 'uv 0.9.17', cached=True)]
+
+        with mocks.patch_obj(tools, 'probe_all', return_value=probes):
+            result = cli.invoke('doctor')
+
+        assert result.stdout == '  ok  uv    0.9.17       /usr/bin/uv (cached)\n'
+
+    def test_problem(self, cli: CLIRunner):
+        probes = [
+            Probe(tools.UV, Path('/usr/bin/uv'), 'uv 0.9.16'),
+            Probe(tools.MISE, None),
+        ]
+
+        with mocks.patch_obj(tools, 'probe_all', return_value=probes):
+            result = cli.invoke('doctor', '--json', check=False)
+
+        assert result.exit_code == 1
+        assert [rec['problem'] for rec in json.loads(result.stdout)] == [
+            'uv 0.9.16 is too old; 0.9.17 or newer is required',
+            'mise not found',
+        ]
+        assert 'Error: 2 tool problem(s) found' in result.stderr
@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from coppy import trace
+from coppy.utils import CalledProcessError, sub_run, trace_name
+
+from .libs import mocks
+
+
+@pytest.fixture()
+def tracer(tmp_path: Path):
+    tracer = trace.Tracer(tmp_path / 'trace.json', root=True)
+    with mocks.patch_obj(trace, 'active', return_value=tracer):
+        yield tracer
+
+
+def read_trace(fpath: Path) -> list[dict]:
+    return [event for event in json.loads(fpath.read_text())['traceEvents'] if event['ph'] == 'X']
+
+
+class TestSpan:
+    def test_disabled(self):
+        with (
+            mocks.patch_obj(trace, 'active', return_value=None),
+            trace.span('nothing', cmd='x') as span,
+        ):
+            span['returncode'] = 0
+
+        assert span == {'cmd': 'x', 'returncode': 0}
+
+    def test_sub_run(self, tracer: trace.Tracer, tmp_path: Path):
+        sub_run('git', '--version', cwd=tmp_path, capture=True)
+
+        (event,) = tracer.events
+        assert event['name'] == 'git --version'
+        assert event['cat'] == 'sub_run'
+        assert event['dur'] > 0
+        assert event['args'] == {
+            'cmd': ['git', '--version'],
+            'cwd': tmp_path.as_posix(),
+            'returncode': 0,
+        }
+
+    def test_sub_run_failed(self, tracer: trace.Tracer):
+        with pytest.raises(CalledProcessError):
+            sub_run('git', 'nope', capture=True)
+
+        (event,) = tracer.events
+        assert event['args']['returncode'] == 1
+        assert event['args']['error'].startswith('CalledProcessError: ')
+
+    def test_sub_run_not_found(self, tracer: trace.Tracer):
+        with pytest.raises(CalledProcessError) as exc_info:
+            sub_run('coppy-no-such-program')
+
+        assert str(exc_info.value).startswith(
+            "Command '('coppy-no-such-program',)' could not be run: ",
+        )
+        (event,) = tracer.events
+        assert 'returncode' not in event['args']
+        assert 'No such file' in event['args']['error']
+
+    @pytest.mark.parametrize(
+        ('args', 'name'),
+        [
+            (('git', 'fetch', '--prune'), 'git fetch'),
+            (('/usr/bin/mise',), 'mise'),
+            ((sys.executable, '-m', 'copier', 'update', '--trust'), 'copier update'),
+        ],
+    )
+    def test_trace_name(self, args: tuple, name: str):
+        assert trace_name(args) == name
+
+
+class TestTraceFile:
+    def test_merges_child_processes(self, tmp_path: Path):
+        trace_fpath = tmp_path / 'trace.json'
+        child = 'from coppy.utils import sub_run; sub_run("git", "--version", capture=True)'
+        parent = (
+            f'import sys; from coppy.utils import sub_run; sub_run(sys.executable, "-c", {child!r})'
+        )
+
+        with mocks.environ(values={trace.ENV_VAR: trace_fpath.as_posix()}, clear=False):
+            subprocess.run((sys.executable, '-c', parent), check=True)
+
+        events = read_trace(trace_fpath)
+        assert sorted(event['name'] for event in events) == [
+            'git --version',
+            f'{Path(sys.executable).name} -c',
+        ]
+        # One from each process, merged by the parent.
+        assert len({event['pid'] for event in events}) == 2
+        assert not list(tmp_path.glob('*.part'))
+
+    def test_cli_option(self, tmp_path: Path):
+        trace_fpath = tmp_path / 'trace.json'
+
+        subprocess.run(
+            (sys.executable, '-m', 'coppy.cli', '--trace', trace_fpath, 'migrate', 'before'),
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+        )
+
+        assert [event['name'] for event in read_trace(trace_fpath)] == ['migrate before']
@@ -0,0 +1,232 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from coppy import upgrade
+from coppy.answers import ANSWERS_FNAME
+from coppy.utils import sub_run
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+MISE_TOML = """
+[hooks]
+enter = "uv sync"
+
+
+[tools]
+rumdl = 'latest'
+
+
+[settings]
+idiomatic_version_file_enable_tools = ["python"]
+""".lstrip()
+
+PREK_TOML = """
+[[repos]]
+repo = 'https://github.com/pre-commit/pre-commit-hooks'
+rev = 'v6.0.0'
+hooks = [{{ id = 'check-yaml' }}]
+
+[[repos]]
+repo = 'https://github.com/astral-sh/ruff-pre-commit'
+rev = "{ruff_rev}"
+hooks = [{{ id = 'ruff' }}]
+""".lstrip()
+
+RUFF_REPO = 'https://github.com/astral-sh/ruff-pre-commit'
+
+PYPROJECT_TOML = """
+[project]
+name = '{name}'
+dependencies = ['click']
+
+[dependency-groups]
+pytest = ['pytest']
+""".lstrip()
+
+# Stand-ins for the tools that log how they were called and change what the real ones would.
+FAKE_MISE = """#!/bin/sh
+echo "$PWD $*" >> {log}
+sed -i "s/rumdl = 'latest'/rumdl = '0.2.55'/" mise.toml
+echo "# bumped" > mise.lock
+"""
+FAKE_UV = """#!/bin/sh
+echo "$PWD $*" >> {log}
+echo "# upgraded $(basename $PWD)" > uv.lock
+"""
+FAKE_PREK = """#!/bin/sh
+echo "$PWD $*" >> {log}
+sed -i "s/rev: v0.15.0/rev: v0.16.3/; s/rev: v0.16.2/rev: v0.16.3/" "$3"
+"""
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Tests',
+        '-c',
+        'user.email=coppy-tests@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+def write_project(
+    dpath: Path,
+    python: str = '3.13',
+    ruff_rev: str = 'v0.16.2',
+    dependencies: str = "['click']",
+) -> Path:
+    files = {
+        ANSWERS_FNAME: '_commit: v1.0.0\n',
+        '.python-version': f'{python}\n',
+        'mise.toml': MISE_TOML,
+        'mise.lock': '',
+        'prek.toml': PREK_TOML.format(ruff_rev=ruff_rev),
+        'pyproject.toml': PYPROJECT_TOML.format(name=dpath.name).replace(
+            "['click']",
+            dependencies,
+        ),
+        'uv.lock': f'# {dpath.name}\n',
+    }
+    dpath.mkdir()
+    for rel_path, content in files.items():
+        dpath.joinpath(rel_path).write_text(content)
+    git(dpath, 'init')
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'project')
+    return dpath
+
+
+@pytest.fixture()
+def projects(tmp_path: Path) -> list[Path]:
+    return [
+        write_project(tmp_path / 'a'),
+        # Same as a, except the project name
+        write_project(tmp_path / 'b'),
+        # Different Python and hook rev
+        write_project(tmp_path / 'c', python='3.12', ruff_rev='v0.15.0'),
+        # Different dependencies
+        write_project(tmp_path / 'd', dependencies="['click', 'httpx']"),
+    ]
+
+
+@pytest.fixture()
+def log_fpath(tmp_path: Path):
+    log_fpath = tmp_path / 'calls.log'
+    bin_dpath = tmp_path / 'bin'
+    bin_dpath.mkdir()
+    for name, script in (('mise', FAKE_MISE), ('uv', FAKE_UV), ('prek', FAKE_PREK)):
+        bin_dpath.joinpath(name).write_text(script.format(log=log_fpath))
+        bin_dpath.joinpath(name).chmod(0o755)
+
+    with (
+        mocks.environ(PATH=f'{bin_dpath}{os.pathsep}{os.environ["PATH"]}'),
+        mocks.patch_obj(
+            upgrade.hooks.tools,
+            'find_prek',
+            return_value=bin_dpath.joinpath('prek').as_posix(),
+        ),
+    ):
+        yield log_fpath
+
+
+def calls(log_fpath: Path) -> list[str]:
+    return sorted(
+        line.replace(f'{log_fpath.parent}/', '') for line in log_fpath.read_text().splitlines()
+    )
+
+
+def test_plan(projects: list[Path]):
+    a, b, c, d = projects
+    a.joinpath('readme.md').write_text('dirty')
+
+    upgrade_plan = upgrade.plan(projects)
+
+    assert upgrade_plan.skipped == {a: 'working tree is dirty'}
+    assert upgrade_plan.groups['mise'] == [[b, d], [c]]
+    assert upgrade_plan.groups['uv'] == [[b], [c], [d]]
+    assert upgrade_plan.groups['prek'] == [[b, c, d], [b, d, c]]
+    assert [repo.rev for repo in upgrade_plan.hook_repos[RUFF_REPO]] == [
+        'v0.16.2',
+        'v0.15.0',
+    ]
+
+
+def test_set_revs():
+    config = PREK_TOML.format(ruff_rev='v0.15.0')
+
+    updated, changed = upgrade.set_revs(config, {RUFF_REPO: 'v0.16.3'})
+
+    assert changed == 1
+    assert updated == PREK_TOML.format(ruff_rev='v0.16.3')
+    assert upgrade.set_revs(updated, {RUFF_REPO: 'v0.16.3'}) == (updated, 0)
+
+
+def test_upgrade_fleet(projects: list[Path], log_fpath: Path):
+    upgrades = upgrade.upgrade_fleet(projects, upgrade.plan(projects), jobs=2)
+
+    # One mise resolution per group, uv resolves once per group and the rest lock offline, and
+    # prek updates every repo in one run.
+    mise_calls = [call for call in calls(log_fpath) if call.endswith('lock --bump')]
+    assert mise_calls == ['a lock --bump', 'c lock --bump']
+    uv_calls = [call for call in calls(log_fpath) if ' lock --upgrade' in call]
+    assert uv_calls == [
+        'a lock --upgrade',
+        'b lock --upgrade --offline',
+        'c lock --upgrade',
+        'd lock --upgrade',
+    ]
+    assert len([call for call in calls(log_fpath) if ' update --config ' in call]) == 1
+
+    # Every mise lock finished before uv started, they run in the same projects.
+    lines = log_fpath.read_text().splitlines()
+    last_mise = max(i for i, line in enumerate(lines) if line.endswith('lock --bump'))
+    first_uv = min(i for i, line in enumerate(lines) if ' lock --upgrade' in line)
+    assert last_mise < first_uv
+
+    assert [(project.status, project.message) for project in upgrades] == [
+        ('upgraded', 'mise resolved, uv resolved, prek 1 rev(s)'),
+        ('upgraded', 'mise applied, uv applied, prek 1 rev(s)'),
+        ('upgraded', 'mise resolved, uv resolved, prek 1 rev(s)'),
+        ('upgraded', 'mise applied, uv resolved, prek 1 rev(s)'),
+    ]
+    for dpath in projects:
+        assert "rumdl = '0.2.55'" in dpath.joinpath('mise.toml').read_text()
+        assert dpath.joinpath('mise.lock').read_text() == '# bumped\n'
+        assert dpath.joinpath('uv.lock').read_text() == f'# upgraded {dpath.name}\n'
+        assert dpath.joinpath('prek.toml').read_text() == PREK_TOML.format(ruff_rev='v0.16.3')
+
+
+def test_cli(projects: list[Path], log_fpath: Path, cli: CLIRunner):
+    result = cli.invoke('upgrade-deps', '--dry-run', '--step', 'uv', *map(str, projects))
+    assert result.stderr == 'uv: 4 projects in 3 groups\n'
+    assert not log_fpath.exists()
+
+    result = cli.invoke('upgrade-deps', '--json', '--step', 'mise', *map(str, projects))
+    summary = json.loads(result.stdout)
+    assert summary['counts'] == {'upgraded': 4, 'unchanged': 0, 'skipped': 0, 'failed': 0}
+    assert summary['plan']['steps']['mise']['resolutions'] == 2
+
+
+def test_upgrade_prek_first_current(tmp_path: Path, log_fpath: Path):
+    # The first project is already on the latest rev, which prek leaves alone.
+    projects = [
+        write_project(tmp_path / 'a', ruff_rev='v0.16.3'),
+        write_project(tmp_path / 'b', ruff_rev='v0.15.0'),
+    ]
+
+    upgrades = upgrade.upgrade_fleet(projects, upgrade.plan(projects, steps=('prek',)))
+
+    assert [(project.status, project.message) for project in upgrades] == [
+        ('unchanged', 'prek unchanged'),
+        ('upgraded', 'prek 1 rev(s)'),
+    ]
+    for dpath in projects:
+        assert dpath.joinpath('prek.toml').read_text() == PREK_TOML.format(ruff_rev='v0.16.3')
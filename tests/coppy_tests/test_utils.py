@@ -0,0 +1,125 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+from coppy import utils
+from coppy.utils import CalledProcessError, sub_run
+
+from .libs import mocks
+
+
+def python(code: str) -> tuple:
+    return (sys.executable, '-c', code)
+
+
+class TestSubRunStream:
+    def test_on_line(self):
+        lines = []
+        code = 'import sys; print("one"); print("oops", file=sys.stderr); print("two")'
+
+        result = sub_run(*python(code), on_line=lambda name, line: lines.append((name, line)))
+
+        assert sorted(lines) == [('stderr', 'oops'), ('stdout', 'one'), ('stdout', 'two')]
+        assert result.stdout == 'one\ntwo\n'
+        assert result.stderr == 'oops\n'
+
+    def test_tail_is_bounded(self):
+        result = sub_run(*python('for i in range(1000): print(i)'), stream=True, tail=3)
+
+        assert result.stdout == '[997 earlier lines not kept]\n997\n998\n999\n'
+
+    def test_error_has_tail(self):
+        code = 'import sys; [print(i, file=sys.stderr) for i in range(500)]; sys.exit(2)'
+
+        with pytest.raises(CalledProcessError) as exc_info:
+            sub_run(*python(code), stream=True, tail=2)
+
+        assert exc_info.value.returncode == 2
+        assert exc_info.value.stderr == '[498 earlier lines not kept]\n498\n499\n'
+
+    def test_returns(self):
+        result = sub_run(*python('import sys; sys.exit(3)'), stream=True, returns=(0, 3))
+        assert result.returncode == 3
+
+    @pytest.mark.parametrize('stream', [True, False])
+    def test_timeout(self, stream: bool):
+        code = 'import time; print("started", flush=True); time.sleep(30)'
+
+        start = time.perf_counter()
+        with pytest.raises(CalledProcessError) as exc_info:
+            sub_run(*python(code), stream=stream, capture=True, timeout=0.5)
+
+        assert time.perf_counter() - start < 10
+        assert isinstance(exc_info.value.__cause__, subprocess.TimeoutExpired)
+
+    def test_input(self):
+        result = sub_run(*python('import sys; print(sys.stdin.read())'), stream=True, input='hi')
+        assert result.stdout == 'hi\n'
+
+    def test_json(self):
+        code = 'import json; print(json.dumps({"a": [1, 2]}, indent=2))'
+        assert sub_run(*python(code), stream=True, json=True) == {'a': [1, 2]}
+
+    @pytest.mark.parametrize('stream', [True, False])
+    def test_json_lines(self, stream: bool):
+        def lines(code: str):
+            return sub_run(*python(code), stream=stream, json='lines')
+
+        assert lines('[print(f\'{{"n": {i}}}\') for i in range(3)]') == [
+            {'n': 0},
+            {'n': 1},
+            {'n': 2},
+        ]
+        # Always a list, even of one document or scalars
+        assert lines('print(\'{"n": 0}\')') == [{'n': 0}]
+        assert lines('print(1); print(); print("[2]")') == [1, [2]]
+
+    @pytest.mark.parametrize('output', ['3', '"three"', 'null'])
+    def test_json_scalar(self, output: str):
+        code = f'print({output!r})'
+        assert sub_run(*python(code), stream=True, json=True) == sub_run(*python(code), json=True)
+
+    def test_json_past_tail(self):
+        # The whole document is parsed, not just the lines kept for the result.
+        code = 'import json; print(json.dumps(list(range(100)), indent=1))'
+        assert sub_run(*python(code), stream=True, json=True, tail=5) == list(range(100))
+
+    @pytest.mark.parametrize('json', [True, 'lines'])
+    def test_json_invalid(self, json):
+        with pytest.raises(CalledProcessError):
+            sub_run(*python('print("not json")'), stream=True, json=json)
+
+    def test_matches_buffered(self):
+        code = 'import sys; print("out"); print("err", file=sys.stderr)'
+
+        buffered = sub_run(*python(code), capture=True)
+        streamed = sub_run(*python(code), stream=True)
+
+        assert isinstance(streamed, subprocess.CompletedProcess)
+        assert (streamed.stdout, streamed.stderr) == (buffered.stdout, buffered.stderr)
+
+
+class TestSudoRun:
+    def test_env(self):
+        with mocks.patch_obj(utils, 'sub_run') as m_sub_run:
+            utils.sudo_run(
+                'id',
+                sudo_user='coppy-tests',
+                env_path='/bin',
+                user_env={'HOME': '/tmp/home'},
+                cwd='/tmp',
+            )
+
+        m_sub_run.assert_called_once_with(
+            'sudo',
+            '-u',
+            'coppy-tests',
+            'HOME=/home/coppy-tests',
+            'env',
+            'HOME=/tmp/home',
+            'PATH=/bin',
+            args=('id',),
+            cwd='/tmp',
+        )
@@ -0,0 +1,211 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from coppy import verify
+from coppy.commands import update as update_cmd
+from coppy.fleet import ProjectResult
+from coppy.utils import sub_run
+from coppy.verify import Check
+
+from .libs import mocks
+from .libs.click import CLIRunner
+
+
+PREK_TOML = """
+[[repos]]
+repo = 'https://github.com/astral-sh/ruff-pre-commit'
+rev = 'v0.16.2'
+hooks = [{ id = 'ruff' }, { id = 'ruff-format', args = ['--check'] }]
+"""
+
+
+def git(dpath: Path, *args) -> str:
+    return sub_run(
+        'git',
+        '-c',
+        'user.name=Coppy Tests',
+        '-c',
+        'user.email=coppy-tests@example.com',
+        *args,
+        cwd=dpath,
+        capture=True,
+    ).stdout.strip()
+
+
+@pytest.fixture()
+def project_dpath(tmp_path: Path) -> Path:
+    dpath = tmp_path / 'project'
+    files = {
+        'prek.toml': PREK_TOML,
+        'pyproject.toml': "[project]\nname = 'enterprise'\n",
+        'readme.md': '# Enterprise\n',
+        'ruff.toml': 'line-length = 100\n',
+        'src/enterprise/__init__.py': '',
+    }
+    for rel_path, content in files.items():
+        dpath.joinpath(rel_path).parent.mkdir(parents=True, exist_ok=True)
+        dpath.joinpath(rel_path).write_text(content)
+    git(dpath, 'init')
+    git(dpath, 'add', '--all')
+    git(dpath, 'commit', '-m', 'project')
+    return dpath
+
+
+def fake_check(name: str, triggers: tuple[str, ...], exit_code: int = 0, **kwargs) -> Check:
+    # Each check leaves a file behind so tests can tell it ran.
+    script = f'touch ran-{name}; echo "{name} output"; exit {exit_code}'
+    return Check(name, ('sh', '-c', script), triggers, **kwargs)
+
+
+@pytest.mark.parametrize(
+    ('paths', 'expected'),
+    [
+        (['uv.lock'], ['sync', 'pytest']),
+        # pyproject.toml may have changed dependencies uv.lock doesn't have yet.
+        (['pyproject.toml'], ['lock', 'sync', 'pytest']),
+        (['src/enterprise/cli.py'], ['pytest', 'ruff']),
+        (['ruff.toml'], ['ruff']),
+        # rumdl isn't in the project's prek config.
+        (['rumdl.toml', 'readme.md'], []),
+        # prek runs every hook so the ruff check isn't needed.
+        (['prek.toml', 'ruff.toml'], ['prek']),
+        (['.npmrc'], []),
+    ],
+)
+def test_plan(paths: list[str], expected: list[str]):
+    planned = verify.plan(paths, {'ruff', 'ruff-format', 'uv-lock'})
+
+    assert [check.name for check in planned] == expected
+
+
+def test_plan_merges_hooks():
+    planned = verify.plan(['src/enterprise/cli.py', 'readme.md'], {'ruff', 'ruff-format', 'rumdl'})
+
+    # One prek run for both, parallel runs in a project contend for prek's store lock.
+    assert [check.name for check in planned] == ['pytest', 'ruff+rumdl']
+    assert planned[1].command()[-4:] == ('--all-files', 'ruff', 'ruff-format', 'rumdl')
+
+
+def test_changed_paths(project_dpath: Path):
+    head = git(project_dpath, 'rev-parse', 'HEAD')
+    project_dpath.joinpath('ruff.toml').write_text('line-length = 99\n')
+    project_dpath.joinpath('readme.md').unlink()
+    project_dpath.joinpath('tests').mkdir()
+    project_dpath.joinpath('tests/test_cli.py').write_text('')
+
+    assert verify.changed_paths(project_dpath) == ['readme.md', 'ruff.toml', 'tests/test_cli.py']
+
+    git(project_dpath, 'commit', '--all', '-m', 'update')
+    assert verify.changed_paths(project_dpath) == ['tests/test_cli.py']
+    assert verify.changed_paths(project_dpath, since=head) == [
+        'readme.md',
+        'ruff.toml',
+        'tests/test_cli.py',
+    ]
+
+
+def test_verify_project(project_dpath: Path):
+    checks = (
+        fake_check('sync', ('pyproject.toml',), first=True),
+        fake_check('pytest', ('pyproject.toml', 'src/*')),
+        fake_check('ruff', ('ruff.toml', '*.py'), exit_code=1, hook_ids=('ruff',)),
+        fake_check('rumdl', ('*.md',), hook_ids=('rumdl',)),
+    )
+    project_dpath.joinpath('pyproject.toml').write_text("[project]\nname = 'ent'\n")
+    project_dpath.joinpath('src/enterprise/cli.py').write_text('')
+    project_dpath.joinpath('readme.md').write_text('# Ent\n')
+
+    result = verify.verify_project(project_dpath, checks=checks)
+
+    assert result.status == 'failed'
+    assert result.changed == ['pyproject.toml', 'readme.md', 'src/enterprise/cli.py']
+    assert [(check.name, check.status, check.message) for check in result.checks] == [
+        ('sync', 'passed', ''),
+        ('pytest', 'passed', ''),
+        ('ruff', 'failed', 'ruff output'),
+    ]
+    assert not project_dpath.joinpath('ran-rumdl').exists()
+
+
+def test_sync_failure_skips_the_rest(project_dpath: Path):
+    checks = (
+        fake_check('sync', ('pyproject.toml',), exit_code=1, first=True),
+        fake_check('pytest', ('pyproject.toml',)),
+    )
+    project_dpath.joinpath('pyproject.toml').write_text("[project]\nname = 'ent'\n")
+
+    result = verify.verify_project(project_dpath, checks=checks)
+
+    assert [(check.name, check.status) for check in result.checks] == [
+        ('sync', 'failed'),
+        ('pytest', 'skipped'),
+    ]
+    assert not project_dpath.joinpath('ran-pytest').exists()
+
+
+def test_nothing_to_verify(project_dpath: Path):
+    project_dpath.joinpath('.npmrc').write_text('min-release-age=7\n')
+
+    result = verify.verify_project(project_dpath)
+
+    assert (result.status, result.changed, result.checks) == ('unaffected', ['.npmrc'], [])
+
+
+def test_cli_dry_run(project_dpath: Path, tmp_path: Path, cli: CLIRunner):
+    project_dpath.joinpath('uv.lock').write_text('version = 1\n')
+    not_git = tmp_path / 'not-git'
+    not_git.mkdir()
+
+    result = cli.invoke('verify', '--dry-run', '--json', str(project_dpath), str(not_git))
+
+    summary = json.loads(result.stdout)
+    assert summary['counts'] == {
+        'planned': 1,
+        'passed': 0,
+        'unaffected': 0,
+        'failed': 0,
+        'skipped': 1,
+    }
+    checks = summary['projects'][0]['checks']
+    assert [(check['name'], check['status']) for check in checks] == [
+        ('sync', 'planned'),
+        ('pytest', 'planned'),
+    ]
+
+
+def test_update_verify(project_dpath: Path, tmp_path: Path, cli: CLIRunner):
+    skipped_dpath = tmp_path / 'skipped'
+    skipped_dpath.mkdir()
+
+    def update_project(project_dpath, use_head, git_env):
+        if project_dpath == skipped_dpath:
+            return ProjectResult(project_dpath, 'skipped', 0.1, 'working tree is dirty')
+        project_dpath.joinpath('ruff.toml').write_text('line-length = 99\n')
+        return ProjectResult(project_dpath, 'updated', 0.1)
+
+    with (
+        mocks.patch_obj(update_cmd.UvVersion, 'check'),
+        mocks.patch_obj(update_cmd.fleet, 'update_project', side_effect=update_project),
+        mocks.patch_obj(
+            verify,
+            'run_check',
+            side_effect=lambda project_dpath, check: verify.CheckResult(check.name, 'failed'),
+        ) as m_run_check,
+    ):
+        result = cli.invoke(
+            'update',
+            '--verify',
+            '--json',
+            str(project_dpath),
+            str(skipped_dpath),
+            check=False,
+        )
+
+    assert result.exit_code == 1
+    assert 'Error: 1 project verification(s) failed' in result.stderr
+    # Only the updated project is verified.
+    summary = json.loads(result.stdout)['verify']
+    assert [project['project'] for project in summary['projects']] == [project_dpath.as_posix()]
+    assert [call.args[1].name for call in m_run_check.call_args_list] == ['ruff']